@@ -1,7 +1,5 @@
 import os
 import sys
-import zipfile
-from nltk.stem import PorterStemmer
 
 from practice3_ex3 import (
     compute_ltn_weights,
@@ -11,10 +9,16 @@ from practice3_ex3 import (
     tokenizer,
     load_stopwords,
     build_tf_df,
+    TOKEN_PATTERN,
 )
 from practice3_ex4 import compute_ltc_weights, score_ltc_docs_lnn_query
 from practice3_ex5 import score_query_bm25
 
+# cache d'index partagé avec pratice4/main.py (cf. pratice4/index_cache.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pratice4"))
+from index_cache import index_key, cached_index, cached_weights
+from grid import run_tasks, share, shared
+
 # DummyStemmer pour les cas sans stemming
 class DummyStemmer:
     def stem(self, t):
@@ -33,23 +37,26 @@ queries = {
 }
 
 RUNS_OUTPUT_DIR = "generated_runs"
-os.makedirs(RUNS_OUTPUT_DIR, exist_ok=True)
 
 TEAM = "AdrienSoleneWilliam"
 DATA_DIR = os.path.join(os.path.dirname(__file__), "Practice_03_data")
 DATAFILE = os.path.join(DATA_DIR, "Text_Only_Ascii_Coll_NoSem")
 STOPFILE = os.path.join(DATA_DIR, "stop-words-english4.txt")
+WORKERS = os.cpu_count()  # runs générés en parallèle (cf. pratice4/grid.py)
 
 
 # FONCTION DE GÉNÉRATION
-def generate_run(run_id, method, stopwords, stemmer, stem_cache, postings, df, doc_len, N, stop, stem):
+def generate_run(run_id, method, stopwords, stemmer, stem_cache, postings, df, doc_len, N, stop, stem, key=None):
     print(f"\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
     print(f"  → Génération run {run_id}  ({method}, stop={stop}, stem={stem})")
     print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
     # Pré-calcul des poids si nécessaire
     try:
-        if method == "ltn":
+        if key and method in ("ltn", "ltc"):
+            weigh = compute_ltn_weights if method == "ltn" else compute_ltc_weights
+            weighted_postings, _ = cached_weights(key, method, lambda: weigh(postings, df, N))
+        elif method == "ltn":
             weighted_postings, _ = compute_ltn_weights(postings, df, N)
         elif method == "ltc":
             weighted_postings, _ = compute_ltc_weights(postings, df, N)
@@ -116,81 +123,85 @@ def generate_run(run_id, method, stopwords, stemmer, stem_cache, postings, df, d
     return run_path
 
 
-# CHARGEMENT DE LA COLLECTION
-collection = load_collection(DATAFILE)
-docs_text_only = [(doc_id, content) for doc_id, content in collection]
-print(f"{len(docs_text_only)} documents chargés.")
+def _grid_run(run_id, method, stop, stem):
+    """Un run de la grille, exécuté dans un worker forké sur l'index partagé."""
+    stopwords, stemmer, stem_cache, postings, df, doc_len, N, key = shared((stop, stem))
+    return generate_run(run_id, method, stopwords, stemmer, stem_cache, postings, df, doc_len, N, stop, stem, key)
 
 
-# COMBINAISONS STOP / STEM
-stop_options = ["nostop", "stop671"]
-stem_options = ["nostem", "porter"]
-methods = ["ltn", "ltc", "bm25"]
+def main():
+    os.makedirs(RUNS_OUTPUT_DIR, exist_ok=True)
 
-stopwords_dict = {
-    "nostop": set(),
-    "stop671": load_stopwords(STOPFILE)
-}
+    # CHARGEMENT DE LA COLLECTION (seulement si un index n'est pas en cache)
+    docs_text_only = []
 
+    def get_docs():
+        if not docs_text_only:
+            collection = load_collection(DATAFILE)
+            docs_text_only.extend((doc_id, content) for doc_id, content in collection)
+            print(f"{len(docs_text_only)} documents chargés.")
+        return docs_text_only
 
-# GÉNÉRATION DE TOUS LES RUNS
-run_paths = []
-run_id_count = 1
+    # COMBINAISONS STOP / STEM
+    stop_options = ["nostop", "stop671"]
+    stem_options = ["nostem", "porter"]
+    methods = ["ltn", "ltc", "bm25"]
 
-for stop in stop_options:
-    print(f"\n=== STOP OPTION : {stop} ===")
+    stopwords_dict = {
+        "nostop": set(),
+        "stop671": load_stopwords(STOPFILE)
+    }
 
-    for stem in stem_options:
-        print(f"\n--- STEM OPTION : {stem} ---")
+    # GÉNÉRATION DE TOUS LES RUNS
+    tasks = []
+    run_id_count = 1
 
-        stopwords = stopwords_dict[stop]
+    for stop in stop_options:
+        print(f"\n=== STOP OPTION : {stop} ===")
 
-        stem_cache = {}
-        if stem == "porter":
-            stemmer = PorterStemmer()
-        else:
-            stemmer = DummyStemmer()
-
-        print("  → Construction postings/df...")
-        postings, df, doc_ids, _, _ = build_tf_df(docs_text_only, stopwords)
-        N = len(doc_ids)
-
-        # OPTIMISATION DU CALCUL DOC_LEN
-        print("  → Calcul doc_len (optimisé)...")
-        doc_len = {doc: 0 for doc in doc_ids}
-        for term, plist in postings.items():
-            for doc, tf in plist.items():
-                doc_len[doc] += tf
-
-        # Génération des méthodes
-        for method in methods:
-            print(f"      Méthode {method} en cours…")
-
-            run_path = generate_run(
-                run_id_count,
-                method,
-                stopwords,
-                stemmer,
-                stem_cache,
-                postings,
-                df,
-                doc_len,
-                N,
-                stop,
-                stem
-            )
-            run_paths.append(run_path)
-            run_id_count += 1
-
-
-# ZIP FINAL
-zip_name = f"{TEAM}_ALL_RUNS.zip"
-zip_path = os.path.join(RUNS_OUTPUT_DIR, zip_name)
-
-print("\nCréation du ZIP final...")
-with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-    for path in run_paths:
-        if path:
-            zipf.write(path, os.path.basename(path))
-
-print(f"ZIP généré : {zip_path}")
\ No newline at end of file
+        for stem in stem_options:
+            print(f"\n--- STEM OPTION : {stem} ---")
+
+            stopwords = stopwords_dict[stop]
+
+            stem_cache = {}
+            if stem == "porter":
+                from nltk.stem import PorterStemmer  # import différé
+                stemmer = PorterStemmer()
+            else:
+                stemmer = DummyStemmer()
+
+            def build():
+                print("  → Construction postings/df...")
+                postings, df, doc_ids, _, doc_stems = build_tf_df(get_docs(), stopwords)
+
+                # OPTIMISATION DU CALCUL DOC_LEN
+                print("  → Calcul doc_len (optimisé)...")
+                doc_len = {doc: 0 for doc in doc_ids}
+                for term, plist in postings.items():
+                    for doc, tf in plist.items():
+                        doc_len[doc] += tf
+                return postings, df, doc_len, doc_ids, doc_stems
+
+            # build_tf_df stemme toujours avec Porter : l'index est celui de (stop, porter)
+            key = index_key(DATAFILE, STOPFILE if stop == "stop671" else None, "porter", TOKEN_PATTERN.pattern)
+            postings, df, doc_len, doc_ids, _ = cached_index(key, build)
+            N = len(doc_ids)
+
+            # index partagé avec les workers (fork, copy-on-write)
+            share((stop, stem), (stopwords, stemmer, stem_cache, postings, df, doc_len, N, key))
+            for method in methods:
+                tasks.append((run_id_count, method, stop, stem))
+                run_id_count += 1
+
+    # GÉNÉRATION DES MÉTHODES EN PARALLÈLE + ZIP AU FIL DE L'EAU
+    zip_name = f"{TEAM}_ALL_RUNS.zip"
+    zip_path = os.path.join(RUNS_OUTPUT_DIR, zip_name)
+
+    run_tasks(tasks, _grid_run, zip_path=zip_path, workers=WORKERS)
+
+    print(f"ZIP généré : {zip_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,6 @@ import time
 import math
 import argparse
 from collections import defaultdict, Counter
-from nltk.stem import PorterStemmer
 
 DOC_PATTERN = re.compile(r"<doc>\s*<docno>\s*([^<\s]+)\s*</docno>(.*?)</doc>",
                          flags=re.IGNORECASE | re.DOTALL)
@@ -42,6 +41,8 @@ def idf_weight(N, df):
     return 0.0 if df <= 0 else math.log10(N / df)
 
 def build_tf_df(text, stopwords):
+    from nltk.stem import PorterStemmer  # import différé
+
     ps = PorterStemmer()
     stem_cache = {}
     df = defaultdict(int)  
@@ -4,7 +4,6 @@ import time
 import math
 import argparse
 from collections import defaultdict
-from nltk.stem import PorterStemmer
 
 # --- CONSTANTES ---
 # Paramètres spécifiques à l'Exercice 5 (BM25)
@@ -122,6 +121,8 @@ def main():
     print("Lecture et indexation des documents (avec stop-words et stemming)...")
     start = time.time()
 
+    from nltk.stem import PorterStemmer  # import différé
+
     ps = PorterStemmer()
     with open(stopword_path, "r", encoding="utf-8") as f:
         stopwords = set(line.strip().lower() for line in f if line.strip())
@@ -6,6 +6,11 @@ import sys
 from collections import Counter
 import practice3_ex3
 from practice3_ex3 import compute_ltn_weights, score_query_ltn, load_collection, preprocess_terms, tokenizer, load_stopwords, build_tf_df
+from practice3_ex3 import get_stemmer, TOKEN_PATTERN
+
+# cache d'index partagé avec pratice4/main.py (cf. pratice4/index_cache.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pratice4"))
+from index_cache import index_key, cached_index, cached_weights
 
 # CONFIGURATION
 data_path = os.path.join("Practice_03_data", "Text_Only_Ascii_Coll_NoSem")
@@ -30,40 +35,58 @@ stem_option = "nostem"
 
 run_file = f"{team_name}_{run_id_number}_{weighting}_{granularity}_{stop_option}_{stem_option}.txt"
 
-# LECTURE DE LA COLLECTION
-start_time = time.time()
-docs = load_collection(data_path)
-print(f"{len(docs)} documents détectés.")
 
-# CONSTRUCTION DES POSTINGS + DF
-stopwords = set()  # pas de stop-words pour ce run
-postings, df, doc_ids, stemmer, stem_cache = build_tf_df(docs, stopwords)
-N = len(doc_ids)
+def main():
+    # LECTURE DE LA COLLECTION
+    start_time = time.time()
+    stopwords = set()  # pas de stop-words pour ce run
+
+    def build():
+        docs = load_collection(data_path)
+        print(f"{len(docs)} documents détectés.")
+
+        # CONSTRUCTION DES POSTINGS + DF
+        postings, df, doc_ids, _, doc_stems = build_tf_df(docs, stopwords)
+        doc_len = {d: 0 for d in doc_ids}
+        for plist in postings.values():
+            for d, tf in plist.items():
+                doc_len[d] += tf
+        return postings, df, doc_len, doc_ids, doc_stems
+
+    # build_tf_df stemme toujours avec Porter ; collection relue seulement si absente du cache
+    key = index_key(data_path, None, "porter", TOKEN_PATTERN.pattern)
+    postings, df, doc_len, doc_ids, stem_cache = cached_index(key, build)
+    stemmer = get_stemmer()
+    N = len(doc_ids)
+
+    # CALCUL DES POIDS LTN
+    weighted_postings, idf = cached_weights(key, "ltn", lambda: compute_ltn_weights(postings, df, N))
+
+    # CALCUL DES SCORES ET GÉNÉRATION DU RUN
+    run_lines = []
 
-# CALCUL DES POIDS LTN
-weighted_postings, idf = compute_ltn_weights(postings, df, N)
+    for qid, query_text in queries.items():
+        query_terms = tokenizer(query_text)
+        query_terms = preprocess_terms(query_terms, stopwords, stemmer, stem_cache)
 
-# CALCUL DES SCORES ET GÉNÉRATION DU RUN
-run_lines = []
+        # Scores RSV pour tous les documents
+        scores = score_query_ltn(weighted_postings, query_terms)
 
-for qid, query_text in queries.items():
-    query_terms = tokenizer(query_text)
-    query_terms = preprocess_terms(query_terms, stopwords, stemmer, stem_cache)
+        # Top N documents (1500 max)
+        top_docs = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:max_docs_per_query]
 
-    # Scores RSV pour tous les documents
-    scores = score_query_ltn(weighted_postings, query_terms)
+        # Génération des lignes au format INEX (7 colonnes)
+        for rank, (doc_id, score) in enumerate(top_docs, start=1):
+            xml_path = "/article[1]"  # unité = article entier
+            run_lines.append(f"{qid} Q0 {doc_id} {rank} {score:.4f} {team_name} {xml_path}")
 
-    # Top N documents (1500 max)
-    top_docs = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:max_docs_per_query]
+    # ÉCRITURE DU FICHIER DE RUN
+    with open(run_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(run_lines))
 
-    # Génération des lignes au format INEX (7 colonnes)
-    for rank, (doc_id, score) in enumerate(top_docs, start=1):
-        xml_path = "/article[1]"  # unité = article entier
-        run_lines.append(f"{qid} Q0 {doc_id} {rank} {score:.4f} {team_name} {xml_path}")
+    elapsed_time = time.time() - start_time
+    print(f"Run INEX généré dans {run_file} en {elapsed_time:.2f} secondes.")
 
-# ÉCRITURE DU FICHIER DE RUN
-with open(run_file, "w", encoding="utf-8") as f:
-    f.write("\n".join(run_lines))
 
-elapsed_time = time.time() - start_time
-print(f"Run INEX généré dans {run_file} en {elapsed_time:.2f} secondes.")
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ import re
 import gzip
 import time
 import os
-import matplotlib.pyplot as plt
 
 
 def read_documents(text):
@@ -114,6 +113,8 @@ def main():
                     print(f"{postings[doc_id]} {doc_id}")
 
     # --- Graphique temps / taille ---
+    import matplotlib.pyplot as plt  # import différé : seulement pour tracer
+
     plt.figure(figsize=(6, 4))
     plt.plot(sizes, times, marker="o")
     plt.xlabel("Taille de la collection (KB)")
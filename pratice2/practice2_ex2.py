@@ -2,7 +2,6 @@ import re
 import gzip
 import os
 import time
-import matplotlib.pyplot as plt
 
 
 def read_documents(text):
@@ -79,6 +78,8 @@ def main():
               f"Longueur moyenne terme: {round(avg_term, 2)} | Vocabulaire: {vocab_size}")
 
     # --- Tracer 3 sous-graphes ---
+    import matplotlib.pyplot as plt  # import différé : seulement pour tracer
+
     plt.figure(figsize=(15, 4))
 
     plt.subplot(1, 3, 1)
@@ -1,7 +1,6 @@
 import re
 import gzip
 import os
-import matplotlib.pyplot as plt
 
 def read_documents(text):
     pattern = re.compile(r"<doc>\s*<docno>\s*([^<\s]+)\s*</docno>(.*?)</doc>",
@@ -107,6 +106,8 @@ def main():
         print(f"Mots (après stopwords): {total_terms} | Longueur moy doc: {round(avg_doc, 2)} | "
               f"Longueur moy terme: {round(avg_term, 2)} | Vocabulaire: {vocab_size}")
 
+    import matplotlib.pyplot as plt  # import différé : seulement pour tracer
+
     plt.figure(figsize=(15, 4))
 
     plt.subplot(1, 3, 1)
@@ -2,9 +2,6 @@ import gzip
 import os
 import re
 
-import matplotlib.pyplot as plt
-from nltk.stem import PorterStemmer
-
 
 def iter_documents(path):
     """Version optimisée : lit tout le fichier et extrait les documents d'un coup."""
@@ -75,6 +72,8 @@ def main():
         print(f"Fichier stop-words introuvable : {stop_path}")
         return
 
+    from nltk.stem import PorterStemmer
+
     stopset = load_stopwords(stop_path)
     stemmer = PorterStemmer()
 
@@ -136,6 +135,8 @@ def main():
         avg_term_stem_list.append(round(avg_term_s, 2))
         vocab_stem_list.append(vocab_size_s)
 
+    import matplotlib.pyplot as plt  # import différé : seulement pour tracer
+
     plt.figure(figsize=(15, 4))
 
     plt.subplot(1, 3, 1)
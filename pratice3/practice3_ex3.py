@@ -5,11 +5,6 @@ import math
 import argparse
 from collections import defaultdict, Counter
 
-try:
-    from nltk.stem import PorterStemmer
-except Exception:
-    PorterStemmer = None
-
 DOC_PATTERN = re.compile(r"<doc>\s*<docno>\s*([^<\s]+)\s*</docno>(.*?)</doc>",
                          flags=re.IGNORECASE | re.DOTALL)
 
@@ -35,7 +30,10 @@ def load_stopwords(path):
 
 
 def get_stemmer():
-    if PorterStemmer is None:
+    # import différé : NLTK n'est chargé que si on stemme réellement
+    try:
+        from nltk.stem import PorterStemmer
+    except Exception:
         raise RuntimeError("NLTK est requis pour PorterStemmer. Fais: pip install nltk")
     return PorterStemmer()
 
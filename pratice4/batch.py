@@ -0,0 +1,166 @@
+"""
+Recherche par lots : des milliers de topics lus depuis un fichier (INEX,
+TREC ou TSV), un seul run au format 7 colonnes.
+
+    python batch.py --topics topics.xml --config stop671:porter --method bm25 --workers 8 --out run.txt
+
+Les requêtes sont prétraitées en bloc puis regroupées par leur terme le plus
+fréquent (la liste de postings la plus coûteuse) : dans un lot, chaque terme
+distinct n'est lu / pondéré qu'une fois (term-at-a-time) et sa contribution
+est ajoutée à toutes les requêtes du lot qui le contiennent. Les lots sont
+répartis sur un pool forké qui partage l'index (cf. grid.py).
+"""
+import os
+import re
+import math
+import time
+import argparse
+from collections import Counter, defaultdict
+
+import main as ri
+from grid import run_tasks, share, shared
+from runio import format_run_block
+from searcher import LoadedIndex
+
+BATCH_SIZE = 256
+
+
+# ---------------------------
+# Lecture des topics
+# ---------------------------
+INEX_TOPIC = re.compile(r"<topic\b[^>]*\bid\s*=\s*\"?([^\"\s>]+)\"?[^>]*>(.*?)</topic>", re.IGNORECASE | re.DOTALL)
+TREC_TOPIC = re.compile(r"<top>(.*?)</top>", re.IGNORECASE | re.DOTALL)
+TREC_NUM = re.compile(r"<num>\s*(?:Number:)?\s*(\S+)", re.IGNORECASE)
+TITLE = re.compile(r"<title>\s*(.*?)\s*(?:</title>|<|$)", re.IGNORECASE | re.DOTALL)
+
+
+def load_topics(path):
+    """Topics INEX (<topic id=..><title>), TREC (<top><num><title>) ou TSV (qid<TAB>texte) -> liste (qid, texte)."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+    topics = []
+    if INEX_TOPIC.search(text):
+        for m in INEX_TOPIC.finditer(text):
+            title = TITLE.search(m.group(2))
+            topics.append((m.group(1), " ".join(title.group(1).split()) if title else ""))
+    elif TREC_TOPIC.search(text):
+        for m in TREC_TOPIC.finditer(text):
+            num, title = TREC_NUM.search(m.group(1)), TITLE.search(m.group(1))
+            if num:
+                topics.append((num.group(1), " ".join(title.group(1).split()) if title else ""))
+    else:
+        for line in text.splitlines():
+            if "\t" in line:
+                qid, qtext = line.split("\t", 1)
+                topics.append((qid.strip(), qtext.strip()))
+    return topics
+
+
+# ---------------------------
+# Scoring par lots (term-at-a-time)
+# ---------------------------
+def group_queries(queries, df, size=BATCH_SIZE):
+    """Trie les requêtes par leur terme de plus grand df puis découpe en lots."""
+    def heaviest(item):
+        terms = item[2]
+        return max((df.get(t, 0), t) for t in terms) if terms else (0, "")
+    ordered = sorted(queries, key=heaviest, reverse=True)
+    return [ordered[i:i + size] for i in range(0, len(ordered), size)]
+
+
+def term_contributions(index, method, t, k1=ri.BM25_K1, b=ri.BM25_B):
+    """Contribution par document d'un terme (avant poids de requête) : w_td pour ltn/ltc, idf·tf_adj pour bm25."""
+    if method in ("ltn", "ltc"):
+        return index.weights[method].get(t) or {}
+    plist = index.postings.get(t)
+    if not plist:
+        return {}
+    idf_t = ri.bm25_idf(index.df.get(t, 0), index.N)
+    doc_len, avdl = index.doc_len, index.avdl
+    return {d: idf_t * (tf * (k1 + 1.0)) / (tf + k1 * ((1.0 - b) + b * (doc_len.get(d, avdl) / avdl)))
+            for d, tf in plist.items()}
+
+
+def score_batch(index, method, batch):
+    """batch : liste (position, qid, termes). Renvoie {position: scores}."""
+    contribs = {}  # une seule lecture / pondération par terme et par lot
+    scores = {}
+    for pos, _, terms in batch:
+        # même ordre des termes que les scorers de main.py (départage des ex aequo identique)
+        if method == "bm25":
+            q_w = {t: 1.0 for t in set(terms)}
+        else:
+            q_w = {t: 1.0 + math.log10(tf) for t, tf in Counter(terms).items()}
+        acc = defaultdict(float)
+        for t, wq in q_w.items():
+            contrib = contribs.get(t)
+            if contrib is None:
+                contrib = contribs[t] = term_contributions(index, method, t)
+            for d, c in contrib.items():
+                acc[d] += c * wq
+        scores[pos] = acc
+    return scores
+
+
+def _run_batch(i, method, k):
+    """Worker : score un lot et renvoie les blocs de run formatés, par position."""
+    index, batches = shared("batch_index"), shared("batches")
+    batch = batches[i]
+    scores = score_batch(index, method, batch)
+    return {pos: format_run_block(qid, ri.top_k_with_padding(scores[pos], index.doc_ids, k), ri.TEAM)
+            for pos, qid, _ in batch}
+
+
+def run_batch(topics, index, method="bm25", out_path="batch_run.txt", workers=None, k=ri.TOP_K):
+    """Prétraite, groupe, score en parallèle et écrit un seul run (ordre du fichier de topics)."""
+    t0 = time.perf_counter()
+    queries = [(pos, qid, index.query_terms(qtext)) for pos, (qid, qtext) in enumerate(topics)]
+    batches = group_queries(queries, index.df)
+    t_prep = time.perf_counter() - t0
+
+    share("batch_index", index)
+    share("batches", batches)
+    t0 = time.perf_counter()
+    blocks = {}
+    for result, _ in run_tasks([(i, method, k) for i in range(len(batches))], _run_batch, workers=workers):
+        blocks.update(result)
+    t_score = time.perf_counter() - t0
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        for pos in range(len(topics)):
+            f.write(blocks[pos])
+    return t_prep, t_score
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Recherche par lots sur un fichier de topics (INEX / TREC / TSV).")
+    ap.add_argument("--topics", required=True, help="Fichier de topics.")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--method", choices=["ltn", "ltc", "bm25"], default="bm25")
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("-k", type=int, default=ri.TOP_K)
+    ap.add_argument("--out", default=None, help="Run de sortie (défaut : OUTPUT_DIR, nom hors du motif des runs de la grille repris par fusion.py).")
+    args = ap.parse_args()
+
+    topics = load_topics(args.topics)
+    if not topics:
+        print(f"[ERROR] Aucun topic lu dans {args.topics}")
+        return
+    stop_name, stem_name = args.config.split(":")
+    t0 = time.perf_counter()
+    index = LoadedIndex(stop_name, stem_name)
+    t_load = time.perf_counter() - t0
+
+    out = args.out
+    if out is None:
+        ri.ensure_dir(ri.OUTPUT_DIR)
+        out = os.path.join(ri.OUTPUT_DIR, f"{ri.TEAM}_batch_{args.method}_{stop_name}_{stem_name}.txt")
+    t_prep, t_score = run_batch(topics, index, args.method, out, args.workers, args.k)
+    total = t_prep + t_score
+    print(f"{len(topics)} topics -> {out}")
+    print(f"index {t_load:.2f}s  prétraitement {t_prep:.2f}s  scoring {t_score:.2f}s  "
+          f"=> {len(topics) / total if total else 0.0:.1f} requêtes/s ({args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""
+Recherche booléenne sur l'index complet (cf. pratice1/pratice1_ex3.py, qui
+faisait AND / OR / NOT en opérations d'ensembles sur un index de 10 docs).
+
+    python boolean.py --config stop671:porter "olive AND (oil OR health) AND NOT film"
+    python boolean.py --bench
+
+Syntaxe : AND, OR, NOT (majuscules), parenthèses ; deux termes juxtaposés =
+AND implicite. Priorité NOT > AND > OR. Les termes passent par le même
+prétraitement que l'index (stop-words ignorés, stemming).
+
+Postings : tableaux triés de numéros de documents (array 'I'). Un AND trie
+ses opérandes par taille (df pour les termes) et intersecte du plus court au
+plus long par recherche galopante : coût O(|a| log(|b|/|a|)), sous-linéaire
+dans la plus longue liste ; pour des listes de tailles proches, fusion avec
+pointeurs de saut tous les sqrt(n). Les NOT d'un AND sont appliqués en
+dernier, par différence. --bench compare fusion, sauts, galop et set &.
+"""
+import re
+import math
+import time
+import heapq
+import argparse
+from array import array
+from bisect import bisect_left
+
+import main as ri
+from stemmers import get_stemmer
+from index_cache import get_cache
+
+QUERY_TOKEN_RE = re.compile(r"\(|\)|[^\s()]+")
+
+
+# ---------------------------
+# Intersections / différences sur listes triées
+# ---------------------------
+def intersect_merge(a, b):
+    """Fusion linéaire : O(|a| + |b|)."""
+    out = array("I")
+    i = j = 0
+    na, nb = len(a), len(b)
+    while i < na and j < nb:
+        if a[i] < b[j]:
+            i += 1
+        elif a[i] > b[j]:
+            j += 1
+        else:
+            out.append(a[i])
+            i += 1
+            j += 1
+    return out
+
+
+def intersect_skip(a, b):
+    """Fusion avec pointeurs de saut implicites tous les sqrt(n) éléments."""
+    out = array("I")
+    na, nb = len(a), len(b)
+    sa, sb = max(1, math.isqrt(na)), max(1, math.isqrt(nb))
+    i = j = 0
+    while i < na and j < nb:
+        x, y = a[i], b[j]
+        if x == y:
+            out.append(x)
+            i += 1
+            j += 1
+        elif x < y:
+            if i % sa == 0 and i + sa < na and a[i + sa] <= y:
+                while i % sa == 0 and i + sa < na and a[i + sa] <= y:
+                    i += sa
+            else:
+                i += 1
+        else:
+            if j % sb == 0 and j + sb < nb and b[j + sb] <= x:
+                while j % sb == 0 and j + sb < nb and b[j + sb] <= x:
+                    j += sb
+            else:
+                j += 1
+    return out
+
+
+def _gallop(b, x, lo):
+    """Plus petit i >= lo tel que b[i] >= x : recherche exponentielle puis dichotomie."""
+    n = len(b)
+    hi, step = lo, 1
+    while hi < n and b[hi] < x:
+        lo = hi + 1
+        hi += step
+        step *= 2
+    return bisect_left(b, x, lo, min(hi, n))
+
+
+def intersect_gallop(a, b):
+    """Chaque élément de la plus courte liste est cherché dans l'autre en galopant."""
+    if len(a) > len(b):
+        a, b = b, a
+    out = array("I")
+    j, nb = 0, len(b)
+    for x in a:
+        j = _gallop(b, x, j)
+        if j == nb:
+            break
+        if b[j] == x:
+            out.append(x)
+            j += 1
+    return out
+
+
+def intersect_adaptive(a, b):
+    """Galop si les tailles sont très déséquilibrées, sinon fusion avec sauts."""
+    if len(a) > len(b):
+        a, b = b, a
+    return intersect_gallop(a, b) if len(a) * 4 < len(b) else intersect_skip(a, b)
+
+
+def difference_gallop(a, b):
+    """a \\ b."""
+    out = array("I")
+    j, nb = 0, len(b)
+    for x in a:
+        if j < nb:
+            j = _gallop(b, x, j)
+            if j < nb and b[j] == x:
+                continue
+        out.append(x)
+    return out
+
+
+def union_many(lists):
+    out = array("I")
+    last = -1
+    for x in heapq.merge(*lists):
+        if x != last:
+            out.append(x)
+            last = x
+    return out
+
+
+# ---------------------------
+# Analyse des requêtes
+# ---------------------------
+def parse_query(text):
+    """
+    Arbre : ("term", mot) | ("and", [..]) | ("or", [..]) | ("not", noeud).
+    ValueError si la requête est mal formée.
+    """
+    tokens = QUERY_TOKEN_RE.findall(text)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def parse_or():
+        nodes = [parse_and()]
+        while peek() == "OR":
+            take()
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def parse_and():
+        nodes = [parse_not()]
+        while peek() not in (None, "OR", ")"):
+            if peek() == "AND":
+                take()
+            nodes.append(parse_not())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def parse_not():
+        if peek() == "NOT":
+            take()
+            return ("not", parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        tok = peek()
+        if tok is None or tok in ("AND", "OR", ")"):
+            raise ValueError(f"terme attendu en position {pos} : {text!r}")
+        take()
+        if tok == "(":
+            node = parse_or()
+            if peek() != ")":
+                raise ValueError(f"parenthèse non fermée : {text!r}")
+            take()
+            return node
+        return ("term", tok)
+
+    if not tokens:
+        raise ValueError("requête vide")
+    tree = parse_or()
+    if pos != len(tokens):
+        raise ValueError(f"jeton inattendu {tokens[pos]!r} : {text!r}")
+    return tree
+
+
+# ---------------------------
+# Index booléen
+# ---------------------------
+def build_docnum_lists(postings, doc_ids):
+    """term -> array('I') trié des numéros de documents (rang dans doc_ids)."""
+    dnum = {d: i for i, d in enumerate(doc_ids)}
+    return {t: array("I", sorted(dnum[d] for d in plist)) for t, plist in postings.items()}
+
+
+class BooleanIndex:
+    """
+    Évaluation des requêtes sur des listes triées (array 'I'). Les opérations
+    sur listes (_list, _intersect, _difference, _union, universe) peuvent être
+    remplacées par une sous-classe (cf. roaring.RoaringBooleanIndex).
+    """
+
+    def __init__(self, lists, doc_ids, stopset=frozenset(), stemmer=None, stem_cache=None):
+        self.lists = lists
+        self.doc_ids = doc_ids
+        self.universe = array("I", range(len(doc_ids)))
+        self.stopset = stopset
+        self.stemmer = stemmer
+        self.stem_cache = stem_cache if stem_cache is not None else {}
+
+    def _list(self, term):
+        return self.lists.get(term) or array("I")
+
+    def _intersect(self, a, b):
+        return intersect_adaptive(a, b)
+
+    def _difference(self, a, b):
+        return difference_gallop(a, b)
+
+    def _union(self, lists):
+        return union_many(lists)
+
+    def _term(self, word):
+        """Liste d'un mot de la requête ; None si le mot disparaît au prétraitement (stop-word)."""
+        terms = ri.preprocess_tokens(ri.tokenizer(word), self.stopset, self.stemmer, self.stem_cache)
+        if not terms:
+            return None
+        if len(terms) == 1:
+            return self._list(terms[0])
+        # "e-mail" -> e AND mail
+        return self._and([self._list(t) for t in terms], [])
+
+    def _and(self, positives, negatives):
+        if not positives:
+            positives = [self.universe]
+        positives = sorted(positives, key=len)  # df croissant
+        result = positives[0]
+        for plist in positives[1:]:
+            if not result:
+                break
+            result = self._intersect(result, plist)
+        for plist in sorted(negatives, key=len, reverse=True):
+            if not result:
+                break
+            result = self._difference(result, plist)
+        return result
+
+    def evaluate(self, node):
+        """Renvoie la liste triée des numéros de docs, ou None (noeud neutre : uniquement des stop-words)."""
+        kind = node[0]
+        if kind == "term":
+            return self._term(node[1])
+        if kind == "not":
+            inner = self.evaluate(node[1])
+            return None if inner is None else self._difference(self.universe, inner)
+        if kind == "or":
+            lists = [r for r in (self.evaluate(n) for n in node[1]) if r is not None]
+            return self._union(lists) if lists else None
+        positives, negatives = [], []
+        for child in node[1]:
+            if child[0] == "not":
+                r = self.evaluate(child[1])
+                if r is not None:
+                    negatives.append(r)
+            else:
+                r = self.evaluate(child)
+                if r is not None:
+                    positives.append(r)
+        if not positives and not negatives:
+            return None
+        return self._and(positives, negatives)
+
+    def search(self, query):
+        """Docids satisfaisant la requête booléenne (ordre de la collection)."""
+        result = self.evaluate(parse_query(query))
+        return [self.doc_ids[i] for i in result] if result is not None else []
+
+
+def load_boolean_index(stop_name, stem_name):
+    """BooleanIndex d'une configuration ; les listes sont rangées dans le cache d'artefacts."""
+    key, postings, df, doc_len, doc_ids, stem_cache = ri.load_config_index(stop_name, stem_name)
+    lists = get_cache().get_or_build(key, "docnums", lambda: build_docnum_lists(postings, doc_ids))
+    stopset = ri.load_stopwords(ri.STOPFILE) if stop_name != "nostop" else set()
+    return BooleanIndex(lists, doc_ids, stopset, get_stemmer(stem_name), stem_cache)
+
+
+# ---------------------------
+# Benchmark des intersections
+# ---------------------------
+def _ms(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1000 / repeat
+
+
+def bench_intersections(index, repeat=20):
+    """Paires (plus fréquent, rang r) : fusion, sauts, galop et set &."""
+    ranked = sorted(index.lists, key=lambda t: len(index.lists[t]), reverse=True)
+    longest = ranked[0]
+    print(f"{'paire':<28} {'|a|':>7} {'|b|':>7} {'merge ms':>9} {'skip ms':>8} {'gallop ms':>10} "
+          f"{'adapt ms':>9} {'set ms':>7}")
+    for r in (1, 10, 100, 1000, 10000):
+        if r >= len(ranked):
+            break
+        other = ranked[r]
+        a, b = index.lists[other], index.lists[longest]
+        sa, sb = set(a), set(b)
+        expected = intersect_merge(a, b)
+        assert intersect_skip(a, b) == expected and intersect_gallop(a, b) == expected
+        print(f"{longest + ' & ' + other:<28} {len(a):>7,} {len(b):>7,} "
+              f"{_ms(lambda: intersect_merge(a, b), repeat):>9.3f} {_ms(lambda: intersect_skip(a, b), repeat):>8.3f} "
+              f"{_ms(lambda: intersect_gallop(a, b), repeat):>10.3f} {_ms(lambda: intersect_adaptive(a, b), repeat):>9.3f} "
+              f"{_ms(lambda: sa & sb, repeat):>7.3f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Recherche booléenne (AND / OR / NOT, parenthèses).")
+    ap.add_argument("query", nargs="?", default=None, help='Ex. "olive AND (oil OR health) AND NOT film"')
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--bench", action="store_true", help="Compare fusion / sauts / galop sur des paires de termes fréquents.")
+    ap.add_argument("-n", type=int, default=20, help="Nombre de docids affichés.")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    index = load_boolean_index(*args.config.split(":"))
+    print(f"Index {args.config} chargé en {time.perf_counter() - t0:.2f}s ({len(index.lists):,} termes)")
+    if args.bench:
+        bench_intersections(index)
+    if args.query:
+        t0 = time.perf_counter()
+        try:
+            docs = index.search(args.query)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            return
+        print(f"{args.query!r} : {len(docs):,} docs ({(time.perf_counter() - t0) * 1000:.2f} ms)")
+        print(" ".join(docs[:args.n]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Recherche en cascade : un premier étage rapide (BM25 sur champion lists,
+cf. tiered.py) retient les N meilleurs candidats, un second étage plus coûteux
+ne re-score que ceux-ci :
+  - ltc   : cosinus ltc ;
+  - prox  : BM25 + proximité des paires de termes (positional.py) ;
+  - rm3   : BM25 sur la requête étendue par RM3 (feedback.py), les documents
+            de retour étant les premiers candidats.
+Le second étage consulte les postings par docid (dict) pour chaque candidat :
+coût |q| × N au lieu de la somme des df.
+
+Mesures : temps de chaque étage, rappel@N du premier étage (part du top-k du
+re-classeur exhaustif présente parmi les N candidats), overlap@k final.
+
+    python cascade.py --config stop671:porter --rerank prox [-n 3000] [-r 3000]
+"""
+import time
+import math
+import heapq
+import argparse
+from collections import Counter
+
+import main as ri
+from tiered import CHAMPIONS_R, TieredIndex
+
+CASCADE_N = 2 * ri.TOP_K
+
+
+# ---------------------------
+# Second étage : scores restreints aux candidats
+# ---------------------------
+def bm25_candidates(index, q_weights, candidates, k1=ri.BM25_K1, b=ri.BM25_B):
+    """BM25 (contributions × poids de la requête) des seuls candidats."""
+    avdl = index.avdl
+    norm = {d: k1 * ((1.0 - b) + b * (index.doc_len.get(d, avdl) / avdl)) for d in candidates}
+    scores = dict.fromkeys(candidates, 0.0)
+    for t, wq in q_weights.items():
+        if t not in index.postings:
+            continue
+        plist = index.postings[t]
+        w = wq * ri.bm25_idf(index.df.get(t, 0), index.N)
+        for d in candidates:
+            tf = plist.get(d)
+            if tf:
+                scores[d] += w * (tf * (k1 + 1.0)) / (tf + norm[d])
+    return scores
+
+
+def rerank_ltc(cascade, terms, candidates, first):
+    weighted = cascade.index.weights["ltc"]
+    scores = dict.fromkeys(candidates, 0.0)
+    for t, tf in Counter(terms).items():
+        wmap = weighted.get(t)
+        if not wmap:
+            continue
+        wq = 1.0 + math.log10(tf)
+        for d in candidates:
+            w = wmap.get(d)
+            if w:
+                scores[d] += w * wq
+    return scores
+
+
+def rerank_prox(cascade, terms, candidates, first, k1=ri.BM25_K1, b=ri.BM25_B):
+    from positional import PROX_WINDOW, decode_positions, pair_proximity
+
+    index, positions = cascade.index, cascade.positions()
+    scores = bm25_candidates(index, {t: 1.0 for t in set(terms)}, candidates, k1, b)
+    uniq = [t for t in dict.fromkeys(terms) if t in positions]
+    idf = {t: max(0.0, ri.bm25_idf(index.df.get(t, 0), index.N)) for t in uniq}
+    for i, ta in enumerate(uniq):
+        for tb in uniq[i + 1:]:
+            w = min(idf[ta], idf[tb])
+            if w <= 0.0:
+                continue
+            pos_a, pos_b = positions[ta], positions[tb]
+            for d in candidates:
+                if d in pos_a and d in pos_b:
+                    tpi = pair_proximity(decode_positions(pos_a[d]), decode_positions(pos_b[d]), PROX_WINDOW)
+                    if tpi > 0.0:
+                        K = k1 * ((1.0 - b) + b * (index.doc_len.get(d, index.avdl) / index.avdl))
+                        scores[d] += w * (k1 + 1.0) * tpi / (K + tpi)
+    return scores
+
+
+def rerank_rm3(cascade, terms, candidates, first):
+    q_weights, _ = cascade.feedback().rm3(terms, first)
+    return bm25_candidates(cascade.index, q_weights, candidates)
+
+
+RERANKERS = {"ltc": rerank_ltc, "prox": rerank_prox, "rm3": rerank_rm3}
+
+
+# ---------------------------
+# Cascade
+# ---------------------------
+class Cascade:
+    """index : searcher.LoadedIndex ; premier étage TieredIndex BM25 (r), second étage RERANKERS[rerank]."""
+
+    def __init__(self, index, rerank="prox", n=CASCADE_N, r=CHAMPIONS_R):
+        self.index = index
+        self.rerank = RERANKERS[rerank]
+        self.n = n
+        self.first_stage = TieredIndex(index, "bm25", r)
+        self._positions = None
+        self._feedback = None
+
+    def positions(self):
+        if self._positions is None:
+            from positional import load_positions
+            self._positions = load_positions(*self.index.name.split(":"))
+        return self._positions
+
+    def feedback(self):
+        if self._feedback is None:
+            from feedback import PseudoRelevanceFeedback, load_forward_index
+            self._feedback = PseudoRelevanceFeedback(self.index, load_forward_index(*self.index.name.split(":")))
+        return self._feedback
+
+    def search(self, terms, k=ri.TOP_K):
+        """Retour : top-k [(docid, score)], candidats, {"ms_first", "ms_second"}."""
+        t0 = time.perf_counter()
+        first, _ = self.first_stage.score(terms, self.n)
+        top = heapq.nlargest(self.n, first.items(), key=lambda x: x[1])
+        candidates = [d for d, _ in top]
+        t1 = time.perf_counter()
+        scores = self.rerank(self, terms, candidates, dict(top))
+        ranked = ri.top_k_with_padding(scores, self.index.doc_ids, k)
+        t2 = time.perf_counter()
+        return ranked, candidates, {"ms_first": (t1 - t0) * 1000, "ms_second": (t2 - t1) * 1000}
+
+
+# ---------------------------
+# Mesures
+# ---------------------------
+def exhaustive(cascade, name, terms):
+    """Scores du re-classeur sur toute la collection (référence)."""
+    index = cascade.index
+    if name == "ltc":
+        return index.score(terms, "ltc")
+    if name == "prox":
+        from positional import score_query_bm25_prox
+        return score_query_bm25_prox(index.postings, cascade.positions(), index.df, index.doc_len,
+                                     index.N, terms, avdl=index.avdl)[0]
+    return cascade.feedback().search(terms, "bm25", "rm3")[0]
+
+
+def report(cascade, name, queries, k=ri.TOP_K):
+    print(f"cascade : BM25 champions (r={cascade.first_stage.r}) -> top {cascade.n} -> {name}")
+    print(f"{'requête':<46} {'étage 1':>8} {'étage 2':>8} {'total':>8} {'exhaustif':>10} "
+          f"{'rappel@N':>9} {'overlap@k':>10}")
+    # chargements paresseux hors des mesures
+    if name == "prox":
+        cascade.positions()
+    elif name == "rm3":
+        cascade.feedback()
+    totals = [0.0] * 6
+    for text in queries:
+        terms = cascade.index.query_terms(text)
+        ranked, candidates, st = cascade.search(terms, k)
+        t0 = time.perf_counter()
+        ref = {d for d, _ in ri.top_k_with_padding(exhaustive(cascade, name, terms), cascade.index.doc_ids, k)}
+        ms_full = (time.perf_counter() - t0) * 1000
+        recall = len(ref.intersection(candidates)) / max(1, len(ref))
+        overlap = len(ref.intersection(d for d, _ in ranked)) / max(1, len(ref))
+        total = st["ms_first"] + st["ms_second"]
+        print(f"{text:<46} {st['ms_first']:>8.2f} {st['ms_second']:>8.2f} {total:>8.2f} {ms_full:>10.2f} "
+              f"{recall:>9.3f} {overlap:>10.3f}")
+        for i, v in enumerate((st["ms_first"], st["ms_second"], total, ms_full, recall, overlap)):
+            totals[i] += v
+    n = len(queries)
+    print(f"{'moyenne':<46} {totals[0] / n:>8.2f} {totals[1] / n:>8.2f} {totals[2] / n:>8.2f} "
+          f"{totals[3] / n:>10.2f} {totals[4] / n:>9.3f} {totals[5] / n:>10.3f}")
+
+
+def main():
+    from searcher import LoadedIndex
+
+    ap = argparse.ArgumentParser(description="Cascade : BM25 élagué puis re-classement des N premiers candidats.")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--rerank", choices=sorted(RERANKERS), default="prox")
+    ap.add_argument("-n", type=int, default=CASCADE_N, help="Candidats transmis au second étage.")
+    ap.add_argument("-r", type=int, default=CHAMPIONS_R, help="Taille des champion lists du premier étage.")
+    ap.add_argument("-k", type=int, default=ri.TOP_K)
+    args = ap.parse_args()
+
+    cascade = Cascade(LoadedIndex(*args.config.split(":")), args.rerank, args.n, args.r)
+    report(cascade, args.rerank, list(ri.QUERIES.values()), args.k)
+
+
+if __name__ == "__main__":
+    main()
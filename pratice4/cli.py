@@ -0,0 +1,160 @@
+"""
+Point d'entrée unique : index / search / stats / bench.
+
+Les modules lourds (main, stemmers, NLTK...) ne sont importés que dans la
+sous-commande qui en a besoin : `python cli.py search --help` ne charge rien
+d'autre qu'argparse. L'option --timings affiche le coût des imports.
+"""
+import time
+
+_T_START = time.perf_counter()
+
+import os
+import sys
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA = os.path.join(HERE, "Practice_03_data", "Text_Only_Ascii_Coll_NoSem")
+DEFAULT_STOP = os.path.join(HERE, "Practice_03_data", "stop-words-english4.txt")
+
+_T_IMPORT = time.perf_counter() - _T_START
+
+
+# ---------------------------
+# Helpers
+# ---------------------------
+def _timed_import():
+    """Importe main (et ses dépendances) en mesurant le temps d'import."""
+    t0 = time.perf_counter()
+    import main as ri
+    return ri, time.perf_counter() - t0
+
+
+def _load(args, ri, cached=True):
+    """
+    Index de la configuration demandée. cached : via le cache d'artefacts
+    (ri.load_config_index, ni relecture ni indexation si l'index y est déjà) ;
+    sinon construit ici, pour mesurer le temps d'indexation (sous-commande index).
+    """
+    from stemmers import get_stemmer
+
+    stopset = ri.load_stopwords(args.stop) if args.stop else set()
+    stemmer = get_stemmer(args.stem)
+    key = None
+    if cached:
+        # chemins de la ligne de commande (la clé de cache est le hash des fichiers)
+        ri.DATAFILE = args.data
+        ri.STOPFILE = args.stop or ri.STOPFILE
+        t0 = time.perf_counter()
+        key, postings, df, doc_len, doc_ids, stem_cache = ri.load_config_index(
+            "stop671" if args.stop else "nostop", args.stem)
+    else:
+        docs = ri.load_collection(args.data)
+        t0 = time.perf_counter()
+        postings, df, doc_len, doc_ids, stem_cache = ri.build_index(docs, stopset, stemmer)
+    t_index = time.perf_counter() - t0
+    return (key, postings, df, doc_len, doc_ids, stopset, stemmer, stem_cache), t_index
+
+
+# ---------------------------
+# Sous-commandes
+# ---------------------------
+def cmd_index(args, ri):
+    index, t_index = _load(args, ri, cached=False)
+    postings, df, doc_len, doc_ids = index[1:5]
+    print(f"Index construit : docs={len(doc_ids):,} terms={len(df):,} "
+          f"postings={sum(df.values()):,} (temps {t_index:.2f}s)")
+
+
+def cmd_search(args, ri):
+    from index_cache import cached_weights
+
+    (key, postings, df, doc_len, doc_ids, stopset, stemmer, stem_cache), t_index = _load(args, ri)
+    N = len(doc_ids)
+    q_terms = ri.preprocess_tokens(ri.tokenizer(args.query), stopset, stemmer, stem_cache)
+
+    t0 = time.perf_counter()
+    if args.method == "ltn":
+        weighted, _ = cached_weights(key, "ltn", lambda: ri.compute_ltn_weights(postings, df, N))
+        scores = ri.score_query_ltn(weighted, q_terms)
+    elif args.method == "ltc":
+        weighted, _ = cached_weights(key, "ltc", lambda: ri.compute_ltc_weights(postings, df, N))
+        scores = ri.score_query_ltc(weighted, q_terms)
+    else:
+        scores, _ = ri.score_query_bm25(postings, df, doc_len, N, q_terms)
+    t_search = time.perf_counter() - t0
+
+    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:args.k]
+    print(f'Requête : "{args.query}"  termes : {q_terms}  ({args.method}, index {t_index:.2f}s, '
+          f'scoring {t_search * 1000:.1f} ms)')
+    for rank, (d, s) in enumerate(ranked, start=1):
+        print(f"{rank:4d}. doc={d}  score={s:.5f}")
+
+
+def cmd_stats(args, ri):
+    (_, postings, df, doc_len, doc_ids, *_), t_index = _load(args, ri)
+    n_docs = len(doc_ids)
+    total_terms = sum(doc_len.values())
+    total_chars = sum(len(t) * sum(plist.values()) for t, plist in postings.items())
+    print(f"docs={n_docs:,}  vocab={len(df):,}  tokens={total_terms:,}  postings={sum(df.values()):,}")
+    print(f"avg_doc_len={total_terms / n_docs if n_docs else 0.0:.2f}  "
+          f"avg_term_len={total_chars / total_terms if total_terms else 0.0:.2f}  (index {t_index:.2f}s)")
+
+
+def cmd_bench(args, ri):
+    from stemmers import STEMMERS, benchmark_stemmers, print_benchmark
+
+    docs = ri.load_collection(args.data)
+    stopset = ri.load_stopwords(args.stop) if args.stop else set()
+    names = args.stemmers.split(",") if args.stemmers else list(STEMMERS)
+    print_benchmark(benchmark_stemmers(docs, stopset, names))
+
+
+# ---------------------------
+# Parser
+# ---------------------------
+def build_parser():
+    ap = argparse.ArgumentParser(description="Recherche d'information : index / search / stats / bench.")
+    ap.add_argument("--timings", action="store_true", help="Affiche le coût des imports et de la commande.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--data", default=DEFAULT_DATA, help="Chemin vers la collection.")
+    common.add_argument("--stop", default=DEFAULT_STOP, help="Liste de stop-words ('' pour aucune).")
+    common.add_argument("--stem", default="porter", help="Stemmer (nostem, porter, sstem, light).")
+
+    p = sub.add_parser("index", parents=[common],
+                       help="Construit l'index d'une configuration (sans cache : mesure le temps d'indexation).")
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser("search", parents=[common], help="Score une requête et affiche le top-k.")
+    p.add_argument("query", help="Texte de la requête.")
+    p.add_argument("--method", choices=["ltn", "ltc", "bm25"], default="bm25")
+    p.add_argument("-k", type=int, default=10, help="Nombre de documents affichés.")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("stats", parents=[common], help="Statistiques de la collection prétraitée.")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("bench", parents=[common], help="Benchmark des stemmers.")
+    p.add_argument("--stemmers", default="", help="Stemmers à comparer (séparés par des virgules).")
+    p.set_defaults(func=cmd_bench)
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.exists(args.data):
+        print(f"[ERROR] Collection manquante : {args.data}")
+        return 1
+    ri, t_main = _timed_import()
+    t0 = time.perf_counter()
+    args.func(args, ri)
+    if args.timings:
+        print(f"[timings] import cli {_T_IMPORT * 1000:.1f} ms, import main {t_main * 1000:.1f} ms, "
+              f"commande {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
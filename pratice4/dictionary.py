@@ -0,0 +1,242 @@
+"""
+Dictionnaire de termes trié, front-codé (compression des préfixes communs),
+lisible directement depuis un buffer (bytes ou mmap) sans reconstruire de
+dict Python.
+
+Format (little-endian) :
+  en-tête : n_terms, taille de bloc, taille des données (uint32 ×3)
+  offsets : début de chaque bloc dans les données (uint32, un par bloc)
+  données : par bloc, 1er terme complet (varint longueur + octets), puis
+            pour chaque terme suivant varint(préfixe commun avec le
+            précédent), varint(longueur du suffixe), suffixe.
+
+Le numéro d'un terme est son rang dans l'ordre trié : il indexe directement
+les tableaux offsets / df de l'index disque (cf. disk_index.py).
+Recherche : dichotomie sur les premiers termes de blocs (O(log V)), puis
+décodage séquentiel d'au plus un bloc. Préfixe p : plage [borne(p), borne(p + 0xFF)).
+
+    python dictionary.py --config stop671:porter
+"""
+import os
+import sys
+import mmap
+import time
+import random
+import struct
+import argparse
+import tempfile
+from array import array
+
+from disk_index import encode_varints, _native
+
+FC_BLOCK = 16
+FC_HEADER = struct.Struct("<III")
+
+
+# ---------------------------
+# Écriture
+# ---------------------------
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def encode_front_coded(terms, block=FC_BLOCK):
+    """terms : liste triée de str -> bytes (en-tête + offsets + données)."""
+    data = bytearray()
+    offsets = array("I")
+    prev = b""
+    for i, t in enumerate(terms):
+        cur = t.encode("utf-8")
+        if i % block == 0:
+            offsets.append(len(data))
+            encode_varints([len(cur)], data)
+            data += cur
+        else:
+            p = _common_prefix(prev, cur)
+            encode_varints([p, len(cur) - p], data)
+            data += cur[p:]
+        prev = cur
+    return FC_HEADER.pack(len(terms), block, len(data)) + _native(offsets) + bytes(data)
+
+
+# ---------------------------
+# Lecture
+# ---------------------------
+def _varint(data, pos):
+    v = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        v |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return v, pos
+        shift += 7
+
+
+class FrontCodedDict:
+    """
+    Vue sur un dictionnaire front-codé à la position pos de buf (bytes, mmap).
+    term_id(t) -> numéro ou None ; term(i) ; prefix_range(p) ; itération dans l'ordre.
+    Après lecture, self.end est la position qui suit le dictionnaire dans buf.
+    """
+
+    def __init__(self, buf, pos=0):
+        n_terms, block, size = FC_HEADER.unpack_from(buf, pos)
+        self.n_terms, self.block = n_terms, block
+        n_blocks = (n_terms + block - 1) // block
+        start = pos + FC_HEADER.size
+        self._view = memoryview(buf)
+        offsets = self._view[start:start + 4 * n_blocks]
+        if sys.byteorder == "big":
+            offsets = array("I", offsets.tobytes())
+            offsets.byteswap()
+        else:
+            offsets = offsets.cast("I")
+        self.offsets = offsets
+        data_start = start + 4 * n_blocks
+        self.data = self._view[data_start:data_start + size]
+        self.end = data_start + size
+
+    def release(self):
+        """Libère les vues sur le buffer (nécessaire avant de fermer un mmap)."""
+        for view in (self.offsets, self.data, self._view):
+            if isinstance(view, memoryview):
+                view.release()
+
+    def __len__(self):
+        return self.n_terms
+
+    def _first(self, b):
+        n, pos = _varint(self.data, self.offsets[b])
+        return self.data[pos:pos + n].tobytes()
+
+    def _block(self, b):
+        """Termes (bytes) du bloc b."""
+        data = self.data
+        pos = self.offsets[b]
+        n, pos = _varint(data, pos)
+        cur = data[pos:pos + n].tobytes()
+        pos += n
+        out = [cur]
+        for _ in range(min(self.block, self.n_terms - b * self.block) - 1):
+            p, pos = _varint(data, pos)
+            n, pos = _varint(data, pos)
+            cur = cur[:p] + data[pos:pos + n].tobytes()
+            pos += n
+            out.append(cur)
+        return out
+
+    def _find_block(self, key):
+        """Dernier bloc dont le premier terme est <= key (-1 si aucun)."""
+        lo, hi = 0, len(self.offsets)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._first(mid) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+
+    def _lower_bound(self, key):
+        """Numéro du premier terme >= key."""
+        b = self._find_block(key)
+        if b < 0:
+            return 0
+        for j, t in enumerate(self._block(b)):
+            if t >= key:
+                return b * self.block + j
+        return min(self.n_terms, (b + 1) * self.block)
+
+    def term_id(self, term):
+        key = term.encode("utf-8")
+        b = self._find_block(key)
+        if b < 0:
+            return None
+        for j, t in enumerate(self._block(b)):
+            if t == key:
+                return b * self.block + j
+            if t > key:
+                return None
+        return None
+
+    def __contains__(self, term):
+        return self.term_id(term) is not None
+
+    def term(self, i):
+        if not 0 <= i < self.n_terms:
+            raise IndexError(i)
+        return self._block(i // self.block)[i % self.block].decode("utf-8")
+
+    def prefix_range(self, prefix):
+        key = prefix.encode("utf-8")
+        return range(self._lower_bound(key), self._lower_bound(key + b"\xff"))
+
+    def __iter__(self):
+        for b in range(len(self.offsets)):
+            for t in self._block(b):
+                yield t.decode("utf-8")
+
+    def memory_bytes(self):
+        return len(self.data) + 4 * len(self.offsets)
+
+
+# ---------------------------
+# Benchmark : mémoire et latence vs dict Python
+# ---------------------------
+def dict_bytes(d):
+    return sys.getsizeof(d) + sum(sys.getsizeof(t) for t in d)
+
+
+def benchmark(terms, n_lookups=20000, seed=0):
+    terms = sorted(terms)
+    as_dict = {t: i for i, t in enumerate(terms)}
+    blob = encode_front_coded(terms)
+    fd, path = tempfile.mkstemp(suffix=".fc")
+    with os.fdopen(fd, "wb") as f:
+        f.write(blob)
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        fc = FrontCodedDict(mm)
+        assert list(fc) == terms
+
+        print(f"termes={len(terms):,}  dict Python : {dict_bytes(as_dict) / 1e6:.2f} Mo "
+              f"({dict_bytes(as_dict) / len(terms):.0f} o/terme)   front-codé (bloc {fc.block}) : "
+              f"{fc.memory_bytes() / 1e6:.2f} Mo ({fc.memory_bytes() / len(terms):.1f} o/terme)")
+
+        rng = random.Random(seed)
+        probes = [rng.choice(terms) for _ in range(n_lookups)]
+        t0 = time.perf_counter()
+        for t in probes:
+            as_dict.get(t)
+        us_dict = (time.perf_counter() - t0) * 1e6 / n_lookups
+        t0 = time.perf_counter()
+        for t in probes:
+            assert terms[fc.term_id(t)] == t
+        us_fc = (time.perf_counter() - t0) * 1e6 / n_lookups
+        prefixes = [t[:3] for t in probes[:2000]]
+        t0 = time.perf_counter()
+        for p in prefixes:
+            fc.prefix_range(p)
+        us_prefix = (time.perf_counter() - t0) * 1e6 / len(prefixes)
+        print(f"recherche : dict {us_dict:.2f} µs   front-codé {us_fc:.2f} µs   plage de préfixe {us_prefix:.2f} µs")
+        fc.release()
+        mm.close()
+    os.remove(path)
+
+
+def main():
+    import main as ri
+
+    ap = argparse.ArgumentParser(description="Dictionnaire front-codé : mémoire et latence vs dict Python.")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    args = ap.parse_args()
+    postings = ri.load_config_index(*args.config.split(":"))[1]
+    benchmark(postings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Index inversé sur disque (compressé, mmappé) + cache LRU des postings décodés.
+
+Format (little-endian) :
+  en-tête   : magic, n_docs, n_terms
+  docs      : docids ("\\n"-joints), doc_len (uint32), normes ltc (float64)
+  termes    : vocabulaire trié front-codé (cf. dictionary.py), offsets (uint64, n_terms+1), df (uint32)
+  postings  : pour chaque terme, varint(écart de numéro de doc), varint(tf) ...
+
+Seules les tables de docs sont chargées ; le dictionnaire est lu sur place
+dans le mmap (pas de dict Python de ~V entrées) et les postings sont décodés
+à la demande. PostingsCache garde les listes décodées
+les plus récemment utilisées sous un budget d'octets.
+"""
+import sys
+import math
+import mmap
+import time
+import struct
+from array import array
+from collections import OrderedDict
+
+DISK_MAGIC = b"RIIDX\x00\x02\x00"
+DISK_ARTIFACT = "disk_index_v2"  # nom de l'artefact dans index_cache (change avec le format)
+DISK_HEADER = struct.Struct("<8sII")
+
+
+# ---------------------------
+# Varint
+# ---------------------------
+def encode_varints(values, out):
+    """Ajoute à `out` (bytearray) chaque entier en varint (7 bits / octet)."""
+    for v in values:
+        while v >= 0x80:
+            out.append((v & 0x7F) | 0x80)
+            v >>= 7
+        out.append(v)
+
+
+def decode_varints(buf):
+    """Décode une séquence de varints (bytes / memoryview) en liste d'entiers."""
+    out = []
+    v = shift = 0
+    for byte in buf:
+        if byte & 0x80:
+            v |= (byte & 0x7F) << shift
+            shift += 7
+        else:
+            out.append(v | (byte << shift))
+            v = shift = 0
+    return out
+
+
+def encode_postings(pairs, out):
+    """pairs : liste (numéro de doc, tf) triée -> écarts + tf en varint."""
+    flat = []
+    prev = 0
+    for dnum, tf in pairs:
+        flat.append(dnum - prev)
+        flat.append(tf)
+        prev = dnum
+    encode_varints(flat, out)
+
+
+# ---------------------------
+# Écriture
+# ---------------------------
+def _pack_strings(strings):
+    data = "\n".join(strings).encode("utf-8")
+    return struct.pack("<I", len(data)) + data
+
+
+def _native(arr):
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def write_disk_index(path, postings, df, doc_len, doc_ids):
+    """Sérialise un index (format de main.build_index) vers `path`."""
+    from dictionary import encode_front_coded
+
+    N = len(doc_ids)
+    dnum = {d: i for i, d in enumerate(doc_ids)}
+    terms = sorted(postings)
+
+    # normes ltc des documents (pour servir ltc sans charger les poids) ;
+    # même ordre de sommation que compute_ltc_weights
+    norm_sq = [0.0] * N
+    for t in postings:
+        idf = math.log10(N / df[t]) if df.get(t, 0) > 0 else 0.0
+        for d, tf in postings[t].items():
+            if tf > 0:
+                w = (1.0 + math.log10(tf)) * idf
+                norm_sq[dnum[d]] += w * w
+
+    blob = bytearray()
+    offsets = array("Q", [0])
+    dfs = array("I")
+    for t in terms:
+        encode_postings(sorted((dnum[d], tf) for d, tf in postings[t].items()), blob)
+        offsets.append(len(blob))
+        dfs.append(df.get(t, len(postings[t])))
+
+    with open(path, "wb") as f:
+        f.write(DISK_HEADER.pack(DISK_MAGIC, N, len(terms)))
+        f.write(_pack_strings(doc_ids))
+        f.write(_native(array("I", [doc_len.get(d, 0) for d in doc_ids])))
+        f.write(_native(array("d", [math.sqrt(x) for x in norm_sq])))
+        f.write(encode_front_coded(terms))
+        f.write(_native(offsets))
+        f.write(_native(dfs))
+        f.write(blob)
+
+
+# ---------------------------
+# Cache des postings décodés
+# ---------------------------
+class PostingsCache:
+    """
+    LRU de listes décodées, clé (index, id de terme, vue). Budget en octets (estimé
+    à ~100 octets par posting décodé). Compte hits / misses, le temps passé
+    à décoder et le temps de décodage économisé par les hits.
+    """
+
+    BYTES_PER_POSTING = 100
+
+    def __init__(self, budget_bytes=128 * 1024 * 1024):
+        self.budget = budget_bytes
+        self.entries = OrderedDict()  # clé -> (valeur, taille, temps de décodage)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.decode_time = 0.0
+        self.saved_time = 0.0
+
+    def get(self, key, decode):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.saved_time += entry[2]
+            return entry[0]
+        self.misses += 1
+        t0 = time.perf_counter()
+        value = decode()
+        elapsed = time.perf_counter() - t0
+        self.decode_time += elapsed
+        size = 64 + self.BYTES_PER_POSTING * len(value)
+        if size <= self.budget:
+            self.entries[key] = (value, size, elapsed)
+            self.bytes += size
+            while self.bytes > self.budget:
+                _, (_, s, _) = self.entries.popitem(last=False)
+                self.bytes -= s
+        return value
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "decode_ms": round(self.decode_time * 1000, 3), "saved_ms": round(self.saved_time * 1000, 3)}
+
+
+# ---------------------------
+# Lecture
+# ---------------------------
+class DiskIndex:
+    """
+    Index mmappé, utilisable comme `postings` par les scorers de main.py :
+    `t in idx`, `idx[t]` / `idx.get(t)` -> {docid: tf} (décodé, via le cache).
+    idx.doc_len est un dict comme celui de build_index ; idx.df s'utilise
+    comme un dict mais lit le dictionnaire front-codé et le tableau des df.
+    ltn_view() / ltc_view() donnent les `weighted_postings` correspondants.
+    """
+
+    def __init__(self, path, cache=None):
+        from dictionary import FrontCodedDict
+
+        self.path = path
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.cache = cache
+        mm = self._mm
+
+        magic, n_docs, n_terms = DISK_HEADER.unpack_from(mm, 0)
+        if magic != DISK_MAGIC:
+            raise ValueError(f"Index disque invalide : {path}")
+        pos = DISK_HEADER.size
+        self.doc_ids, pos = self._strings(pos, n_docs)
+        doc_len, pos = self._array("I", pos, n_docs)
+        self.doc_norms, pos = self._array("d", pos, n_docs)
+        self.terms = FrontCodedDict(mm, pos)
+        self.offsets, pos = self._array("Q", self.terms.end, n_terms + 1)
+        self.dfs, pos = self._array("I", pos, n_terms)
+        self.postings_start = pos
+
+        self.N = n_docs
+        self.df = _DfView(self)
+        self.doc_len = dict(zip(self.doc_ids, doc_len))
+
+    def _strings(self, pos, n):
+        (size,) = struct.unpack_from("<I", self._mm, pos)
+        pos += 4
+        data = self._mm[pos:pos + size].decode("utf-8")
+        return (data.split("\n") if n else []), pos + size
+
+    def _array(self, code, pos, n):
+        arr = array(code)
+        arr.frombytes(self._mm[pos:pos + arr.itemsize * n])
+        if sys.byteorder == "big":
+            arr.byteswap()
+        return arr, pos + arr.itemsize * n
+
+    def close(self):
+        self.terms.release()
+        self._mm.close()
+        self._f.close()
+
+    # --- décodage ---
+    def decode_pairs(self, tid):
+        """Postings du terme `tid` -> liste (numéro de doc, tf)."""
+        start = self.postings_start + self.offsets[tid]
+        end = self.postings_start + self.offsets[tid + 1]
+        flat = decode_varints(self._mm[start:end])
+        pairs = []
+        dnum = 0
+        for i in range(0, len(flat), 2):
+            dnum += flat[i]
+            pairs.append((dnum, flat[i + 1]))
+        return pairs
+
+    def _decoded(self, tid, view, build):
+        if self.cache is None:
+            return build()
+        return self.cache.get((self.path, tid, view), build)
+
+    def tf_postings(self, t):
+        tid = self.terms.term_id(t)
+        if tid is None:
+            return None
+        doc_ids = self.doc_ids
+        return self._decoded(tid, "tf", lambda: {doc_ids[d]: tf for d, tf in self.decode_pairs(tid)})
+
+    # --- interface Mapping (postings de main.build_index) ---
+    def __contains__(self, t):
+        return t in self.terms
+
+    def __getitem__(self, t):
+        plist = self.tf_postings(t)
+        if plist is None:
+            raise KeyError(t)
+        return plist
+
+    def get(self, t, default=None):
+        plist = self.tf_postings(t)
+        return default if plist is None else plist
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __iter__(self):
+        return iter(self.terms)
+
+    def ltn_view(self):
+        return _WeightedView(self, "ltn")
+
+    def ltc_view(self):
+        return _WeightedView(self, "ltc")
+
+
+class _WeightedView:
+    """weighted_postings ltn / ltc calculés à la volée depuis les tf décodés (et mis en cache)."""
+
+    def __init__(self, index, scheme):
+        self.index = index
+        self.scheme = scheme
+
+    def __contains__(self, t):
+        return t in self.index.terms
+
+    def get(self, t, default=None):
+        idx = self.index
+        tid = idx.terms.term_id(t)
+        if tid is None:
+            return default
+
+        def build():
+            df_t = idx.dfs[tid]
+            idf = math.log10(idx.N / df_t) if df_t > 0 else 0.0
+            doc_ids, norms = idx.doc_ids, idx.doc_norms
+            if self.scheme == "ltn":
+                if idf <= 0.0:
+                    return {}
+                return {doc_ids[d]: (1.0 + math.log10(tf)) * idf for d, tf in idx.decode_pairs(tid) if tf > 0}
+            # ltc : comme compute_ltc_weights (poids nul si idf nul ou norme nulle)
+            return {doc_ids[d]: ((1.0 + math.log10(tf)) * idf / norms[d] if norms[d] > 0 else 0.0)
+                    for d, tf in idx.decode_pairs(tid) if tf > 0}
+
+        return idx._decoded(tid, self.scheme, build)
+
+    def __getitem__(self, t):
+        plist = self.get(t)
+        if plist is None:
+            raise KeyError(t)
+        return plist
+
+
+class _DfView:
+    """df d'un DiskIndex, interface dict (get, [], in, len, itération, items)."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def get(self, t, default=None):
+        tid = self.index.terms.term_id(t)
+        return default if tid is None else self.index.dfs[tid]
+
+    def __getitem__(self, t):
+        tid = self.index.terms.term_id(t)
+        if tid is None:
+            raise KeyError(t)
+        return self.index.dfs[tid]
+
+    def __contains__(self, t):
+        return t in self.index.terms
+
+    def __len__(self):
+        return len(self.index.terms)
+
+    def __iter__(self):
+        return iter(self.index.terms)
+
+    def items(self):
+        return zip(self.index.terms, self.index.dfs)
+
+    def values(self):
+        return iter(self.index.dfs)
@@ -0,0 +1,222 @@
+"""
+Retour de pertinence simulé (RM3 / Rocchio) sur un index direct compact.
+
+Index direct : doc -> (numéros de termes, tf), construit par la passe
+d'indexation de main.build_index_extras (artefact "forward", à la première
+demande ou avec l'index tf s'il figure dans main.INDEX_EXTRAS). Stockage à plat
+façon CSR : offsets (array 'I', N + 1), term_ids et tfs (array 'I') ; le
+numéro d'un doc est son rang dans doc_ids, celui d'un terme son rang
+d'apparition dans la collection (terms[id]). Plus de re-tokenisation des
+documents de retour : le coût de l'expansion est borné par
+fb_docs × (nombre de termes distincts de ces documents).
+
+  - RM3 : P(w|R) = somme_D P(D|Q) · tf(w, D) / |D| sur les fb_docs premiers
+    documents, P(D|Q) = score normalisé (scores < 0 ramenés à 0) ; on garde
+    les fb_terms meilleurs termes, interpolés avec la requête (orig_weight) ;
+  - Rocchio : q' = alpha · q + beta · centroïde des vecteurs ltc (normés) des
+    documents de retour, restreint aux termes de q et aux fb_terms meilleurs.
+La requête pondérée est ensuite évaluée par BM25 (contributions × poids) ou
+ltc (produit scalaire avec les poids ltc des documents).
+
+    python feedback.py --config stop671:porter --method bm25 --expansion rm3 ["web link network analysis"]
+"""
+import sys
+import math
+import time
+import heapq
+import argparse
+from collections import Counter, defaultdict
+
+import main as ri
+
+FB_DOCS = 10
+FB_TERMS = 20
+RM3_ORIG_WEIGHT = 0.5
+ROCCHIO_ALPHA = 1.0
+ROCCHIO_BETA = 0.75
+
+
+# ---------------------------
+# Index direct
+# ---------------------------
+class ForwardIndex:
+    """Numéro de doc -> vecteur (term_ids, tfs), tranches de tableaux plats."""
+
+    def __init__(self, terms, offsets, term_ids, tfs):
+        self.terms = terms
+        self.offsets = offsets
+        self.term_ids = term_ids
+        self.tfs = tfs
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def doc_vector(self, docnum):
+        lo, hi = self.offsets[docnum], self.offsets[docnum + 1]
+        return self.term_ids[lo:hi], self.tfs[lo:hi]
+
+    def memory_bytes(self):
+        return sum(sys.getsizeof(a) for a in (self.offsets, self.term_ids, self.tfs))
+
+
+def build_forward_index(docs, stopset, stemmer):
+    """
+    Comme main.build_index, en une passe, plus l'index direct.
+    Retour : postings, df, doc_len, doc_ids, stem_cache, forward
+    """
+    *index, artifacts = ri.build_index_extras(docs, stopset, stemmer, ("forward",))
+    return (*index, artifacts["forward"])
+
+
+def load_forward_index(stop_name, stem_name, get_docs=None):
+    """Index direct d'une configuration via le cache (construit avec l'index tf, cf. main.load_config_artifact)."""
+    return ri.load_config_artifact(stop_name, stem_name, "forward", get_docs)
+
+
+# ---------------------------
+# Requêtes pondérées
+# ---------------------------
+def score_query_weighted(index, q_weights, method):
+    """q_weights : term -> poids. index : searcher.LoadedIndex ; method in {'bm25','ltc'}."""
+    scores = defaultdict(float)
+    if method == "ltc":
+        weighted = index.weights["ltc"]
+        for t, wq in q_weights.items():
+            for d, wtd in (weighted.get(t) or {}).items():
+                scores[d] += wtd * wq
+        return scores
+    k1, b, avdl = ri.BM25_K1, ri.BM25_B, index.avdl
+    for t, wq in q_weights.items():
+        if t not in index.postings:
+            continue
+        w = wq * ri.bm25_idf(index.df.get(t, 0), index.N)
+        for d, tf in index.postings[t].items():
+            denom = tf + k1 * ((1.0 - b) + b * (index.doc_len.get(d, avdl) / avdl))
+            scores[d] += w * (tf * (k1 + 1.0)) / denom
+    return scores
+
+
+# ---------------------------
+# Expansion
+# ---------------------------
+class PseudoRelevanceFeedback:
+    def __init__(self, index, forward, fb_docs=FB_DOCS, fb_terms=FB_TERMS):
+        self.index = index
+        self.forward = forward
+        self.fb_docs = fb_docs
+        self.fb_terms = fb_terms
+        self.dnum = {d: i for i, d in enumerate(index.doc_ids)}
+
+    def _top_docs(self, scores):
+        return heapq.nlargest(self.fb_docs, scores.items(), key=lambda x: x[1])
+
+    def rm3(self, terms, scores, orig_weight=RM3_ORIG_WEIGHT):
+        top = self._top_docs(scores)
+        mass = [max(s, 0.0) for _, s in top]
+        total = sum(mass)
+        if total <= 0:
+            mass, total = [1.0] * len(top), float(len(top) or 1)
+        rel = defaultdict(float)
+        n_read = 0
+        for (d, _), m in zip(top, mass):
+            ids, tfs = self.forward.doc_vector(self.dnum[d])
+            n_read += len(ids)
+            dl = self.index.doc_len.get(d) or 1
+            w = m / total / dl
+            for tid, tf in zip(ids, tfs):
+                rel[tid] += w * tf
+        best = heapq.nlargest(self.fb_terms, rel.items(), key=lambda x: x[1])
+        norm = sum(v for _, v in best) or 1.0
+        q_tf = Counter(terms)
+        out = defaultdict(float)
+        for t, c in q_tf.items():
+            out[t] += orig_weight * c / len(terms)
+        for tid, v in best:
+            out[self.forward.terms[tid]] += (1.0 - orig_weight) * v / norm
+        return dict(out), n_read
+
+    def rocchio(self, terms, scores, alpha=ROCCHIO_ALPHA, beta=ROCCHIO_BETA):
+        top = self._top_docs(scores)
+        N, df, vocab = self.index.N, self.index.df, self.forward.terms
+        centroid = defaultdict(float)
+        n_read = 0
+        for d, _ in top:
+            ids, tfs = self.forward.doc_vector(self.dnum[d])
+            n_read += len(ids)
+            vec = {}
+            for tid, tf in zip(ids, tfs):
+                t = vocab[tid]
+                df_t = df.get(t, 0)
+                if df_t > 0:
+                    vec[t] = (1.0 + math.log10(tf)) * math.log10(N / df_t)
+            norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+            for t, w in vec.items():
+                centroid[t] += w / norm / len(top)
+        q_w = {t: 1.0 + math.log10(tf) for t, tf in Counter(terms).items()}
+        q_norm = math.sqrt(sum(w * w for w in q_w.values())) or 1.0
+        keep = set(q_w) | {t for t, _ in heapq.nlargest(self.fb_terms, centroid.items(), key=lambda x: x[1])}
+        out = {t: alpha * q_w.get(t, 0.0) / q_norm + beta * centroid.get(t, 0.0) for t in keep}
+        return out, n_read
+
+    def search(self, terms, method="bm25", expansion="rm3"):
+        """Retour : scores finaux, requête pondérée, stats {"ms_first", "ms_expand", "ms_second", "read"}."""
+        t0 = time.perf_counter()
+        first = self.index.score(terms, method)
+        t1 = time.perf_counter()
+        expand = self.rm3 if expansion == "rm3" else self.rocchio
+        q_weights, n_read = expand(terms, first)
+        t2 = time.perf_counter()
+        scores = score_query_weighted(self.index, q_weights, method)
+        t3 = time.perf_counter()
+        return scores, q_weights, {"ms_first": (t1 - t0) * 1000, "ms_expand": (t2 - t1) * 1000,
+                                   "ms_second": (t3 - t2) * 1000, "read": n_read}
+
+
+# ---------------------------
+# Démonstration / mesure
+# ---------------------------
+def _overlap(a, b, k):
+    top_a = {d for d, _ in heapq.nlargest(k, a.items(), key=lambda x: x[1])}
+    top_b = {d for d, _ in heapq.nlargest(k, b.items(), key=lambda x: x[1])}
+    return len(top_a & top_b) / max(1, len(top_a))
+
+
+def report(prf, queries, method, expansion, k=ri.TOP_K, show=8):
+    print(f"{'requête':<46} {'1re passe':>9} {'expansion':>10} {'2e passe':>9} {'lus':>6} {'overlap@k':>10}")
+    for text in queries:
+        terms = prf.index.query_terms(text)
+        scores, q_weights, st = prf.search(terms, method, expansion)
+        base = prf.index.score(terms, method)
+        print(f"{text:<46} {st['ms_first']:>9.2f} {st['ms_expand']:>10.2f} {st['ms_second']:>9.2f} "
+              f"{st['read']:>6,} {_overlap(base, scores, k):>10.3f}")
+        expanded = sorted(q_weights.items(), key=lambda x: -x[1])[:show]
+        print("    " + "  ".join(f"{t}:{w:.3f}" for t, w in expanded))
+
+
+def main():
+    from searcher import LoadedIndex
+
+    ap = argparse.ArgumentParser(description="Expansion RM3 / Rocchio sur index direct compact.")
+    ap.add_argument("query", nargs="?", default=None, help="Requête (défaut : QUERIES).")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--method", choices=["bm25", "ltc"], default="bm25")
+    ap.add_argument("--expansion", choices=["rm3", "rocchio"], default="rm3")
+    ap.add_argument("--fb-docs", type=int, default=FB_DOCS)
+    ap.add_argument("--fb-terms", type=int, default=FB_TERMS)
+    ap.add_argument("-k", type=int, default=ri.TOP_K)
+    args = ap.parse_args()
+
+    stop_name, stem_name = args.config.split(":")
+    index = LoadedIndex(stop_name, stem_name)
+    t0 = time.perf_counter()
+    forward = load_forward_index(stop_name, stem_name)
+    print(f"Index direct chargé en {time.perf_counter() - t0:.2f}s : {len(forward):,} docs, "
+          f"{len(forward.term_ids):,} entrées, {forward.memory_bytes() / 1e6:.2f} Mo")
+    prf = PseudoRelevanceFeedback(index, forward, args.fb_docs, args.fb_terms)
+    report(prf, [args.query] if args.query else ri.QUERIES.values(), args.method, args.expansion, args.k)
+
+
+if __name__ == "__main__":
+    # classes picklées dans le cache sous le nom du module, pas de __main__
+    import feedback
+    feedback.main()
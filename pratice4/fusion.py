@@ -0,0 +1,188 @@
+"""
+Fusion de runs : RRF, CombSUM, CombMNZ.
+
+Chargement colonnaire (runio.load_columns) ; pour un run texte, le .bin voisin
+(main.WRITE_BINARY_RUNS, ou --write-bin ici) est lu à la place s'il est à jour,
+ce qui évite le parsing du texte. Les tables de qids / docids de chaque run
+sont ramenées à des numéros globaux, puis tout est vectorisé avec NumPy sur la
+concaténation des runs :
+  - normalisation des scores par (run, topic) : minmax, zscore ou aucune,
+    via les bornes de segments (np.*.reduceat) ;
+  - fusion : clé qid·n_docs + doc, un tri puis np.add.reduceat par clé ;
+      RRF      : somme 1 / (rrf_k + rang)
+      CombSUM  : somme des scores normalisés
+      CombMNZ  : CombSUM × nombre de runs qui retrouvent le doc ;
+  - top-k par topic : tri (topic, -score) puis rang dans le segment.
+Le run fusionné est écrit topic par topic (format INEX, un write par topic).
+
+    python fusion.py [runs...] --method rrf|combsum|combmnz [--norm minmax] [-k 1500] [--write-bin] --out fused.txt
+    (sans runs : les runs de generated_runs/)
+"""
+import os
+import glob
+import time
+import argparse
+
+import numpy as np
+
+import main as ri
+from runio import BIN_MAGIC, format_run_block, load_columns, write_run_columns
+
+RRF_K = 60
+FUSION_METHODS = ("rrf", "combsum", "combmnz")
+NORMS = ("minmax", "zscore", "none")
+
+
+# ---------------------------
+# Chargement
+# ---------------------------
+def binary_sidecar(path):
+    """Chemin du .bin voisin d'un run texte s'il existe et n'est pas plus ancien, sinon None."""
+    bin_path = os.path.splitext(path)[0] + ".bin"
+    if bin_path != path and os.path.exists(bin_path) and os.path.getmtime(bin_path) >= os.path.getmtime(path):
+        return bin_path
+    return None
+
+
+def load_runs(paths, write_bin=False):
+    """
+    Retour : qids, docids (tables globales), [(q, d, rang, score) en tableaux NumPy, un par run].
+    write_bin : écrit le .bin voisin de chaque run texte parsé.
+    """
+    q_index, d_index = {}, {}
+    runs = []
+    for path in paths:
+        cols = load_columns(binary_sidecar(path) or path)
+        if write_bin and not binary_sidecar(path):
+            with open(path, "rb") as f:
+                if f.read(len(BIN_MAGIC)) != BIN_MAGIC:
+                    write_run_columns(os.path.splitext(path)[0] + ".bin", *cols)
+        qids, docids, q_col, d_col, r_col, s_col = cols
+        q_map = np.array([q_index.setdefault(q, len(q_index)) for q in qids], dtype=np.int64)
+        d_map = np.array([d_index.setdefault(d, len(d_index)) for d in docids], dtype=np.int64)
+        q = q_map[np.frombuffer(q_col, dtype=np.uint32)] if len(q_col) else np.empty(0, dtype=np.int64)
+        d = d_map[np.frombuffer(d_col, dtype=np.uint32)] if len(d_col) else np.empty(0, dtype=np.int64)
+        runs.append((q, d, np.frombuffer(r_col, dtype=np.uint32).astype(np.float64),
+                     np.frombuffer(s_col, dtype=np.float32).astype(np.float64)))
+    return list(q_index), list(d_index), runs
+
+
+# ---------------------------
+# Normalisation et fusion
+# ---------------------------
+def normalize(q, scores, norm="minmax"):
+    """
+    Scores normalisés par topic (q : numéros de topics d'un run). Les lignes
+    d'un topic sont normalement contiguës (un bloc par topic) : pas de tri.
+    """
+    if norm == "none" or not len(q):
+        return scores
+    starts = np.flatnonzero(np.r_[True, q[1:] != q[:-1]])
+    if len(np.unique(q[starts])) == len(starts):
+        order = None
+        qs, ss = q, scores
+    else:
+        order = np.argsort(q, kind="stable")
+        qs, ss = q[order], scores[order]
+        starts = np.flatnonzero(np.r_[True, qs[1:] != qs[:-1]])
+    counts = np.diff(np.r_[starts, len(qs)])
+    if norm == "minmax":
+        lo = np.repeat(np.minimum.reduceat(ss, starts), counts)
+        span = np.repeat(np.maximum.reduceat(ss, starts), counts) - lo
+        out = np.where(span > 0, (ss - lo) / np.where(span > 0, span, 1.0), 0.0)
+    else:
+        mean = np.add.reduceat(ss, starts) / counts
+        var = np.add.reduceat(ss * ss, starts) / counts - mean * mean
+        std = np.sqrt(np.maximum(var, 0.0))
+        m, sd = np.repeat(mean, counts), np.repeat(std, counts)
+        out = np.where(sd > 0, (ss - m) / np.where(sd > 0, sd, 1.0), 0.0)
+    if order is None:
+        return out
+    result = np.empty_like(scores)
+    result[order] = out
+    return result
+
+
+def fuse(runs, n_docs, method="rrf", norm="minmax", rrf_k=RRF_K):
+    """Retour : topics, docs, scores fusionnés (une ligne par couple (topic, doc) distinct)."""
+    if not sum(len(q) for q, *_ in runs):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+    keys, contrib = [], []
+    for q, d, rank, score in runs:
+        keys.append(q * n_docs + d)
+        contrib.append(1.0 / (rrf_k + rank) if method == "rrf" else normalize(q, score, norm))
+    keys = np.concatenate(keys)
+    order = np.argsort(keys)
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    uniq = keys[starts]
+    fused = np.add.reduceat(np.concatenate(contrib)[order], starts)
+    if method == "combmnz":
+        fused *= np.diff(np.r_[starts, len(keys)])
+    return uniq // n_docs, uniq % n_docs, fused
+
+
+def top_k_per_topic(topics, docs, scores, k=ri.TOP_K):
+    """
+    k premiers de chaque topic par score décroissant (argpartition par segment,
+    comme sweep.top_k). Entrée triée par (topic, doc) (sortie de fuse) : les ex
+    aequo, y compris au seuil du k-ième, sont départagés par doc. Retour : topics, docs, scores triés.
+    """
+    bounds = np.flatnonzero(np.r_[True, topics[1:] != topics[:-1], True]) if len(topics) else [0]
+    keep = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        seg = -scores[lo:hi]
+        if k < hi - lo:
+            kth = seg[np.argpartition(seg, k - 1)[k - 1]]
+            sel = np.flatnonzero(seg < kth)
+            sel = np.sort(np.r_[sel, np.flatnonzero(seg == kth)[:k - len(sel)]])
+            keep.append(lo + sel[np.argsort(seg[sel], kind="stable")])
+        else:
+            keep.append(lo + np.argsort(seg, kind="stable"))
+    keep = np.concatenate(keep) if keep else np.empty(0, dtype=np.int64)
+    return topics[keep], docs[keep], scores[keep]
+
+
+def write_fused(path, qids, docids, topics, docs, scores, team=ri.TEAM):
+    """Écrit le run fusionné topic par topic ; renvoie le nombre de lignes."""
+    bounds = np.flatnonzero(np.r_[True, topics[1:] != topics[:-1], True]) if len(topics) else [0]
+    docs, scores = docs.tolist(), scores.tolist()
+    with open(path, "w", encoding="utf-8") as f:
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            ranked = [(docids[d], s) for d, s in zip(docs[lo:hi], scores[lo:hi])]
+            f.write(format_run_block(qids[topics[lo]], ranked, team))
+    return len(docs)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fusion de runs : RRF, CombSUM, CombMNZ.")
+    ap.add_argument("runs", nargs="*", help="Runs à fusionner (texte INEX ou binaire) ; défaut : generated_runs/.")
+    ap.add_argument("--method", choices=FUSION_METHODS, default="rrf")
+    ap.add_argument("--norm", choices=NORMS, default="minmax", help="Normalisation des scores (CombSUM / CombMNZ).")
+    ap.add_argument("--rrf-k", type=int, default=RRF_K)
+    ap.add_argument("-k", type=int, default=ri.TOP_K)
+    ap.add_argument("--write-bin", action="store_true", help="Écrit le .bin voisin des runs texte (chargements suivants rapides).")
+    ap.add_argument("--out", default=None, help="Run fusionné (défaut : generated_runs/<TEAM>_fusion_<méthode>.txt).")
+    args = ap.parse_args()
+
+    paths = args.runs or sorted(glob.glob(os.path.join(ri.OUTPUT_DIR, f"{ri.TEAM}_*_article_*.txt")))
+    if not paths:
+        ap.error("aucun run à fusionner")
+    out = args.out or os.path.join(ri.OUTPUT_DIR, f"{ri.TEAM}_fusion_{args.method}.txt")
+
+    t0 = time.perf_counter()
+    qids, docids, runs = load_runs(paths, args.write_bin)
+    t1 = time.perf_counter()
+    topics, docs, scores = fuse(runs, len(docids), args.method, args.norm, args.rrf_k)
+    topics, docs, scores = top_k_per_topic(topics, docs, scores, args.k)
+    t2 = time.perf_counter()
+    n = write_fused(out, qids, docids, topics, docs, scores)
+    t3 = time.perf_counter()
+    print(f"{len(paths)} runs, {len(qids):,} topics, {sum(len(r[0]) for r in runs):,} lignes : "
+          f"chargement {t1 - t0:.2f}s, fusion {args.method} {t2 - t1:.2f}s, écriture {t3 - t2:.2f}s")
+    print(f"{out} : {n:,} lignes")
+
+
+if __name__ == "__main__":
+    main()
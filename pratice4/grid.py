@@ -0,0 +1,152 @@
+"""
+Génération parallèle de la grille de runs (stop × stem × méthode).
+
+Phase 1 : les index manquants sont construits en parallèle (un process par
+configuration) et déposés dans le cache d'artefacts.
+Phase 2 : le parent charge les index, puis forke un pool de workers ; les
+index sont lus par les workers en copy-on-write (jamais picklés). Chaque run
+terminé est ajouté au ZIP au fil de l'eau.
+"""
+import os
+import time
+import zipfile
+import argparse
+import multiprocessing
+
+import main as ri
+from stemmers import get_stemmer
+from index_cache import cached_weights, get_cache
+
+# Index partagés : remplis par le parent AVANT le fork, lus par les workers
+_SHARED = {}
+
+
+def share(name, value):
+    _SHARED[name] = value
+
+
+def shared(name):
+    return _SHARED[name]
+
+
+def _call(job):
+    worker, args = job
+    t0 = time.time()
+    return worker(*args), time.time() - t0
+
+
+def run_tasks(tasks, worker, zip_path=None, workers=None):
+    """
+    Exécute worker(*args) pour chaque args de tasks sur un pool forké et zippe
+    chaque run dès qu'il est écrit. worker doit renvoyer le chemin du run.
+    Sans fork (Windows/macOS spawn) ou avec workers=1 : exécution séquentielle.
+    Retour : liste (chemin, durée) dans l'ordre de fin.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = [(worker, args) for args in tasks]
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        pool = multiprocessing.get_context("fork").Pool(min(workers, len(jobs)))
+        results = pool.imap_unordered(_call, jobs)
+    else:
+        pool = None
+        results = map(_call, jobs)
+
+    done = []
+    zf = zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) if zip_path else None
+    try:
+        for path, elapsed in results:
+            done.append((path, elapsed))
+            if zf and path:
+                zf.write(path, os.path.basename(path))
+    finally:
+        if zf:
+            zf.close()
+        if pool:
+            pool.close()
+            pool.join()
+    return done
+
+
+# ---------------------------
+# Grille pratice4/main.py
+# ---------------------------
+def _build_config(stop_name, stem_name):
+    """Phase 1 : construit l'index d'une configuration (sur la collection partagée) et le dépose dans le cache."""
+    return ri.load_config_index(stop_name, stem_name, lambda: shared("docs"))[0]
+
+
+def _run_one(run_name, method, stop_name, stem_name):
+    """Phase 2 : un run (configuration, méthode) sur l'index partagé."""
+    key, postings, df, doc_len, doc_ids, stopset, stem_cache = shared((stop_name, stem_name))
+    N = len(doc_ids)
+    weighted = lm_model = None
+    if method == "ltn":
+        weighted, _ = cached_weights(key, method, lambda: ri.compute_ltn_weights(postings, df, N))
+    elif method == "ltc":
+        weighted, _ = cached_weights(key, method, lambda: ri.compute_ltc_weights(postings, df, N))
+    elif method in ("dirichlet", "jm"):
+        lm_model = shared(("lm", stop_name, stem_name))
+    path, written, expected = ri.generate_one_run(
+        run_name, method, postings, df, doc_len, doc_ids, N, ri.QUERIES,
+        stopset, get_stemmer(stem_name), stem_cache, ri.OUTPUT_DIR, weighted, lm_model)
+    if written != expected:
+        print(f"   [WARN] {os.path.basename(path)} incomplet ({written}/{expected})")
+    return path
+
+
+def run_grid(workers=None, stem_names=None, methods=None):
+    """Même grille et même numérotation des runs que la boucle de main.main()."""
+    stem_names = stem_names or ri.STEM_NAMES
+    methods = methods or ri.grid_methods()
+    configs = [(stop, stem) for stop in ("nostop", "stop671") for stem in stem_names]
+    ri.ensure_dir(ri.OUTPUT_DIR)
+
+    t0 = time.time()
+    missing = [c for c in configs if not get_cache().has(ri.config_key(*c), "index")]
+    if missing:
+        # collection lue une fois par le parent, partagée avec les workers par le fork
+        share("docs", ri.load_collection(ri.DATAFILE))
+        run_tasks(missing, _build_config, workers=workers)
+        _SHARED.pop("docs")
+    t_index = time.time() - t0
+
+    stop_full = ri.load_stopwords(ri.STOPFILE)
+    tasks = []
+    run_id = 1
+    for stop_name, stem_name in configs:
+        key, postings, df, doc_len, doc_ids, stem_cache = ri.load_config_index(stop_name, stem_name)
+        stopset = stop_full if stop_name != "nostop" else set()
+        share((stop_name, stem_name), (key, postings, df, doc_len, doc_ids, stopset, stem_cache))
+        if "dirichlet" in methods or "jm" in methods:
+            from lm import LanguageModel
+            share(("lm", stop_name, stem_name), LanguageModel(postings, doc_len, doc_ids))
+        for method in methods:
+            tasks.append((f"{run_id}_{method}_article_{stop_name}_{stem_name}", method, stop_name, stem_name))
+            run_id += 1
+
+    zip_path = os.path.join(ri.OUTPUT_DIR, f"{ri.TEAM}_ALL_RUNS.zip")
+    t0 = time.time()
+    done = run_tasks(tasks, _run_one, zip_path=zip_path, workers=workers)
+    t_runs = time.time() - t0
+    return done, t_index, t_runs, zip_path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Génération parallèle des runs (stop × stem × méthode).")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="Taille du pool de process.")
+    ap.add_argument("--stemmers", default=",".join(ri.STEM_NAMES), help="Stemmers de la grille.")
+    args = ap.parse_args()
+
+    if not os.path.exists(ri.DATAFILE):
+        print(f"[ERROR] Collection manquante : {ri.DATAFILE}")
+        return
+    done, t_index, t_runs, zip_path = run_grid(args.workers, args.stemmers.split(","))
+    for path, elapsed in done:
+        print(f"   -> {os.path.basename(path)}  ({elapsed:.2f}s)")
+    slowest = max(elapsed for _, elapsed in done)
+    print(f"\nIndex : {t_index:.2f}s   runs : {t_runs:.2f}s (run le plus lent {slowest:.2f}s, {args.workers} workers)")
+    print(f"ZIP généré : {zip_path}")
+
+
+if __name__ == "__main__":
+    main()
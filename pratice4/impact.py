@@ -0,0 +1,180 @@
+"""
+Index « ordonné par impact » pour BM25 et évaluation score-at-a-time.
+
+À l'indexation, la contribution de chaque posting, idf_t · tf_adj (comme
+score_query_bm25), est quantifiée sur `bits` bits signés avec un pas global :
+impact_q = round(impact / scale). Les postings d'un terme sont regroupés en
+segments d'impact égal, du plus fort au plus faible : term -> [(impact_q,
+array de numéros de docs), ...].
+
+À la requête, les segments de tous les termes sont traités par impact
+décroissant ; l'accumulation est entière. Arrêt :
+  - budget : nombre maximal de postings traités ;
+  - top-k sûr : la borne des contributions restantes (somme, par terme, de
+    l'impact positif du prochain segment) ne permet plus à un doc hors du
+    top-k de dépasser le k-ième (score_{k+1} + borne <= score_k). Seulement
+    si aucun terme de la requête n'a de segment négatif restant : ceux-ci
+    peuvent encore faire sortir un doc du top-k ;
+  - top-k stable (heuristique) : l'ensemble du top-k n'a pas changé sur
+    SETTLE_CHECKS contrôles consécutifs.
+Les contrôles ont lieu tous les CHECK_FRACTION des postings de la requête.
+Les segments négatifs (idf BM25 < 0 quand df > N/2, p. ex. sans stop-list)
+viennent en dernier : pour une telle requête, seuls le budget et l'arrêt
+heuristique peuvent interrompre l'évaluation avant eux.
+
+    python impact.py --config stop671:porter [--bits 8] [--budget 0.25]
+"""
+import time
+import heapq
+import argparse
+from array import array
+from collections import defaultdict
+
+import main as ri
+from index_cache import get_cache
+
+IMPACT_BITS = 8
+CHECK_FRACTION = 0.05  # contrôle d'arrêt tous les 5 % des postings de la requête
+SETTLE_CHECKS = 5      # top-k inchangé sur 5 contrôles -> arrêt
+
+
+# ---------------------------
+# Construction
+# ---------------------------
+def build_impact_index(postings, df, doc_len, doc_ids, k1=ri.BM25_K1, b=ri.BM25_B, bits=IMPACT_BITS):
+    """Retour : segments (term -> [(impact_q, array 'I')]), scale (impact = impact_q * scale)."""
+    dnum = {d: i for i, d in enumerate(doc_ids)}
+    raw, _ = ri.compute_bm25_weights(postings, df, doc_len, len(doc_ids), k1, b)
+    top = 0.0
+    for imps in raw.values():
+        if imps:
+            top = max(top, max(abs(v) for v in imps.values()))
+    scale = top / ((1 << (bits - 1)) - 1) if top > 0 else 1.0
+
+    segments = {}
+    for t, imps in raw.items():
+        groups = defaultdict(list)
+        for d, v in imps.items():
+            groups[int(round(v / scale))].append(dnum[d])
+        segments[t] = [(q, array("I", sorted(groups[q]))) for q in sorted(groups, reverse=True) if q != 0]
+    return segments, scale
+
+
+def load_impact_index(key, postings, df, doc_len, doc_ids, bits=IMPACT_BITS):
+    return get_cache().get_or_build(key, f"impact_bm25_{bits}",
+                                    lambda: build_impact_index(postings, df, doc_len, doc_ids, bits=bits))
+
+
+# ---------------------------
+# Score-at-a-time
+# ---------------------------
+def _safe(best, k, bound):
+    """best : les k+1 meilleurs scores. Vrai si aucun doc hors du top-k ne peut plus y entrer."""
+    if bound <= 0:
+        return True
+    if len(best) <= k:
+        return False  # des docs non vus (score 0) peuvent encore entrer
+    return best[k][1] + bound <= best[k - 1][1]
+
+
+def score_query_saat(segments, scale, query_terms, k=ri.TOP_K, budget=None,
+                     check_fraction=CHECK_FRACTION, settle_checks=SETTLE_CHECKS):
+    """
+    Évaluation anytime. budget : nombre max de postings (None = pas de limite) ;
+    settle_checks=0 désactive l'arrêt heuristique (seul le test sûr reste).
+    Retour : {numéro de doc: score}, stats {"postings", "segments", "stop"}.
+    """
+    terms = [t for t in set(query_terms) if segments.get(t)]
+    order = sorted(((q, t, i) for t in terms for i, (q, _) in enumerate(segments[t])),
+                   key=lambda x: -x[0])
+    total = sum(len(docs) for t in terms for _, docs in segments[t])
+    step = max(1, int(total * check_fraction))
+    nxt = {t: 0 for t in terms}  # indice du prochain segment de chaque terme
+    acc = defaultdict(int)
+    done = n_seg = 0
+    next_check = step
+    last_top, same = None, 0
+    stop = "exhaustif"
+    for q, t, i in order:
+        if budget is not None and done >= budget:
+            stop = "budget"
+            break
+        if q > 0 and done >= next_check:
+            next_check = done + step
+            best = heapq.nlargest(k + 1, acc.items(), key=lambda x: x[1])
+            bound = sum(segments[u][nxt[u]][0] for u in terms
+                        if nxt[u] < len(segments[u]) and segments[u][nxt[u]][0] > 0)
+            neg_left = any(nxt[u] < len(segments[u]) and segments[u][-1][0] < 0 for u in terms)
+            if not neg_left and _safe(best, k, bound):
+                stop = "top-k sûr"
+                break
+            top = frozenset(d for d, _ in best[:k])
+            same = same + 1 if top == last_top else 0
+            last_top = top
+            if settle_checks and same >= settle_checks:
+                stop = "top-k stable"
+                break
+        for d in segments[t][i][1]:
+            acc[d] += q
+        done += len(segments[t][i][1])
+        n_seg += 1
+        nxt[t] = i + 1
+    return {d: v * scale for d, v in acc.items()}, {"postings": done, "segments": n_seg, "stop": stop}
+
+
+# ---------------------------
+# Benchmark
+# ---------------------------
+def _top(scores, k):
+    return {d for d, _ in heapq.nlargest(k, scores.items(), key=lambda x: x[1])}
+
+
+def benchmark(index_name, postings, df, doc_len, doc_ids, segments, scale, budgets, k=ri.TOP_K, stopset=None,
+              stemmer=None, stem_cache=None):
+    N = len(doc_ids)
+    avdl = sum(doc_len.values()) / N
+    n_seg = sum(len(s) for s in segments.values())
+    print(f"{index_name} : {len(segments):,} termes, {n_seg:,} segments, pas de quantification {scale:.5f}")
+    print(f"{'requête':<46} {'mode':<14} {'ms':>7} {'postings':>9} {'arrêt':<13} {'overlap@k':>10}")
+    for q in ri.QUERIES.values():
+        terms = ri.preprocess_tokens(ri.tokenizer(q), stopset, stemmer, stem_cache)
+        t0 = time.perf_counter()
+        exact, _ = ri.score_query_bm25(postings, df, doc_len, N, terms, avdl=avdl)
+        ms = (time.perf_counter() - t0) * 1000
+        ref = _top(exact, k)
+        total = sum(len(postings[t]) for t in set(terms) if t in postings)
+        print(f"{q:<46} {'bm25':<14} {ms:>7.2f} {total:>9,} {'-':<13} {1.0:>10.3f}")
+        for frac in budgets:
+            budget = None if frac is None else int(total * frac)
+            t0 = time.perf_counter()
+            approx, st = score_query_saat(segments, scale, terms, k, budget)
+            ms = (time.perf_counter() - t0) * 1000
+            got = {doc_ids[d] for d in _top(approx, k)}
+            label = "saat" if frac is None else f"saat {frac:.0%}"
+            print(f"{'':<46} {label:<14} {ms:>7.2f} {st['postings']:>9,} {st['stop']:<13} "
+                  f"{len(got & ref) / max(1, len(ref)):>10.3f}")
+
+
+def main():
+    from stemmers import get_stemmer
+
+    ap = argparse.ArgumentParser(description="Index ordonné par impact + BM25 score-at-a-time (anytime).")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--bits", type=int, default=IMPACT_BITS, help="Bits de quantification des impacts.")
+    ap.add_argument("--budget", type=float, action="append", default=None,
+                    help="Fraction des postings autorisée (répétable) ; toujours comparé à l'arrêt par stabilisation.")
+    ap.add_argument("-k", type=int, default=ri.TOP_K)
+    args = ap.parse_args()
+
+    stop_name, stem_name = args.config.split(":")
+    key, postings, df, doc_len, doc_ids, stem_cache = ri.load_config_index(stop_name, stem_name)
+    t0 = time.perf_counter()
+    segments, scale = load_impact_index(key, postings, df, doc_len, doc_ids, args.bits)
+    print(f"Index d'impacts chargé en {time.perf_counter() - t0:.2f}s")
+    stopset = ri.load_stopwords(ri.STOPFILE) if stop_name != "nostop" else set()
+    benchmark(args.config, postings, df, doc_len, doc_ids, segments, scale, [None] + (args.budget or [0.1, 0.3]),
+              args.k, stopset, get_stemmer(stem_name), stem_cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Cache d'artefacts d'indexation adressé par contenu.
+
+La clé est un hash de (contenu de la collection, contenu du fichier de
+stop-words, nom du stemmer, regex du tokenizer). Sous cette clé on range les
+artefacts construits (index, table de stems, poids ltn/ltc) en pickle.
+Éviction LRU (date de dernière utilisation = mtime) sous un budget disque.
+"""
+import os
+import json
+import pickle
+import hashlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("RI_CACHE_DIR", os.path.join(HERE, ".index_cache"))
+CACHE_BUDGET_BYTES = int(os.environ.get("RI_CACHE_BUDGET_MB", "2048")) * 1024 * 1024
+CACHE_FORMAT = 1  # à incrémenter si la forme des artefacts change
+
+
+# ---------------------------
+# Hash des entrées
+# ---------------------------
+def _hash_file(path, memo):
+    """sha256 du fichier ; mémorisé par (taille, mtime) pour ne pas relire une collection inchangée."""
+    st = os.stat(path)
+    apath = os.path.abspath(path)
+    hit = memo.get(apath)
+    if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+        return hit[2]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    memo[apath] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+    return memo[apath][2]
+
+
+def index_key(data_path, stop_path, stem_name, token_pattern, root=CACHE_DIR):
+    """Clé de configuration : hash(collection, stop-words, stemmer, tokenizer)."""
+    os.makedirs(root, exist_ok=True)
+    memo_path = os.path.join(root, "hashes.json")
+    try:
+        with open(memo_path, "r", encoding="utf-8") as f:
+            memo = json.load(f)
+    except (OSError, ValueError):
+        memo = {}
+    before = dict(memo)
+
+    h = hashlib.sha256()
+    h.update(f"format={CACHE_FORMAT}\n".encode())
+    h.update(f"data={_hash_file(data_path, memo)}\n".encode())
+    stop_hash = _hash_file(stop_path, memo) if stop_path and os.path.exists(stop_path) else "none"
+    h.update(f"stop={stop_hash}\n".encode())
+    h.update(f"stem={stem_name}\ntoken={token_pattern}\n".encode())
+
+    if memo != before:
+        # fichier temporaire propre au process : index_key est appelé en parallèle (grid, serveur)
+        tmp = f"{memo_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(memo, f)
+        os.replace(tmp, memo_path)
+    return h.hexdigest()[:24]
+
+
+# ---------------------------
+# Cache
+# ---------------------------
+class ArtifactCache:
+    def __init__(self, root=CACHE_DIR, budget=CACHE_BUDGET_BYTES):
+        self.root = root
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key, name, ext=".pkl"):
+        return os.path.join(self.root, key, f"{name}{ext}")
+
+    def has(self, key, name):
+        return os.path.exists(self.path(key, name))
+
+    def get(self, key, name):
+        """Renvoie l'artefact ou None ; un accès rafraîchit sa date LRU."""
+        p = self.path(key, name)
+        try:
+            with open(p, "rb") as f:
+                obj = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # AttributeError / ImportError : classe introuvable (artefact picklé depuis un script)
+            self.misses += 1
+            return None
+        os.utime(p)
+        self.hits += 1
+        return obj
+
+    def put(self, key, name, obj):
+        p = self.path(key, name)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = f"{p}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, p)  # écriture atomique
+        self.evict()
+
+    def get_or_build(self, key, name, build):
+        obj = self.get(key, name)
+        if obj is None:
+            obj = build()
+            self.put(key, name, obj)
+        return obj
+
+    def file(self, key, name, ext, write):
+        """
+        Artefact stocké comme fichier brut (ex. index disque mmappé) :
+        write(tmp_path) le crée s'il manque. Renvoie le chemin.
+        """
+        p = self.path(key, name, ext)
+        if os.path.exists(p):
+            os.utime(p)
+            self.hits += 1
+            return p
+        self.misses += 1
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = f"{p}.{os.getpid()}.tmp"
+        write(tmp)
+        os.replace(tmp, p)
+        self.evict()
+        return p
+
+    def entries(self):
+        """Liste (mtime, taille, chemin) de tous les artefacts."""
+        out = []
+        if not os.path.isdir(self.root):
+            return out
+        for key in os.listdir(self.root):
+            d = os.path.join(self.root, key)
+            if not os.path.isdir(d):
+                continue
+            for fn in os.listdir(d):
+                if not fn.endswith(".tmp"):
+                    p = os.path.join(d, fn)
+                    try:
+                        st = os.stat(p)
+                    except FileNotFoundError:  # évincé par un autre process
+                        continue
+                    out.append((st.st_mtime, st.st_size, p))
+        return out
+
+    def evict(self):
+        """Supprime les artefacts les moins récemment utilisés jusqu'à tenir dans le budget."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= self.budget:
+                break
+            try:
+                os.remove(p)
+                d = os.path.dirname(p)
+                if not os.listdir(d):
+                    os.rmdir(d)
+            except OSError:  # déjà supprimé par un autre process
+                pass
+            total -= size
+        return total
+
+
+_default_cache = None
+
+
+def get_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ArtifactCache()
+    return _default_cache
+
+
+# ---------------------------
+# Artefacts usuels
+# ---------------------------
+def cached_index(key, build, cache=None):
+    """
+    build() -> (postings, df, doc_len, doc_ids, stem_cache) comme main.build_index.
+    Les defaultdict sont convertis en dict (picklables). Index et table de stems
+    sont rangés séparément.
+    """
+    cache = cache or get_cache()
+    index = cache.get(key, "index")
+    stem_cache = cache.get(key, "stems") if index is not None else None
+    if index is None or stem_cache is None:
+        postings, df, doc_len, doc_ids, stem_cache = build()
+        index = ({t: dict(plist) for t, plist in postings.items()}, dict(df), dict(doc_len), list(doc_ids))
+        cache.put(key, "index", index)
+        cache.put(key, "stems", dict(stem_cache))
+    postings, df, doc_len, doc_ids = index
+    return postings, df, doc_len, doc_ids, stem_cache
+
+
+def cached_weights(key, method, build, cache=None):
+    """build() -> (weighted_postings, aux) comme compute_ltn_weights / compute_ltc_weights."""
+    return (cache or get_cache()).get_or_build(key, f"weights_{method}", build)
@@ -0,0 +1,216 @@
+"""
+Index de k-grammes sur le vocabulaire (termes de l'index, après stemming) et
+requêtes à jokers : "retriev*", "*rank*", "oli*oil".
+
+Chaque terme est bordé de '$' ("$oil$") ; gramme -> tableau trié des numéros
+de termes (vocabulaire trié). Un motif est découpé sur '*', ses fragments
+(bordés de '$' aux extrémités fixes) donnent des k-grammes dont on intersecte
+les listes (plus courte d'abord), puis un filtre par expression régulière
+élimine les faux positifs ("$re" et "red" ne garantissent pas "re*d").
+Motif de préfixe seul ("oli*") : plage du vocabulaire trié par dichotomie.
+Pas de gramme utilisable ("*a*") : parcours du vocabulaire.
+
+Les postings des termes développés sont fusionnés en un terme virtuel (le
+motif lui-même) : tf sommés, df = taille de l'union. Ce terme entre tel quel
+dans score_query_bm25 / score_query_ltn (un seul idf pour le motif).
+
+    python kgram.py --config stop671:porter "retriev* model" --method bm25
+    python kgram.py --bench
+"""
+import re
+import time
+import fnmatch
+import argparse
+from array import array
+from bisect import bisect_left
+from collections import ChainMap, defaultdict
+
+import main as ri
+from index_cache import get_cache
+from boolean import intersect_adaptive
+
+K = 3
+MAX_EXPANSIONS = 1000  # au-delà, on garde les termes de plus grand df
+
+
+# ---------------------------
+# Index de k-grammes
+# ---------------------------
+def kgrams(s, k=K):
+    return [s[i:i + k] for i in range(len(s) - k + 1)]
+
+
+class KGramIndex:
+    def __init__(self, terms, k=K):
+        self.k = k
+        self.terms = sorted(terms)
+        grams = defaultdict(list)
+        for tid, t in enumerate(self.terms):
+            for g in set(kgrams(f"${t}$", k)):
+                grams[g].append(tid)
+        self.grams = {g: array("I", tids) for g, tids in grams.items()}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def gram_list(self, gram):
+        return self.grams.get(gram) or array("I")
+
+    def prefix_range(self, prefix):
+        """Numéros des termes commençant par prefix (plage contiguë du vocabulaire trié)."""
+        lo = bisect_left(self.terms, prefix)
+        hi = bisect_left(self.terms, prefix + "\uffff", lo)
+        return range(lo, hi)
+
+    def pattern_grams(self, pattern):
+        """k-grammes que tout terme correspondant au motif contient."""
+        out = set()
+        for frag in f"${pattern}$".split("*"):
+            out.update(kgrams(frag, self.k))
+        return out
+
+    def expand(self, pattern):
+        """Termes du vocabulaire correspondant au motif (jokers '*')."""
+        if "*" not in pattern:
+            i = bisect_left(self.terms, pattern)
+            return [pattern] if i < len(self.terms) and self.terms[i] == pattern else []
+        regex = re.compile(fnmatch.translate(pattern))
+        head = pattern.split("*", 1)[0]
+        if pattern == head + "*":
+            r = self.prefix_range(head)
+            return self.terms[r.start:r.stop]
+        grams = self.pattern_grams(pattern)
+        if grams:
+            lists = sorted((self.gram_list(g) for g in grams), key=len)
+            tids = lists[0]
+            for plist in lists[1:]:
+                if not tids:
+                    break
+                tids = intersect_adaptive(tids, plist)
+            candidates = (self.terms[i] for i in tids)
+        elif head:
+            r = self.prefix_range(head)
+            candidates = self.terms[r.start:r.stop]
+        else:
+            candidates = self.terms
+        return [t for t in candidates if regex.match(t)]
+
+
+def load_kgram_index(key, postings, k=K):
+    """KGramIndex du vocabulaire d'une configuration (rangé dans le cache d'artefacts)."""
+    return get_cache().get_or_build(key, f"kgrams{k}", lambda: KGramIndex(postings, k))
+
+
+# ---------------------------
+# Requêtes à jokers
+# ---------------------------
+def split_wildcards(text):
+    """Renvoie (texte sans les motifs, liste des motifs en minuscules)."""
+    plain, patterns = [], []
+    for tok in text.split():
+        if "*" in tok:
+            pattern = re.sub(r"[^a-z*]", "", tok.lower())
+            if pattern.strip("*"):
+                patterns.append(pattern)
+        else:
+            plain.append(tok)
+    return " ".join(plain), patterns
+
+
+def merge_postings(postings, df, terms, max_terms=MAX_EXPANSIONS):
+    """Union des postings des termes (tf sommés) ; garde les max_terms termes de plus grand df."""
+    if max_terms and len(terms) > max_terms:
+        terms = sorted(terms, key=lambda t: df.get(t, 0), reverse=True)[:max_terms]
+    merged = defaultdict(int)
+    for t in terms:
+        for d, tf in postings[t].items():
+            merged[d] += tf
+    return dict(merged)
+
+
+def wildcard_overlay(index, kg, patterns):
+    """
+    Postings / df / poids ltn des termes virtuels (un par motif), superposés
+    à ceux de l'index (ChainMap). Retour : postings, df, ltn, {motif: termes}.
+    """
+    v_postings, v_df, expansions = {}, {}, {}
+    for pattern in patterns:
+        terms = kg.expand(pattern)
+        expansions[pattern] = terms
+        if terms:
+            v_postings[pattern] = merge_postings(index.postings, index.df, terms)
+            v_df[pattern] = len(v_postings[pattern])
+    v_ltn = ri.compute_ltn_weights(v_postings, v_df, index.N)[0] if v_postings else {}
+    return (ChainMap(v_postings, index.postings), ChainMap(v_df, index.df),
+            ChainMap(v_ltn, index.weights["ltn"]), expansions)
+
+
+def score_query_wildcard(index, kg, text, method="bm25", k1=ri.BM25_K1, b=ri.BM25_B):
+    """
+    index : searcher.LoadedIndex ; kg : KGramIndex de son vocabulaire.
+    Renvoie (scores, {motif: termes développés}).
+    """
+    plain, patterns = split_wildcards(text)
+    terms = index.query_terms(plain) + patterns
+    postings, df, ltn, expansions = wildcard_overlay(index, kg, patterns)
+    if method == "ltn":
+        return ri.score_query_ltn(ltn, terms), expansions
+    if method != "bm25":
+        raise ValueError(f"méthode non supportée avec jokers : {method}")
+    scores, _ = ri.score_query_bm25(postings, df, index.doc_len, index.N, terms, k1, b, index.avdl)
+    return scores, expansions
+
+
+# ---------------------------
+# Benchmark
+# ---------------------------
+BENCH_PATTERNS = ["retriev*", "*rank*", "oli*", "*tion", "net*k", "mod*l*", "*ing*"]
+
+
+def bench_expansion(kg, patterns, repeat=50):
+    print(f"vocabulaire : {len(kg):,} termes, {len(kg.grams):,} {kg.k}-grammes")
+    print(f"{'motif':<12} {'termes':>7} {'k-gram ms':>10} {'parcours ms':>12}")
+    for pattern in patterns:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            got = kg.expand(pattern)
+        ms = (time.perf_counter() - t0) * 1000 / repeat
+        t0 = time.perf_counter()
+        scan = fnmatch.filter(kg.terms, pattern)
+        ms_scan = (time.perf_counter() - t0) * 1000
+        assert sorted(got) == sorted(scan), pattern
+        print(f"{pattern:<12} {len(got):>7,} {ms:>10.3f} {ms_scan:>12.3f}")
+
+
+def main():
+    from searcher import LoadedIndex
+
+    ap = argparse.ArgumentParser(description="Requêtes à jokers via un index de k-grammes du vocabulaire.")
+    ap.add_argument("query", nargs="?", default=None, help='Ex. "retriev* model"')
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--method", choices=["ltn", "bm25"], default="bm25")
+    ap.add_argument("-k", type=int, default=10)
+    ap.add_argument("--bench", action="store_true", help="Latence du développement des motifs vs parcours du vocabulaire.")
+    args = ap.parse_args()
+
+    index = LoadedIndex(*args.config.split(":"))
+    t0 = time.perf_counter()
+    kg = load_kgram_index(index.key, index.postings)
+    print(f"Index {args.config} ; k-grammes chargés en {time.perf_counter() - t0:.2f}s")
+    if args.bench:
+        bench_expansion(kg, BENCH_PATTERNS)
+    if args.query:
+        t0 = time.perf_counter()
+        scores, expansions = score_query_wildcard(index, kg, args.query, args.method)
+        ms = (time.perf_counter() - t0) * 1000
+        for pattern, terms in expansions.items():
+            print(f"{pattern} -> {len(terms)} termes : {' '.join(terms[:15])}{' ...' if len(terms) > 15 else ''}")
+        print(f"{len(scores):,} docs ({ms:.2f} ms)")
+        for rank, (d, s) in enumerate(ri.top_k_with_padding(scores, index.doc_ids, args.k), start=1):
+            print(f"{rank:4d}. doc={d}  score={s:.5f}")
+
+
+if __name__ == "__main__":
+    # classes picklées dans le cache sous le nom du module, pas de __main__
+    import kgram
+    kgram.main()
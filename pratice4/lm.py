@@ -0,0 +1,190 @@
+"""
+Modèles de langue (vraisemblance de la requête) : lissage de Dirichlet et de
+Jelinek-Mercer, à côté de ltn / ltc / bm25 dans main.generate_one_run.
+
+Probabilités de collection p_c(t) = cf_t / |C| calculées une fois par index.
+Décomposition du log de vraisemblance (qtf : tf du terme dans la requête) :
+  Dirichlet : somme_t qtf·log p_c(t) + somme_{t ∈ d} qtf·log(1 + tf/(mu·p_c))
+              + |q|·log(mu / (|d| + mu))
+  JM        : somme_t qtf·log((1-lam)·p_c(t)) + somme_{t ∈ d} qtf·log(1 + lam·tf/((1-lam)·p_c·|d|))
+              (lam : poids du modèle du document)
+Le dernier terme de Dirichlet dépend de la longueur de TOUS les documents (y
+compris ceux sans aucun terme de la requête) : accumulateur dense sur les N
+documents, initialisé par une opération vectorielle NumPy, puis les postings
+de chaque terme ajoutés par indexation groupée. Sans NumPy, repli en Python pur.
+Les termes absents de la collection (p_c = 0) sont ignorés.
+
+    python lm.py --config stop671:porter [--mu 2000] [--lam 0.7] [--repeat 20]
+"""
+import math
+import time
+import argparse
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # repli en Python pur
+    np = None
+
+LM_MU = 2000.0
+LM_LAMBDA = 0.7  # poids du modèle du document dans JM
+LM_METHODS = ("dirichlet", "jm")
+
+
+class LanguageModel:
+    """Statistiques d'un index pour les modèles de langue (calculées une fois)."""
+
+    def __init__(self, postings, doc_len, doc_ids, mu=LM_MU, lam=LM_LAMBDA, use_numpy=True):
+        self.postings = postings
+        self.doc_ids = doc_ids
+        self.mu = mu
+        self.lam = lam
+        self.numpy = use_numpy and np is not None
+        total = sum(doc_len.values()) or 1
+        self.coll_prob = {t: sum(plist.values()) / total for t, plist in postings.items()}
+        self.dnum = {d: i for i, d in enumerate(doc_ids)}
+        lengths = [doc_len.get(d, 0) for d in doc_ids]
+        self.doc_len = np.array(lengths, dtype=np.float64) if self.numpy else lengths
+        self._arrays = {}  # term -> (numéros de docs, tf) en tableaux NumPy
+
+    def _term_arrays(self, t):
+        arrs = self._arrays.get(t)
+        if arrs is None:
+            plist = self.postings[t]
+            arrs = (np.fromiter((self.dnum[d] for d in plist), dtype=np.int64, count=len(plist)),
+                    np.fromiter(plist.values(), dtype=np.float64, count=len(plist)))
+            self._arrays[t] = arrs
+        return arrs
+
+    def _query(self, query_terms):
+        return {t: qtf for t, qtf in Counter(query_terms).items() if self.coll_prob.get(t)}
+
+    # ---------------------------
+    # Noyaux NumPy (accumulateur dense)
+    # ---------------------------
+    def _dirichlet_np(self, q):
+        mu = self.mu
+        n_q = sum(q.values())
+        acc = n_q * np.log(mu / (self.doc_len + mu))
+        acc += sum(qtf * math.log(self.coll_prob[t]) for t, qtf in q.items())
+        for t, qtf in q.items():
+            docs, tfs = self._term_arrays(t)
+            acc[docs] += qtf * np.log1p(tfs / (mu * self.coll_prob[t]))
+        return acc
+
+    def _jm_np(self, q):
+        lam = self.lam
+        acc = np.full(len(self.doc_ids), sum(qtf * math.log((1.0 - lam) * self.coll_prob[t]) for t, qtf in q.items()))
+        for t, qtf in q.items():
+            docs, tfs = self._term_arrays(t)
+            dl = np.maximum(self.doc_len[docs], 1.0)
+            acc[docs] += qtf * np.log1p(lam * tfs / ((1.0 - lam) * self.coll_prob[t] * dl))
+        return acc
+
+    # ---------------------------
+    # Repli Python pur
+    # ---------------------------
+    def _dirichlet_py(self, q):
+        mu = self.mu
+        n_q = sum(q.values())
+        const = sum(qtf * math.log(self.coll_prob[t]) for t, qtf in q.items())
+        acc = [const + n_q * math.log(mu / (dl + mu)) for dl in self.doc_len]
+        for t, qtf in q.items():
+            pc = self.coll_prob[t]
+            for d, tf in self.postings[t].items():
+                acc[self.dnum[d]] += qtf * math.log1p(tf / (mu * pc))
+        return acc
+
+    def _jm_py(self, q):
+        lam = self.lam
+        acc = [sum(qtf * math.log((1.0 - lam) * self.coll_prob[t]) for t, qtf in q.items())] * len(self.doc_ids)
+        for t, qtf in q.items():
+            pc = self.coll_prob[t]
+            for d, tf in self.postings[t].items():
+                i = self.dnum[d]
+                acc[i] += qtf * math.log1p(lam * tf / ((1.0 - lam) * pc * max(self.doc_len[i], 1)))
+        return acc
+
+    def dense_scores(self, query_terms, method="dirichlet"):
+        """Log-vraisemblance de la requête pour chaque document (ordre de doc_ids)."""
+        q = self._query(query_terms)
+        if method == "dirichlet":
+            return self._dirichlet_np(q) if self.numpy else self._dirichlet_py(q)
+        if method == "jm":
+            return self._jm_np(q) if self.numpy else self._jm_py(q)
+        raise ValueError(f"méthode inconnue : {method}")
+
+    def score(self, query_terms, method="dirichlet", k=None):
+        """
+        {docid: score} des k meilleurs documents (tous si k est None), insérés
+        par score décroissant, ex aequo dans l'ordre de doc_ids (comme le
+        complément de top_k_with_padding).
+        """
+        acc = self.dense_scores(query_terms, method)
+        if self.numpy:
+            order = np.argsort(-acc, kind="stable")[:k].tolist()
+            values = acc[order].tolist()
+        else:
+            order = sorted(range(len(acc)), key=lambda i: -acc[i])[:k]
+            values = [acc[i] for i in order]
+        return {self.doc_ids[i]: s for i, s in zip(order, values)}
+
+
+# ---------------------------
+# Benchmark : débit contre BM25 sur les mêmes postings
+# ---------------------------
+def benchmark(postings, df, doc_len, doc_ids, queries, mu, lam, k, repeat):
+    import main as ri
+
+    N = len(doc_ids)
+    avdl = sum(doc_len.values()) / N
+    t0 = time.perf_counter()
+    models = {"numpy": LanguageModel(postings, doc_len, doc_ids, mu, lam)} if np is not None else {}
+    models["python"] = LanguageModel(postings, doc_len, doc_ids, mu, lam, use_numpy=False)
+    print(f"statistiques de collection : {(time.perf_counter() - t0) * 1000 / len(models):.0f} ms par modèle")
+
+    def timed(fn):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for terms in queries:
+                ri.top_k_with_padding(fn(terms), doc_ids, k)
+        return (time.perf_counter() - t0) / (repeat * len(queries))
+
+    print(f"{'scorer':<22} {'ms/requête':>11} {'requêtes/s':>11}")
+    rows = [("bm25", lambda terms: ri.score_query_bm25(postings, df, doc_len, N, terms, avdl=avdl)[0])]
+    for method in LM_METHODS:
+        for name, model in models.items():
+            rows.append((f"{method} ({name})", lambda terms, m=model, meth=method: m.score(terms, meth, k)))
+    for label, fn in rows:
+        sec = timed(fn)
+        print(f"{label:<22} {sec * 1000:>11.2f} {1 / sec if sec else 0:>11.1f}")
+    if "numpy" in models:
+        for method in LM_METHODS:
+            err = max(max(abs(a - b) for a, b in zip(models["numpy"].dense_scores(terms, method).tolist(),
+                                                       models["python"].dense_scores(terms, method)))
+                      for terms in queries)
+            print(f"{method} : écart max numpy / python {err:.2e}")
+
+
+def main():
+    import main as ri
+    from stemmers import get_stemmer
+
+    ap = argparse.ArgumentParser(description="Modèles de langue Dirichlet / Jelinek-Mercer : débit contre BM25.")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--mu", type=float, default=LM_MU)
+    ap.add_argument("--lam", type=float, default=LM_LAMBDA)
+    ap.add_argument("-k", type=int, default=ri.TOP_K)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    stop_name, stem_name = args.config.split(":")
+    key, postings, df, doc_len, doc_ids, stem_cache = ri.load_config_index(stop_name, stem_name)
+    stopset = ri.load_stopwords(ri.STOPFILE) if stop_name != "nostop" else set()
+    stemmer = get_stemmer(stem_name)
+    queries = [ri.preprocess_tokens(ri.tokenizer(q), stopset, stemmer, stem_cache) for q in ri.QUERIES.values()]
+    benchmark(postings, df, doc_len, doc_ids, queries, args.mu, args.lam, args.k, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Générateur de charge local pour server.py : N connexions keep-alive envoient
+en boucle les requêtes de test (QUERIES de main.py) et mesurent la latence.
+
+    python loadgen.py --port 8765 --concurrency 8 --requests 2000 --method bm25 --k 1500 [--workers-stats]
+"""
+import json
+import time
+import asyncio
+import argparse
+from urllib.parse import quote_plus
+
+QUERIES = [
+    "olive oil health benefit",
+    "notting hill film actors",
+    "probabilistic models in information retrieval",
+    "web link network analysis",
+    "web ranking scoring algorithm",
+    "supervised machine learning algorithm",
+    "operating system mutual exclusion",
+]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+async def _get(reader, writer, host, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("ascii"))
+    await writer.drain()
+    status = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    body = await reader.readexactly(length)
+    return status, body
+
+
+async def _client(host, port, paths, counter, n_requests, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            i = counter[0]
+            if i >= n_requests:
+                break
+            counter[0] += 1
+            t0 = time.perf_counter()
+            status, _ = await _get(reader, writer, host, paths[i % len(paths)])
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if b" 200 " not in status:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, paths, concurrency, n_requests):
+    latencies, errors, counter = [], [], [0]
+    t0 = time.perf_counter()
+    await asyncio.gather(*[_client(host, port, paths, counter, n_requests, latencies, errors)
+                           for _ in range(concurrency)])
+    return sorted(latencies), errors, time.perf_counter() - t0
+
+
+async def fetch(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await _get(reader, writer, host, path))[1]
+    finally:
+        writer.close()
+
+
+def build_paths(method, k, config=None, queries=QUERIES):
+    extra = f"&config={quote_plus(config)}" if config else ""
+    return [f"/search?q={quote_plus(q)}&method={method}&k={k}{extra}" for q in queries]
+
+
+def print_report(latencies, errors, elapsed, concurrency):
+    n = len(latencies)
+    print(f"requêtes={n}  erreurs={len(errors)}  concurrence={concurrency}  durée={elapsed:.2f}s  QPS={n / elapsed:.1f}")
+    print(f"latence ms : p50={percentile(latencies, 50):.2f}  p90={percentile(latencies, 90):.2f}  "
+          f"p99={percentile(latencies, 99):.2f}  max={latencies[-1] if latencies else 0.0:.2f}")
+
+
+async def sample_workers(host, port, n_samples):
+    """Interroge /stats sur des connexions neuves pour voir chaque worker (pid -> stats)."""
+    workers = {}
+    for _ in range(n_samples):
+        st = json.loads(await fetch(host, port, "/stats"))
+        workers[st["pid"]] = st
+    return workers
+
+
+def print_workers(workers):
+    total = {}
+    for pid, st in sorted(workers.items()):
+        mem = st.get("memory_kb", {})
+        for k, v in mem.items():
+            total[k] = total.get(k, 0) + v
+        print(f"  worker {pid}: requêtes={st['queries']}  "
+              + "  ".join(f"{k}={v / 1024:.1f}Mo" for k, v in mem.items()))
+    print(f"  total ({len(workers)} workers vus) : " + "  ".join(f"{k}={v / 1024:.1f}Mo" for k, v in total.items()))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Générateur de charge pour server.py")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--method", default="bm25")
+    ap.add_argument("-k", type=int, default=1500)
+    ap.add_argument("--config", default=None, help="Configuration stop:stem (défaut : celle du serveur).")
+    ap.add_argument("--workers-stats", type=int, default=0, metavar="N",
+                    help="Après la charge, échantillonne N fois /stats (RSS / requêtes par worker).")
+    args = ap.parse_args()
+
+    paths = build_paths(args.method, args.k, args.config)
+    latencies, errors, elapsed = asyncio.run(run_load(args.host, args.port, paths, args.concurrency, args.requests))
+    print_report(latencies, errors, elapsed, args.concurrency)
+    if args.workers_stats:
+        print_workers(asyncio.run(sample_workers(args.host, args.port, args.workers_stats)))
+
+
+if __name__ == "__main__":
+    main()
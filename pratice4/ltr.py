@@ -0,0 +1,212 @@
+"""
+Extraction de traits pour l'apprentissage d'ordonnancement (learning to rank),
+en une seule passe sur les postings de chaque terme de requête.
+
+Pour une requête (termes uniques t_1..t_T), chaque liste de postings est
+parcourue une fois pour remplir la matrice tf (candidats × T) ; les
+candidats sont les documents contenant au moins un terme. Tous les traits
+sont ensuite des opérations NumPy sur cette matrice :
+  ltn, ltc (normes des documents de compute_ltc_weights), BM25 pour chaque
+  (k1, b) de BM25_GRID, longueur du document, nombre de termes de la requête
+  présents, somme des idf des termes présents, longueur de la requête.
+On garde les n premiers candidats selon BM25 (k1, b par défaut). Sortie au
+format SVMlight / LETOR : "label qid:Q 1:v1 2:v2 ... # docid".
+
+    python ltr.py --config stop671:porter [--topics topics.xml] [--qrels qrels.txt] [-n 1500] --out features.txt
+"""
+import time
+import math
+import argparse
+from collections import Counter
+
+import numpy as np
+
+import main as ri
+from index_cache import cached_weights
+
+BM25_GRID = [(ri.BM25_K1, ri.BM25_B), (0.9, 0.4), (2.0, 0.75), (1.2, 0.3)]
+FEATURES = (["ltn", "ltc"] + [f"bm25_k{k1:g}_b{b:g}" for k1, b in BM25_GRID]
+            + ["doc_len", "q_terms_matched", "idf_sum", "q_len"])
+
+
+def term_matrix(postings, dnum, terms):
+    """
+    Un parcours de la liste de chaque terme unique de la requête.
+    Retour : numéros des candidats (triés), matrice tf (candidats × termes uniques), termes uniques.
+    """
+    uniq = [t for t in dict.fromkeys(terms) if t in postings]
+    cols = []
+    for t in uniq:
+        plist = postings[t]
+        docs = np.fromiter((dnum[d] for d in plist), dtype=np.int64, count=len(plist))
+        tfs = np.fromiter(plist.values(), dtype=np.float64, count=len(plist))
+        cols.append((docs, tfs))
+    if not cols:
+        return np.empty(0, dtype=np.int64), np.empty((0, 0)), uniq
+    cand = np.unique(np.concatenate([docs for docs, _ in cols]))
+    tf = np.zeros((len(cand), len(uniq)))
+    for j, (docs, tfs) in enumerate(cols):
+        tf[np.searchsorted(cand, docs), j] = tfs
+    return cand, tf, uniq
+
+
+class FeatureExtractor:
+    """Traits (paires requête × document) sur un searcher.LoadedIndex en mémoire."""
+
+    def __init__(self, index):
+        self.index = index
+        self.dnum = {d: i for i, d in enumerate(index.doc_ids)}
+        self.doc_len = np.array([index.doc_len.get(d, 0) for d in index.doc_ids], dtype=np.float64)
+        norm_sq = cached_weights(index.key, "ltc", lambda: ri.compute_ltc_weights(
+            index.postings, index.df, index.N))[1]
+        self.norm = np.sqrt(np.array([norm_sq.get(d, 1.0) for d in index.doc_ids], dtype=np.float64))
+        self.norm[self.norm == 0] = 1.0
+
+    def term_matrix(self, terms):
+        return term_matrix(self.index.postings, self.dnum, terms)
+
+    def features(self, terms, n=ri.TOP_K):
+        """Retour : numéros des n premiers candidats (BM25 décroissant), matrice (n × len(FEATURES))."""
+        cand, tf, uniq = self.term_matrix(terms)
+        if not len(cand):
+            return cand, np.empty((0, len(FEATURES)))
+        N = self.index.N
+        df = np.array([self.index.df.get(t, 0) for t in uniq], dtype=np.float64)
+        q_tf = Counter(terms)
+        wq = np.array([1.0 + math.log10(q_tf[t]) for t in uniq])
+        present = tf > 0
+        log_tf = np.where(present, 1.0 + np.log10(np.where(present, tf, 1.0)), 0.0)
+        idf_ltn = np.log10(N / df)
+        w_ltn = log_tf * idf_ltn
+        dl = self.doc_len[cand][:, None]
+        avdl = self.index.avdl
+
+        out = np.empty((len(cand), len(FEATURES)))
+        out[:, 0] = (w_ltn * np.where(idf_ltn > 0, 1.0, 0.0)) @ wq
+        out[:, 1] = (w_ltn / self.norm[cand][:, None]) @ wq
+        idf_bm25 = np.array([ri.bm25_idf(int(x), N) for x in df])
+        for i, (k1, b) in enumerate(BM25_GRID):
+            denom = tf + k1 * ((1.0 - b) + b * dl / avdl)
+            out[:, 2 + i] = (tf * (k1 + 1.0) / denom) @ idf_bm25
+        base = 2 + len(BM25_GRID)
+        out[:, base] = dl[:, 0]
+        out[:, base + 1] = present.sum(axis=1)
+        out[:, base + 2] = present @ idf_ltn
+        out[:, base + 3] = len(terms)
+
+        if n < len(cand):
+            keep = np.argpartition(-out[:, 2], n - 1)[:n]
+            keep = keep[np.argsort(-out[keep, 2], kind="stable")]
+        else:
+            keep = np.argsort(-out[:, 2], kind="stable")
+        return cand[keep], out[keep]
+
+
+def extract_all(extractor, queries, n=ri.TOP_K):
+    """
+    queries : itérable (qid, texte). Retour : qids (par ligne), numéros de docs,
+    matrice de traits, tranches de lignes (une par requête, dans l'ordre de queries).
+    """
+    qids, docs, blocks, rows = [], [], [], []
+    for qid, text in queries:
+        cand, X = extractor.features(extractor.index.query_terms(text), n)
+        rows.append(slice(len(qids), len(qids) + len(cand)))
+        qids.extend([qid] * len(cand))
+        docs.append(cand)
+        blocks.append(X)
+    if not blocks:
+        return qids, np.empty(0, dtype=np.int64), np.empty((0, len(FEATURES))), rows
+    return qids, np.concatenate(docs), np.vstack(blocks), rows
+
+
+# ---------------------------
+# SVMlight / LETOR
+# ---------------------------
+def load_qrels(path):
+    """qrels TREC / INEX ("qid 0 docid rel") -> {(qid, docid): rel}."""
+    qrels = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 4:
+                qrels[(parts[0], parts[2])] = int(float(parts[3]))
+    return qrels
+
+
+def write_svmlight(path, qids, docids, X, qrels=None):
+    qrels = qrels or {}
+    fmt = " ".join(f"{i}:%.6g" for i in range(1, X.shape[1] + 1))
+    with open(path, "w", encoding="utf-8") as f:
+        lines = []
+        for qid, d, row in zip(qids, docids, X.tolist()):
+            lines.append(f"{qrels.get((qid, d), 0)} qid:{qid} {fmt % tuple(row)} # {d}\n")
+            if len(lines) >= 10000:
+                f.write("".join(lines))
+                lines = []
+        f.write("".join(lines))
+    return len(qids)
+
+
+# ---------------------------
+# Vérification / mesure contre les score_query_*
+# ---------------------------
+def reference_features(index, terms, docids):
+    """Colonnes ltn, ltc et BM25 par appels séparés aux scorers (un parcours des postings par trait)."""
+    cols = [ri.score_query_ltn(index.weights["ltn"], terms), ri.score_query_ltc(index.weights["ltc"], terms)]
+    for k1, b in BM25_GRID:
+        cols.append(index.score(terms, "bm25", k1, b))
+    return np.array([[c.get(d, 0.0) for c in cols] for d in docids])
+
+
+def benchmark(extractor, queries, n):
+    index = extractor.index
+    t0 = time.perf_counter()
+    qids, docs, X, rows = extract_all(extractor, queries, n)
+    ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    err = 0.0
+    for (qid, text), r in zip(queries, rows):
+        docids = [index.doc_ids[j] for j in docs[r]]
+        ref = reference_features(index, index.query_terms(text), docids)
+        if docids:
+            err = max(err, float(np.abs(ref - X[r, :ref.shape[1]]).max()))
+    ms_ref = (time.perf_counter() - t0) * 1000
+    print(f"{len(qids):,} paires × {len(FEATURES)} traits : une passe {ms:.1f} ms "
+          f"({len(qids) / ms * 1000 if ms else 0:,.0f} paires/s) ; scorers séparés (ltn, ltc, "
+          f"{len(BM25_GRID)} × bm25) {ms_ref:.1f} ms ; écart max {err:.2e}")
+
+
+def main():
+    from searcher import LoadedIndex
+
+    ap = argparse.ArgumentParser(description="Traits LTR (ltn, ltc, BM25 k1/b, longueurs, idf) en une passe, sortie SVMlight.")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--topics", default=None, help="Fichier de topics (cf. batch.load_topics) ; défaut : QUERIES.")
+    ap.add_argument("--qrels", default=None, help="Jugements (qid 0 docid rel) pour les labels ; sinon 0.")
+    ap.add_argument("-n", type=int, default=ri.TOP_K, help="Candidats par requête (premiers selon BM25).")
+    ap.add_argument("--out", default=None, help="Fichier SVMlight de sortie.")
+    ap.add_argument("--bench", action="store_true", help="Compare aux appels séparés des score_query_*.")
+    args = ap.parse_args()
+
+    if args.topics:
+        from batch import load_topics
+        queries = load_topics(args.topics)
+    else:
+        queries = list(ri.QUERIES.items())
+    t0 = time.perf_counter()
+    extractor = FeatureExtractor(LoadedIndex(*args.config.split(":")))
+    print(f"Index {args.config} chargé en {time.perf_counter() - t0:.2f}s ; traits : {', '.join(FEATURES)}")
+    if args.bench:
+        benchmark(extractor, queries, args.n)
+    if args.out:
+        t0 = time.perf_counter()
+        qids, docs, X, _ = extract_all(extractor, queries, args.n)
+        t1 = time.perf_counter()
+        docids = [extractor.index.doc_ids[j] for j in docs]
+        write_svmlight(args.out, qids, docids, X, load_qrels(args.qrels) if args.qrels else None)
+        print(f"{args.out} : {len(qids):,} paires ({len(queries)} requêtes) ; "
+              f"extraction {t1 - t0:.2f}s, écriture {time.perf_counter() - t1:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,12 @@ import os
 import re
 import time
 import math
-import zipfile
+from array import array
 from collections import defaultdict, Counter
 
-# Essayez d'importer NLTK PorterStemmer ; si absent on propose DummyStemmer
-try:
-    from nltk.stem import PorterStemmer
-except Exception:
-    PorterStemmer = None
+from stemmers import get_stemmer
+from index_cache import index_key, cached_index, cached_weights, get_cache
+from runio import format_run_block, write_run_binary
 
 
 # ---------------------------
@@ -38,8 +36,28 @@ TOP_K = 1500
 BM25_K1 = 1.2
 BM25_B = 0.75
 
+# Stemmers utilisés pour la grille de runs (cf. stemmers.STEMMERS : nostem, porter, sstem, light)
+STEM_NAMES = ["nostem", "porter"]
+
 TOKEN_RE = re.compile(r"[a-z]+")  # tokenizer strict (minuscule)
 
+# Réutilise les index / poids déjà construits pour les mêmes entrées (cf. index_cache)
+USE_CACHE = True
+
+# Écrit aussi chaque run au format binaire compact (.bin, cf. runio) pour l'analyse / la fusion
+WRITE_BINARY_RUNS = False
+
+# Ajoute à la grille les runs modèles de langue (Dirichlet, Jelinek-Mercer ; cf. lm.py)
+WITH_LM_RUNS = False
+
+# Artefacts (optionnels) construits dans la même passe que l'index tf (cf. build_index_extras),
+# p. ex. ("positions", "forward") ; par défaut index tf seul : phrases / proximité / PRF les
+# demandent via load_config_artifact (une passe de plus, une seule fois grâce au cache)
+INDEX_EXTRAS = ()
+
+# Process de la grille de runs (cf. grid.py) ; 1 (ou pas de fork, ou USE_CACHE = False) : boucle séquentielle
+WORKERS = os.cpu_count() or 1
+
 
 # ---------------------------
 # Utilitaires
@@ -89,7 +107,10 @@ def tokenizer(text):
 
 
 def preprocess_tokens(tokens, stopset, stemmer, stem_cache):
-    """Supprime stopwords et applique le stemming via stemmer (utilise cache)."""
+    """
+    Supprime stopwords et applique le stemming via stemmer (utilise cache).
+    stemmer : None ou tout objet ayant .stem(token) (cf. stemmers.get_stemmer).
+    """
     out = []
     for t in tokens:
         if t in stopset:
@@ -137,6 +158,61 @@ def build_index(docs, stopset, stemmer):
     return postings, df, doc_len, doc_ids, stem_cache
 
 
+def build_index_extras(docs, stopset, stemmer, extras=()):
+    """
+    Comme build_index, plus, dans la même passe sur la collection, les artefacts
+    nommés dans extras :
+    - "positions" : term -> {docid: positions en varint} (cf. positional.py)
+    - "forward" : index direct doc -> (term_ids, tfs), feedback.ForwardIndex
+    Retour : postings, df, doc_len, doc_ids, stem_cache, {nom: artefact}
+    """
+    with_pos = "positions" in extras
+    with_fwd = "forward" in extras
+    if with_pos:
+        from positional import positioned_terms, encode_positions
+    stem_cache = {}
+    postings = defaultdict(dict)
+    positions = defaultdict(dict)
+    df = defaultdict(int)
+    doc_len = {}
+    doc_ids = []
+    vocab = {}
+    offsets, term_ids, tfs = array("I", [0]), array("I"), array("I")
+
+    for docid, content in docs:
+        doc_ids.append(docid)
+        if with_pos:
+            # positions prises AVANT suppression des stop-words ; mêmes termes que preprocess_tokens
+            per_term = defaultdict(list)
+            n_terms = 0
+            for p, term in positioned_terms(content, stopset, stemmer, stem_cache):
+                per_term[term].append(p)
+                n_terms += 1
+            doc_len[docid] = n_terms
+            tf_items = [(term, len(plist)) for term, plist in per_term.items()]
+        else:
+            terms = preprocess_tokens(tokenizer(content), stopset, stemmer, stem_cache)
+            doc_len[docid] = len(terms)
+            tf_items = Counter(terms).items()
+        for term, tf in tf_items:
+            postings[term][docid] = tf
+            df[term] += 1
+            if with_pos:
+                positions[term][docid] = encode_positions(per_term[term])
+            if with_fwd:
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                tfs.append(tf)
+        offsets.append(len(term_ids))
+
+    artifacts = {}
+    if with_pos:
+        artifacts["positions"] = dict(positions)
+    if with_fwd:
+        from feedback import ForwardIndex
+        artifacts["forward"] = ForwardIndex(list(vocab), offsets, term_ids, tfs)
+    return postings, df, doc_len, doc_ids, stem_cache, artifacts
+
+
 # ---------------------------
 # LTN : calcul des poids et scoring
 # ---------------------------
@@ -239,27 +315,31 @@ def score_query_ltc(weighted_postings, query_terms):
 # ---------------------------
 # BM25
 # ---------------------------
-def score_query_bm25(postings, df, doc_len, N, query_terms, k1=BM25_K1, b=BM25_B):
+def bm25_idf(df_t, N):
+    """idf BM25 : log((N-df+0.5)/(df+0.5)) (0 si df nul)."""
+    if df_t > 0:
+        return math.log((N - df_t + 0.5) / (df_t + 0.5) + 1e-12)  # small eps
+    return 0.0
+
+
+def score_query_bm25(postings, df, doc_len, N, query_terms, k1=BM25_K1, b=BM25_B, avdl=None):
     """
     Standard BM25 scoring (idf using log((N-df+0.5)/(df+0.5))).
+    idf calculé pour les seuls termes de la requête ; avdl peut être fourni
+    (précalculé une fois par index) pour éviter de resommer doc_len.
     Returns dict(docid -> score), avdl
     """
     if len(doc_len) == 0:
         return {}, 0.0
-    avdl = sum(doc_len.values()) / len(doc_len)
-    idf = {}
-    for t, df_t in df.items():
-        if df_t > 0:
-            idf[t] = math.log((N - df_t + 0.5) / (df_t + 0.5) + 1e-12)  # small eps
-        else:
-            idf[t] = 0.0
+    if avdl is None:
+        avdl = sum(doc_len.values()) / len(doc_len)
 
     scores = defaultdict(float)
     q_terms_set = set(query_terms)
     for t in q_terms_set:
         if t not in postings:
             continue
-        idf_t = idf.get(t, 0.0)
+        idf_t = bm25_idf(df.get(t, 0), N)
         for d, tf in postings[t].items():
             dl = doc_len.get(d, avdl)
             denom = tf + k1 * ((1.0 - b) + b * (dl / avdl))
@@ -268,6 +348,76 @@ def score_query_bm25(postings, df, doc_len, N, query_terms, k1=BM25_K1, b=BM25_B
     return scores, avdl
 
 
+def compute_bm25_weights(postings, df, doc_len, N, k1=BM25_K1, b=BM25_B):
+    """
+    Contribution BM25 de chaque posting : term -> {docid: idf_t * tf_adj}
+    (même calcul que score_query_bm25). Retour : weighted, avdl
+    """
+    if len(doc_len) == 0:
+        return {}, 0.0
+    avdl = sum(doc_len.values()) / len(doc_len)
+    weighted = {}
+    for t, plist in postings.items():
+        idf_t = bm25_idf(df.get(t, 0), N)
+        wmap = {}
+        for d, tf in plist.items():
+            denom = tf + k1 * ((1.0 - b) + b * (doc_len.get(d, avdl) / avdl))
+            wmap[d] = idf_t * (tf * (k1 + 1.0)) / denom
+        weighted[t] = wmap
+    return weighted, avdl
+
+
+# ---------------------------
+# Index d'une configuration (stop × stem), via le cache d'artefacts
+# ---------------------------
+def config_key(stop_name, stem_name):
+    """Clé de cache de la configuration (stop_name in {'nostop','stop671'}, stem_name cf. STEMMERS)."""
+    stop_path = STOPFILE if stop_name != "nostop" else None
+    stemmer = get_stemmer(stem_name)
+    return index_key(DATAFILE, stop_path, stem_name if stemmer else "nostem", TOKEN_RE.pattern)
+
+
+def _build_config(stop_name, stem_name, key, get_docs, extras):
+    """Une passe sur la collection : index tf + artefacts de extras (ceux-ci mis en cache ici)."""
+    stopset = load_stopwords(STOPFILE) if stop_name != "nostop" else set()
+    stemmer = get_stemmer(stem_name)
+    docs = get_docs() if get_docs else load_collection(DATAFILE)
+    postings, df, doc_len, doc_ids, stem_cache, artifacts = build_index_extras(docs, stopset, stemmer, extras)
+    cache = get_cache()
+    for name, obj in artifacts.items():
+        cache.put(key, name, obj)
+    return (postings, df, doc_len, doc_ids, stem_cache), artifacts
+
+
+def load_config_index(stop_name, stem_name, get_docs=None):
+    """
+    Index d'une configuration : lu depuis le cache, sinon construit (sur
+    get_docs() si fourni, sinon sur la collection relue) puis mis en cache,
+    avec les artefacts INDEX_EXTRAS de la même passe.
+    Retour : key, postings, df, doc_len, doc_ids, stem_cache
+    """
+    key = config_key(stop_name, stem_name)
+    postings, df, doc_len, doc_ids, stem_cache = cached_index(
+        key, lambda: _build_config(stop_name, stem_name, key, get_docs, INDEX_EXTRAS)[0])
+    return key, postings, df, doc_len, doc_ids, stem_cache
+
+
+def load_config_artifact(stop_name, stem_name, name, get_docs=None):
+    """
+    Artefact construit avec l'index tf ("positions"...) d'une configuration,
+    via le cache. Absent (index construit sans lui, ou évincé) : une passe
+    reconstruit l'index tf, cet artefact et ceux de INDEX_EXTRAS.
+    """
+    key = config_key(stop_name, stem_name)
+    obj = get_cache().get(key, name)
+    if obj is None:
+        extras = tuple(dict.fromkeys(INDEX_EXTRAS + (name,)))
+        index, artifacts = _build_config(stop_name, stem_name, key, get_docs, extras)
+        cached_index(key, lambda: index)
+        obj = artifacts[name]
+    return obj
+
+
 # ---------------------------
 # Helper pour top-k + padding
 # ---------------------------
@@ -294,22 +444,26 @@ def top_k_with_padding(scores_dict, all_doc_ids, k=TOP_K):
 # Run generation (single combo)
 # ---------------------------
 def generate_one_run(run_name, method, postings, df, doc_len, doc_ids, N, queries,
-                     stopset, stemmer, stem_cache, out_dir):
+                     stopset, stemmer, stem_cache, out_dir, weighted=None, lm_model=None):
     """
-    method in {'ltn','ltc','bm25'}
+    method in {'ltn','ltc','bm25','dirichlet','jm'}
+    weighted : poids ltn/ltc déjà calculés (ex. issus du cache), sinon calculés ici
+    lm_model : lm.LanguageModel de l'index (statistiques de collection), sinon calculé ici
     """
     ensure_dir(out_dir)
     run_path = os.path.join(out_dir, f"{TEAM}_{run_name}_{method}.txt")
     # Precompute weights if needed
-    weighted = None
-    extra = {}
-    if method == "ltn":
+    if weighted is None and method == "ltn":
         weighted, _ = compute_ltn_weights(postings, df, N)
-    elif method == "ltc":
+    elif weighted is None and method == "ltc":
         weighted, _ = compute_ltc_weights(postings, df, N)
+    elif lm_model is None and method in ("dirichlet", "jm"):
+        from lm import LanguageModel
+        lm_model = LanguageModel(postings, doc_len, doc_ids)
     # bm25 doesn't need pre-weight
 
     lines_written = 0
+    binary_run = []
     with open(run_path, "w", encoding="utf-8") as f:
         for qid, qtext in queries.items():
             q_tokens_raw = tokenizer(qtext)
@@ -322,6 +476,8 @@ def generate_one_run(run_name, method, postings, df, doc_len, doc_ids, N, querie
                     scores = score_query_ltc(weighted, q_terms)
                 elif method == "bm25":
                     scores, _ = score_query_bm25(postings, df, doc_len, N, q_terms)
+                elif method in ("dirichlet", "jm"):
+                    scores = lm_model.score(q_terms, method, TOP_K)
                 else:
                     scores = {}
             except Exception as e:
@@ -329,9 +485,14 @@ def generate_one_run(run_name, method, postings, df, doc_len, doc_ids, N, querie
                 scores = {}
 
             topk = top_k_with_padding(scores, doc_ids, TOP_K)
-            for rank, (docid, score) in enumerate(topk, start=1):
-                f.write(f"{qid} Q0 {docid} {rank} {score:.5f} {TEAM} /article[1]\n")
-                lines_written += 1
+            # top-k formaté en bloc : un seul write par requête
+            f.write(format_run_block(qid, topk, TEAM))
+            lines_written += len(topk)
+            if WRITE_BINARY_RUNS:
+                binary_run.append((qid, topk))
+
+    if WRITE_BINARY_RUNS:
+        write_run_binary(os.path.splitext(run_path)[0] + ".bin", binary_run)
 
     expected = len(queries) * TOP_K
     return run_path, lines_written, expected
@@ -340,24 +501,47 @@ def generate_one_run(run_name, method, postings, df, doc_len, doc_ids, N, querie
 # ---------------------------
 # Main: génération des 12 runs
 # ---------------------------
+def grid_methods():
+    return ["ltn", "ltc", "bm25"] + (["dirichlet", "jm"] if WITH_LM_RUNS else [])
+
+
 def main():
     print("=== Génération des 12 runs (nostop/stop × nostem/porter × ltn/ltc/bm25) ===")
     # Vérifications
     if not os.path.exists(DATAFILE):
         print(f"[ERROR] Collection manquante : {DATAFILE}")
         return
-    # load collection once
-    print("Lecture de la collection (une seule fois)...")
-    docs = load_collection(DATAFILE)
-    print(f"Documents chargés : {len(docs)}")
+    methods = grid_methods()
+
+    import multiprocessing
+
+    if WORKERS > 1 and USE_CACHE and "fork" in multiprocessing.get_all_start_methods():
+        # index en cache, runs sur un pool forké (les index sont partagés, pas picklés)
+        import grid
+
+        done, t_index, t_runs, zip_path = grid.run_grid(WORKERS, STEM_NAMES, methods)
+        for path, elapsed in done:
+            print(f"   -> {os.path.basename(path)}  time scoring: {elapsed:.2f}s")
+        print(f"\nIndex : {t_index:.2f}s   runs : {t_runs:.2f}s ({WORKERS} workers)")
+        print(f"ZIP généré : {zip_path}")
+        print("Terminé.")
+        return
+
+    # load collection once (et seulement si un index doit être construit)
+    docs = []
+
+    def get_docs():
+        if not docs:
+            print("Lecture de la collection (une seule fois)...")
+            docs.extend(load_collection(DATAFILE))
+            print(f"Documents chargés : {len(docs)}")
+        return docs
 
     # load stopwords set
     stop_full = load_stopwords(STOPFILE)
 
     stop_options = [("nostop", set()), ("stop671", stop_full)]
-    stem_options = [("nostem", None), ("porter", PorterStemmer() if PorterStemmer else None)]
-
-    methods = ["ltn", "ltc", "bm25"]
+    stem_options = [(name, get_stemmer(name)) for name in STEM_NAMES]
 
     ensure_dir(OUTPUT_DIR)
     run_paths = []
@@ -365,23 +549,34 @@ def main():
     run_id = 1
     for stop_name, stopset in stop_options:
         for stem_name, stemmer in stem_options:
-            # create stem_cache (shared per combination)
-            stem_cache = {}
             # build index once for this (stop, stem) combo
             print(f"\n--- Construction index (stop={stop_name}, stem={stem_name}) ---")
             t0 = time.time()
-            postings, df, doc_len, doc_ids, stem_cache = build_index(docs, stopset, stemmer)
+            key = None
+            if USE_CACHE:
+                key, postings, df, doc_len, doc_ids, stem_cache = load_config_index(stop_name, stem_name, get_docs)
+            else:
+                postings, df, doc_len, doc_ids, stem_cache = build_index(get_docs(), stopset, stemmer)
             N = len(doc_ids)
             t_index = time.time() - t0
             print(f"Index construit: terms={len(df):,}, docs={N:,} (temps {t_index:.2f}s)")
 
+            lm_model = None  # statistiques de collection, partagées par dirichlet et jm
             for method in methods:
                 run_name = f"{run_id}_{method}_article_{stop_name}_{stem_name}"
                 print(f"→ Génération run {run_name} ...")
                 t0 = time.time()
+                weighted = None
+                if key and method == "ltn":
+                    weighted, _ = cached_weights(key, method, lambda: compute_ltn_weights(postings, df, N))
+                elif key and method == "ltc":
+                    weighted, _ = cached_weights(key, method, lambda: compute_ltc_weights(postings, df, N))
+                elif method in ("dirichlet", "jm") and lm_model is None:
+                    from lm import LanguageModel
+                    lm_model = LanguageModel(postings, doc_len, doc_ids)
                 path, written, expected = generate_one_run(
                     run_name, method, postings, df, doc_len, doc_ids, N,
-                    QUERIES, stopset, stemmer, stem_cache, OUTPUT_DIR
+                    QUERIES, stopset, stemmer, stem_cache, OUTPUT_DIR, weighted, lm_model
                 )
                 elapsed = time.time() - t0
                 run_paths.append(path)
@@ -389,7 +584,9 @@ def main():
                 print(f"   -> {os.path.basename(path)}  (lignes {written}/{expected})  time scoring: {elapsed:.2f}s  {ok}")
                 run_id += 1
 
-    # pack zip
+    # pack zip (import différé : inutile pour qui importe seulement les scorers)
+    import zipfile
+
     zipname = f"{TEAM}_ALL_RUNS.zip"
     zip_path = os.path.join(OUTPUT_DIR, zipname)
     with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
@@ -0,0 +1,283 @@
+"""
+Index positionnel (optionnel) : pour chaque (terme, doc), les positions du
+terme, en écarts compressés varint (cf. disk_index). Optionnel : artefact
+"positions" de main.build_index_extras, construit à la première demande (ou
+avec l'index tf s'il figure dans main.INDEX_EXTRAS) et mis en cache à côté de
+l'index.
+
+Position = rang du token dans le texte AVANT suppression des stop-words : la
+requête "models in information retrieval" garde l'écart entre "model" et
+"inform", et "mutual exclusion" reste une paire adjacente.
+
+  - phrase_docs : documents contenant une phrase (intersection par df
+    croissant, puis intersection des listes de positions décalées) ;
+  - score_query_bm25_prox : BM25 + bonus de proximité des paires de termes
+    (Rasolofo & Savoy, 2003) ;
+  - score_query_phrase : BM25 restreint aux docs contenant les "phrases".
+
+    python positional.py --config stop671:porter [--phrase "mutual exclusion"] [--repeat 20]
+"""
+import re
+import sys
+import time
+import heapq
+import argparse
+from bisect import bisect_left, bisect_right
+
+import main as ri
+from stemmers import get_stemmer, index_size_bytes
+from disk_index import encode_varints, decode_varints
+
+PROX_WINDOW = 5  # distance max (en tokens) entre deux termes pour le bonus de proximité
+
+PHRASE_RE = re.compile(r'"([^"]+)"')
+
+
+# ---------------------------
+# Construction
+# ---------------------------
+def positioned_terms(text, stopset, stemmer, stem_cache):
+    """Liste (position, terme) ; mêmes termes (et même ordre) que preprocess_tokens."""
+    out = []
+    for i, tok in enumerate(ri.tokenizer(text)):
+        if tok in stopset:
+            continue
+        if stemmer is None:
+            out.append((i, tok))
+            continue
+        s = stem_cache.get(tok)
+        if s is None:
+            s = stemmer.stem(tok)
+            stem_cache[tok] = s
+        out.append((i, s))
+    return out
+
+
+def encode_positions(plist):
+    """Positions croissantes -> bytes (écarts en varint)."""
+    out = bytearray()
+    prev = 0
+    gaps = []
+    for p in plist:
+        gaps.append(p - prev)
+        prev = p
+    encode_varints(gaps, out)
+    return bytes(out)
+
+
+def decode_positions(blob):
+    out = decode_varints(blob)
+    for i in range(1, len(out)):
+        out[i] += out[i - 1]
+    return out
+
+
+def build_positional_index(docs, stopset, stemmer):
+    """
+    Comme main.build_index, en une passe, plus positions : term -> {docid: bytes}.
+    Retour : postings, df, doc_len, doc_ids, stem_cache, positions
+    """
+    *index, artifacts = ri.build_index_extras(docs, stopset, stemmer, ("positions",))
+    return (*index, artifacts["positions"])
+
+
+def load_positions(stop_name, stem_name, get_docs=None):
+    """Positions d'une configuration via le cache (construites avec l'index tf, cf. main.load_config_artifact)."""
+    return ri.load_config_artifact(stop_name, stem_name, "positions", get_docs)
+
+
+# ---------------------------
+# Phrases
+# ---------------------------
+def _intersect_sorted(a, b):
+    """Intersection de deux listes triées (fusion, saut par dichotomie quand l'une est bien plus courte)."""
+    if len(a) > len(b):
+        a, b = b, a
+    out = []
+    if len(a) * 8 < len(b):
+        lo = 0
+        for x in a:
+            lo = bisect_left(b, x, lo)
+            if lo == len(b):
+                break
+            if b[lo] == x:
+                out.append(x)
+        return out
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            i += 1
+        elif a[i] > b[j]:
+            j += 1
+        else:
+            out.append(a[i])
+            i += 1
+            j += 1
+    return out
+
+
+def candidate_docs(postings, df, terms):
+    """Docs contenant tous les termes : parcours de la plus courte liste, tests d'appartenance par df croissant."""
+    terms = sorted(set(terms), key=lambda t: df.get(t, 0))
+    if not terms or any(t not in postings for t in terms):
+        return []
+    rest = [postings[t] for t in terms[1:]]
+    return [d for d in postings[terms[0]] if all(d in p for p in rest)]
+
+
+def phrase_docs(positions, df, phrase):
+    """
+    phrase : liste (position, terme) (cf. positioned_terms sur le texte de la phrase).
+    Renvoie {docid: nombre d'occurrences de la phrase}.
+    """
+    if not phrase:
+        return {}
+    base = phrase[0][0]
+    offsets = sorted(((p - base, t) for p, t in phrase), key=lambda x: df.get(x[1], 0))
+    out = {}
+    for d in candidate_docs(positions, df, [t for _, t in offsets]):
+        starts = None
+        for off, t in offsets:
+            shifted = [p - off for p in decode_positions(positions[t][d])]
+            starts = shifted if starts is None else _intersect_sorted(starts, shifted)
+            if not starts:
+                break
+        if starts:
+            out[d] = len(starts)
+    return out
+
+
+def parse_query(text):
+    """Renvoie (phrases entre guillemets, texte complet sans guillemets)."""
+    return PHRASE_RE.findall(text), text.replace('"', " ")
+
+
+def score_query_phrase(postings, positions, df, doc_len, N, text, stopset, stemmer, stem_cache,
+                       k1=ri.BM25_K1, b=ri.BM25_B, avdl=None):
+    """BM25 sur tous les termes, restreint aux docs contenant chaque phrase entre guillemets."""
+    phrases, flat = parse_query(text)
+    terms = ri.preprocess_tokens(ri.tokenizer(flat), stopset, stemmer, stem_cache)
+    scores, avdl = ri.score_query_bm25(postings, df, doc_len, N, terms, k1, b, avdl)
+    for ph in phrases:
+        ph_terms = positioned_terms(ph, stopset, stemmer, stem_cache)
+        if not ph_terms:  # phrase faite de stop-words : pas de contrainte
+            continue
+        matched = phrase_docs(positions, df, ph_terms)
+        scores = {d: s for d, s in scores.items() if d in matched}
+    return scores, avdl
+
+
+# ---------------------------
+# BM25 + proximité
+# ---------------------------
+def pair_proximity(pa, pb, window=PROX_WINDOW):
+    """tpi(a, b) = somme des 1/dist² des couples d'occurrences à distance <= window."""
+    acc = 0.0
+    for p in pa:
+        lo = bisect_left(pb, p - window)
+        hi = bisect_right(pb, p + window, lo)
+        for q in pb[lo:hi]:
+            if q != p:
+                acc += 1.0 / ((q - p) * (q - p))
+    return acc
+
+
+def score_query_bm25_prox(postings, positions, df, doc_len, N, query_terms,
+                          k1=ri.BM25_K1, b=ri.BM25_B, avdl=None, window=PROX_WINDOW):
+    """
+    BM25 + sum_{paires (a, b)} min(w_a, w_b) * (k1+1)·tpi / (K + tpi),
+    K = k1·((1-b) + b·dl/avdl), w = idf BM25 (>= 0). Seuls les docs contenant
+    les deux termes d'une paire sont décodés.
+    Returns dict(docid -> score), avdl
+    """
+    scores, avdl = ri.score_query_bm25(postings, df, doc_len, N, query_terms, k1, b, avdl)
+    terms = [t for t in dict.fromkeys(query_terms) if t in positions]
+    idf = {t: max(0.0, ri.bm25_idf(df.get(t, 0), N)) for t in terms}
+    for i, ta in enumerate(terms):
+        for tb in terms[i + 1:]:
+            w = min(idf[ta], idf[tb])
+            if w <= 0.0:
+                continue
+            pos_a, pos_b = positions[ta], positions[tb]
+            for d in candidate_docs(positions, df, [ta, tb]):
+                tpi = pair_proximity(decode_positions(pos_a[d]), decode_positions(pos_b[d]), window)
+                if tpi > 0.0:
+                    K = k1 * ((1.0 - b) + b * (doc_len.get(d, avdl) / avdl))
+                    scores[d] += w * (k1 + 1.0) * tpi / (K + tpi)
+    return scores, avdl
+
+
+# ---------------------------
+# Benchmark : taille de l'index et latence
+# ---------------------------
+BENCH_PHRASES = ["notting hill", "mutual exclusion", "information retrieval",
+                 "machine learning", "olive oil", "operating system"]
+
+
+def positions_size(positions):
+    """(octets compressés, octets mémoire Python, nombre de positions)."""
+    packed = count = 0
+    mem = sys.getsizeof(positions)
+    for t, plist in positions.items():
+        mem += sys.getsizeof(t) + sys.getsizeof(plist)
+        for blob in plist.values():
+            packed += len(blob)
+            mem += sys.getsizeof(blob)
+            count += len(decode_varints(blob))
+    return packed, mem, count
+
+
+def _timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, (time.perf_counter() - t0) * 1000 / repeat
+
+
+def benchmark(postings, positions, df, doc_len, doc_ids, stopset, stemmer, stem_cache, phrases, repeat=10):
+    N = len(doc_ids)
+    avdl = sum(doc_len.values()) / N if N else 0.0
+    tf_bytes = index_size_bytes(postings)
+    packed, mem, count = positions_size(positions)
+    print(f"postings tf : {tf_bytes / 1e6:.1f} Mo   positions : {count:,} "
+          f"(brut uint32 {count * 4 / 1e6:.1f} Mo, varint {packed / 1e6:.1f} Mo = "
+          f"{packed / count if count else 0.0:.2f} o/position, en mémoire {mem / 1e6:.1f} Mo)")
+
+    print(f"\n{'phrase':<26} {'docs(AND)':>10} {'docs(phrase)':>13} {'ms':>8}")
+    for ph in phrases:
+        terms = positioned_terms(ph, stopset, stemmer, stem_cache)
+        matched, ms = _timed(lambda: phrase_docs(positions, df, terms), repeat)
+        n_and = len(candidate_docs(postings, df, [t for _, t in terms]))
+        print(f"{ph:<26} {n_and:>10,} {len(matched):>13,} {ms:>8.2f}")
+
+    print(f"\n{'requête':<48} {'bm25 ms':>8} {'prox ms':>8} {'overlap@100':>12}")
+    for q in ri.QUERIES.values():
+        terms = ri.preprocess_tokens(ri.tokenizer(q), stopset, stemmer, stem_cache)
+        base, ms_b = _timed(lambda: ri.score_query_bm25(postings, df, doc_len, N, terms, avdl=avdl)[0], repeat)
+        prox, ms_p = _timed(lambda: score_query_bm25_prox(postings, positions, df, doc_len, N, terms, avdl=avdl)[0],
+                            repeat)
+        top_b = {d for d, _ in heapq.nlargest(100, base.items(), key=lambda x: x[1])}
+        top_p = {d for d, _ in heapq.nlargest(100, prox.items(), key=lambda x: x[1])}
+        print(f"{q:<48} {ms_b:>8.2f} {ms_p:>8.2f} {len(top_b & top_p):>12}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Index positionnel : phrases, BM25 + proximité, benchmark.")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--phrase", action="append", default=None, help="Phrase à tester (répétable).")
+    ap.add_argument("--repeat", type=int, default=10, help="Répétitions par mesure de latence.")
+    args = ap.parse_args()
+
+    stop_name, stem_name = args.config.split(":")
+    stopset = ri.load_stopwords(ri.STOPFILE) if stop_name != "nostop" else set()
+    stemmer = get_stemmer(stem_name)
+    t0 = time.perf_counter()
+    _, postings, df, doc_len, doc_ids, stem_cache = ri.load_config_index(stop_name, stem_name)
+    positions = load_positions(stop_name, stem_name)
+    print(f"Index {args.config} chargé en {time.perf_counter() - t0:.2f}s")
+    benchmark(postings, positions, df, doc_len, doc_ids, stopset, stemmer, stem_cache,
+              args.phrase or BENCH_PHRASES, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Élagage statique de l'index (postings de faible impact retirés hors ligne).
+
+Impact d'un posting : poids ltn, ou contribution BM25 idf_t · tf_adj (en
+valeur absolue : idf BM25 < 0 quand df > N/2).
+  - centré terme (Carmel et al.) : pour chaque terme, z_t = PRUNE_Z_RANK-ième
+    plus fort impact ; on retire les postings d'impact < eps · z_t ;
+  - centré document (Büttcher & Clarke) : chaque document garde la fraction
+    lam de ses termes de plus fort impact (au moins un).
+L'index élagué garde la forme de build_index ; df et doc_len restent ceux de
+l'index complet (idf et avdl inchangés). Il est rangé dans le cache
+d'artefacts, avec sa version disque (disk_index) pour mesurer la taille.
+
+Rapport : postings et octets conservés, latence des requêtes, overlap@k et
+tau de Kendall du top-k contre le run non élagué (generated_runs/).
+
+    python prune.py --config stop671:porter --mode term --eps 0.1 --eps 0.3
+    python prune.py --mode doc --lam 0.5 --method ltn
+"""
+import os
+import math
+import time
+import heapq
+import argparse
+from collections import defaultdict
+
+import main as ri
+from runio import load_run
+from index_cache import cached_weights, get_cache
+from disk_index import DISK_ARTIFACT, write_disk_index
+from tiered import find_run
+
+PRUNE_Z_RANK = 10
+
+
+# ---------------------------
+# Impacts
+# ---------------------------
+def impact_weights(key, postings, df, doc_len, N, method):
+    """term -> {docid: impact} (poids ltn ou contribution BM25), via le cache de poids."""
+    if method == "ltn":
+        return cached_weights(key, "ltn", lambda: ri.compute_ltn_weights(postings, df, N))[0]
+    return cached_weights(key, "bm25", lambda: ri.compute_bm25_weights(postings, df, doc_len, N))[0]
+
+
+# ---------------------------
+# Élagage
+# ---------------------------
+def prune_term_centric(postings, impacts, eps, z_rank=PRUNE_Z_RANK):
+    pruned = {}
+    for t, plist in postings.items():
+        imps = impacts.get(t, {})
+        top = heapq.nlargest(z_rank, (abs(v) for v in imps.values()))
+        if not top:
+            continue
+        threshold = eps * top[-1]
+        kept = {d: tf for d, tf in plist.items() if d in imps and abs(imps[d]) >= threshold}
+        if kept:
+            pruned[t] = kept
+    return pruned
+
+
+def prune_doc_centric(postings, impacts, lam):
+    by_doc = defaultdict(list)
+    for t, imps in impacts.items():
+        for d, v in imps.items():
+            by_doc[d].append((abs(v), t))
+    pruned = defaultdict(dict)
+    for d, items in by_doc.items():
+        n_keep = max(1, math.ceil(lam * len(items)))
+        for _, t in heapq.nlargest(n_keep, items):
+            pruned[t][d] = postings[t][d]
+    return dict(pruned)
+
+
+def prune_name(mode, method, param):
+    return f"pruned_{mode}_{method}_{param:g}"
+
+
+def load_pruned_index(stop_name, stem_name, mode, method, param):
+    """Index élagué d'une configuration (cache). Retour : comme main.load_config_index."""
+    key, postings, df, doc_len, doc_ids, stem_cache = ri.load_config_index(stop_name, stem_name)
+
+    def build():
+        impacts = impact_weights(key, postings, df, doc_len, len(doc_ids), method)
+        if mode == "term":
+            return prune_term_centric(postings, impacts, param)
+        return prune_doc_centric(postings, impacts, param)
+
+    pruned = get_cache().get_or_build(key, prune_name(mode, method, param), build)
+    return key, pruned, df, doc_len, doc_ids, stem_cache
+
+
+def disk_size(key, name, postings, df, doc_len, doc_ids):
+    """Taille (octets) de l'index au format disk_index, écrit une fois dans le cache."""
+    path = get_cache().file(key, name, ".bin", lambda p: write_disk_index(p, postings, df, doc_len, doc_ids))
+    return os.path.getsize(path)
+
+
+# ---------------------------
+# Corrélation de rangs
+# ---------------------------
+def _count_inversions(values):
+    """Nombre de paires i < j avec values[i] > values[j] (tri fusion)."""
+    if len(values) < 2:
+        return values, 0
+    mid = len(values) // 2
+    left, a = _count_inversions(values[:mid])
+    right, b = _count_inversions(values[mid:])
+    merged, inv, i, j = [], a + b, 0, 0
+    while i < len(left) and j < len(right):
+        if right[j] < left[i]:
+            merged.append(right[j])
+            inv += len(left) - i
+            j += 1
+        else:
+            merged.append(left[i])
+            i += 1
+    merged.extend(left[i:])
+    merged.extend(right[j:])
+    return merged, inv
+
+
+def kendall_tau(ref, other):
+    """
+    tau-b entre deux classements (listes de docids) sur les docs de ref ; un doc
+    absent de other est classé ex aequo après tous les autres.
+    """
+    pos = {d: i for i, d in enumerate(other)}
+    ranks = [pos.get(d, len(other)) for d in ref]
+    n0 = len(ranks) * (len(ranks) - 1) // 2
+    missing = sum(1 for d in ref if d not in pos)
+    ties = missing * (missing - 1) // 2
+    if n0 == 0 or n0 == ties:
+        return 1.0
+    _, discordant = _count_inversions(ranks)
+    concordant = n0 - ties - discordant
+    return (concordant - discordant) / math.sqrt(n0 * (n0 - ties))
+
+
+# ---------------------------
+# Rapport
+# ---------------------------
+def run_queries(method, postings, df, doc_len, doc_ids, parsed, k):
+    """Top-k de chaque requête (poids ltn / ltc recalculés sur les postings donnés). Retour : run, ms."""
+    N = len(doc_ids)
+    avdl = sum(doc_len.values()) / N
+    weighted = None
+    if method == "ltn":
+        weighted = ri.compute_ltn_weights(postings, df, N)[0]
+    elif method == "ltc":
+        weighted = ri.compute_ltc_weights(postings, df, N)[0]
+    t0 = time.perf_counter()
+    run = {}
+    for qid, terms in parsed.items():
+        if method == "ltn":
+            scores = ri.score_query_ltn(weighted, terms)
+        elif method == "ltc":
+            scores = ri.score_query_ltc(weighted, terms)
+        else:
+            scores, _ = ri.score_query_bm25(postings, df, doc_len, N, terms, avdl=avdl)
+        run[qid] = [d for d, _ in ri.top_k_with_padding(scores, doc_ids, k)]
+    return run, (time.perf_counter() - t0) * 1000
+
+
+def report(config, mode, method, params, eval_method, queries, runs_dir, k=ri.TOP_K):
+    from stemmers import get_stemmer
+
+    stop_name, stem_name = config.split(":")
+    key, postings, df, doc_len, doc_ids, stem_cache = ri.load_config_index(stop_name, stem_name)
+    stopset = ri.load_stopwords(ri.STOPFILE) if stop_name != "nostop" else set()
+    stemmer = get_stemmer(stem_name)
+    parsed = {qid: ri.preprocess_tokens(ri.tokenizer(q), stopset, stemmer, stem_cache) for qid, q in queries.items()}
+
+    n_full = sum(len(p) for p in postings.values())
+    bytes_full = disk_size(key, DISK_ARTIFACT, postings, df, doc_len, doc_ids)
+    exact, ms_full = run_queries(eval_method, postings, df, doc_len, doc_ids, parsed, k)
+    path = find_run(runs_dir, eval_method, config)
+    ref = {qid: [d for d, _ in ranked] for qid, ranked in load_run(path).items()} if path else exact
+    print(f"référence ({eval_method}) : {path or 'scoring non élagué en mémoire (run absent)'}")
+    print(f"{'élagage':<24} {'postings':>11} {'%':>6} {'disque Mo':>10} {'%':>6} "
+          f"{'ms':>8} {'accél.':>7} {'overlap@k':>10} {'tau':>6}")
+
+    def line(label, n, size, run, ms):
+        overlap = tau = 0.0
+        for qid in parsed:
+            r = ref.get(qid, exact[qid])
+            overlap += len(set(r) & set(run[qid])) / max(1, len(r))
+            tau += kendall_tau(r, run[qid])
+        print(f"{label:<24} {n:>11,} {n / n_full:>6.1%} {size / 1e6:>10.2f} {size / bytes_full:>6.1%} "
+              f"{ms:>8.2f} {ms_full / ms if ms else 0.0:>7.2f} {overlap / len(parsed):>10.3f} {tau / len(parsed):>6.3f}")
+
+    line("aucun", n_full, bytes_full, exact, ms_full)
+    for param in params:
+        t0 = time.perf_counter()
+        pruned = load_pruned_index(stop_name, stem_name, mode, method, param)[1]
+        t_build = time.perf_counter() - t0
+        name = prune_name(mode, method, param)
+        size = disk_size(key, f"{DISK_ARTIFACT}_{name}", pruned, df, doc_len, doc_ids)
+        run, ms = run_queries(eval_method, pruned, df, doc_len, doc_ids, parsed, k)
+        line(f"{mode} {method} {param:g} ({t_build:.1f}s)", sum(len(p) for p in pruned.values()), size, run, ms)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Élagage statique de l'index par impact ltn / BM25.")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--mode", choices=["term", "doc"], default="term",
+                    help="term : seuil eps · z_t par terme ; doc : fraction lam des termes de chaque document.")
+    ap.add_argument("--method", choices=["ltn", "bm25"], default="bm25", help="Impact utilisé pour élaguer.")
+    ap.add_argument("--eps", type=float, action="append", default=None, help="Seuil relatif (mode term, répétable).")
+    ap.add_argument("--lam", type=float, action="append", default=None, help="Fraction gardée (mode doc, répétable).")
+    ap.add_argument("--eval", choices=["ltn", "ltc", "bm25"], default=None,
+                    help="Modèle des runs comparés (défaut : celui de --method).")
+    ap.add_argument("-k", type=int, default=ri.TOP_K)
+    ap.add_argument("--runs", default=ri.OUTPUT_DIR, help="Répertoire des runs non élagués.")
+    args = ap.parse_args()
+
+    if args.mode == "term":
+        params = args.eps or [0.05, 0.1, 0.2]
+    else:
+        params = args.lam or [0.7, 0.5, 0.3]
+    report(args.config, args.mode, args.method, params, args.eval or args.method, ri.QUERIES, args.runs, args.k)
+
+
+if __name__ == "__main__":
+    main()
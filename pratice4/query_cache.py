@@ -0,0 +1,65 @@
+"""
+Cache LRU des résultats de requêtes, placé devant les scorers.
+
+Clé : (id de l'index, méthode, k1, b, termes prétraités triés). Deux formes de
+surface qui donnent les mêmes termes ("Web ranking" / "ranking web") partagent
+donc la même entrée. Le k ne fait pas partie de la clé : un top-k en cache
+sert toute demande de k' <= k.
+L'id de l'index est sa clé de contenu (index_cache) : un index reconstruit
+change d'id, ses anciennes entrées ne sont plus jamais touchées et sortent par
+LRU ; invalidate(index_id) les supprime immédiatement.
+"""
+from collections import OrderedDict
+
+ENTRY_OVERHEAD = 200   # octets approximatifs par entrée (clé + liste)
+RESULT_BYTES = 72      # octets approximatifs par (docid, score)
+
+
+class QueryCache:
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # clé -> (k demandé, résultats, taille)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(index_id, method, terms, k1=None, b=None):
+        if method != "bm25":
+            k1 = b = None  # k1/b sans effet sur ltn/ltc
+        return index_id, method, k1, b, tuple(sorted(terms))
+
+    def get(self, key, k):
+        """Top-k en cache ou None (entrée absente, ou calculée pour un k plus petit)."""
+        entry = self.entries.get(key)
+        if entry is None or (entry[0] < k and len(entry[1]) >= entry[0]):
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1][:k]
+
+    def put(self, key, k, results):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+        size = ENTRY_OVERHEAD + RESULT_BYTES * len(results)
+        self.entries[key] = (k, results, size)
+        self.bytes += size
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, _, s) = self.entries.popitem(last=False)
+            self.bytes -= s
+            self.evictions += 1
+
+    def invalidate(self, index_id=None):
+        """Supprime les entrées d'un index (ou toutes)."""
+        for key in [key for key in self.entries if index_id is None or key[0] == index_id]:
+            self.bytes -= self.entries.pop(key)[2]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0}
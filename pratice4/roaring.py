@@ -0,0 +1,288 @@
+"""
+Postings hybrides façon Roaring : l'espace des numéros de documents est
+découpé en blocs de 2^16 ; chaque bloc est soit un tableau trié (array 'H',
+termes rares), soit un bitmap (termes fréquents, ex. "the" en nostop).
+
+Le bitmap est un entier Python : &, |, & ~ et int.bit_count() travaillent
+mot machine par mot machine (en C), sans boucle Python par document. Un
+entier n'occupe que (plus grande valeur + 1) / 8 octets : le choix
+tableau / bitmap compare 2 octets par valeur à cette taille, ce qui redonne
+le seuil Roaring de 4096 valeurs pour un bloc plein, et un seuil
+proportionnel quand la collection (~9.8k docs) n'occupe qu'une partie du bloc.
+Le df d'un terme ou d'un résultat est la somme des cardinalités des blocs.
+
+    python roaring.py --config nostop:nostem [--repeat 50]
+"""
+import sys
+import time
+import argparse
+from array import array
+from collections import defaultdict
+
+import main as ri
+from stemmers import get_stemmer
+from index_cache import get_cache
+from boolean import BooleanIndex, build_docnum_lists, intersect_adaptive, difference_gallop, union_many
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+LOW_MASK = CHUNK_SIZE - 1
+BITMAP_BYTES = CHUNK_SIZE // 8
+
+_BYTE_BITS = [tuple(b for b in range(8) if v >> b & 1) for v in range(256)]
+
+
+# ---------------------------
+# Conteneurs : array('H') trié ou bitmap (int)
+# ---------------------------
+def _to_bitmap(values):
+    buf = bytearray(BITMAP_BYTES)
+    for v in values:
+        buf[v >> 3] |= 1 << (v & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _bitmap_values(bm):
+    out = array("H")
+    for i, byte in enumerate(bm.to_bytes((bm.bit_length() + 7) // 8, "little")):
+        if byte:
+            base = i << 3
+            out.extend(base + b for b in _BYTE_BITS[byte])
+    return out
+
+
+def _card(c):
+    return c.bit_count() if isinstance(c, int) else len(c)
+
+
+def _normalize(c):
+    """Choisit la représentation la plus compacte ; None si vide."""
+    if isinstance(c, int):
+        n = c.bit_count()
+        if n == 0:
+            return None
+        return c if n * 16 > c.bit_length() else _bitmap_values(c)
+    if not c:
+        return None
+    if not isinstance(c, array) or c.typecode != "H":
+        c = array("H", c)
+    return _to_bitmap(c) if len(c) * 16 > c[-1] + 1 else c
+
+
+def _filter_in(arr, bm, keep):
+    data = bm.to_bytes(BITMAP_BYTES, "little")
+    return array("H", (x for x in arr if bool(data[x >> 3] >> (x & 7) & 1) == keep))
+
+
+def _and(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        return _normalize(a & b)
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        return _normalize(_filter_in(a, b, True))
+    return _normalize(intersect_adaptive(a, b))
+
+
+def _or(a, b):
+    if isinstance(a, int) or isinstance(b, int):
+        a = a if isinstance(a, int) else _to_bitmap(a)
+        b = b if isinstance(b, int) else _to_bitmap(b)
+        return _normalize(a | b)
+    return _normalize(union_many([a, b]))
+
+
+def _andnot(a, b):
+    if isinstance(a, int):
+        return _normalize(a & ~(b if isinstance(b, int) else _to_bitmap(b)))
+    if isinstance(b, int):
+        return _normalize(_filter_in(a, b, False))
+    return _normalize(difference_gallop(a, b))
+
+
+# ---------------------------
+# Bitmap compressé
+# ---------------------------
+class RoaringBitmap:
+    """Ensemble d'entiers (< 2^32) : bloc de poids fort -> conteneur."""
+
+    __slots__ = ("chunks",)
+
+    def __init__(self, chunks=None):
+        self.chunks = chunks if chunks is not None else {}
+
+    @classmethod
+    def from_sorted(cls, values):
+        groups = defaultdict(list)
+        for v in values:
+            groups[v >> CHUNK_BITS].append(v & LOW_MASK)
+        chunks = {}
+        for high, lows in groups.items():
+            c = _normalize(array("H", lows))
+            if c is not None:
+                chunks[high] = c
+        return cls(chunks)
+
+    def __len__(self):
+        return sum(_card(c) for c in self.chunks.values())
+
+    def __iter__(self):
+        for high in sorted(self.chunks):
+            c = self.chunks[high]
+            base = high << CHUNK_BITS
+            for low in (_bitmap_values(c) if isinstance(c, int) else c):
+                yield base | low
+
+    def __and__(self, other):
+        small, large = (self, other) if len(self.chunks) <= len(other.chunks) else (other, self)
+        chunks = {}
+        for high, c in small.chunks.items():
+            d = large.chunks.get(high)
+            if d is not None:
+                r = _and(c, d)
+                if r is not None:
+                    chunks[high] = r
+        return RoaringBitmap(chunks)
+
+    def __or__(self, other):
+        chunks = dict(self.chunks)
+        for high, d in other.chunks.items():
+            c = chunks.get(high)
+            chunks[high] = d if c is None else _or(c, d)
+        return RoaringBitmap(chunks)
+
+    def __sub__(self, other):
+        chunks = {}
+        for high, c in self.chunks.items():
+            d = other.chunks.get(high)
+            r = c if d is None else _andnot(c, d)
+            if r is not None:
+                chunks[high] = r
+        return RoaringBitmap(chunks)
+
+    def n_bitmaps(self):
+        return sum(1 for c in self.chunks.values() if isinstance(c, int))
+
+    def memory_bytes(self):
+        return sys.getsizeof(self.chunks) + sum(sys.getsizeof(c) for c in self.chunks.values())
+
+
+# ---------------------------
+# Index booléen sur bitmaps
+# ---------------------------
+def build_roaring_lists(lists):
+    """term -> RoaringBitmap, depuis les listes triées de boolean.build_docnum_lists."""
+    return {t: RoaringBitmap.from_sorted(plist) for t, plist in lists.items()}
+
+
+class RoaringBooleanIndex(BooleanIndex):
+    """BooleanIndex dont les AND / OR / NOT sont des opérations de bitmaps par bloc."""
+
+    def __init__(self, lists, doc_ids, stopset=frozenset(), stemmer=None, stem_cache=None):
+        super().__init__(lists, doc_ids, stopset, stemmer, stem_cache)
+        self.universe = RoaringBitmap.from_sorted(range(len(doc_ids)))
+
+    def _list(self, term):
+        return self.lists.get(term) or RoaringBitmap()
+
+    def _intersect(self, a, b):
+        return a & b
+
+    def _difference(self, a, b):
+        return a - b
+
+    def _union(self, lists):
+        result = lists[0]
+        for plist in lists[1:]:
+            result = result | plist
+        return result
+
+    def df(self, term):
+        plist = self.lists.get(term)
+        return len(plist) if plist is not None else 0
+
+
+def load_roaring_index(stop_name, stem_name):
+    key, postings, df, doc_len, doc_ids, stem_cache = ri.load_config_index(stop_name, stem_name)
+    cache = get_cache()
+    lists = cache.get_or_build(key, "roaring", lambda: build_roaring_lists(
+        cache.get_or_build(key, "docnums", lambda: build_docnum_lists(postings, doc_ids))))
+    stopset = ri.load_stopwords(ri.STOPFILE) if stop_name != "nostop" else set()
+    return RoaringBooleanIndex(lists, doc_ids, stopset, get_stemmer(stem_name), stem_cache), postings
+
+
+# ---------------------------
+# Benchmark : mémoire et débit des opérations
+# ---------------------------
+def dict_postings_bytes(postings):
+    """Taille des postings de build_index (dicts docid -> tf, clés et valeurs comprises)."""
+    total = sys.getsizeof(postings)
+    for t, plist in postings.items():
+        total += sys.getsizeof(t) + sys.getsizeof(plist)
+        total += sum(sys.getsizeof(d) + sys.getsizeof(tf) for d, tf in plist.items())
+    return total
+
+
+def _ms(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1000 / repeat
+
+
+def benchmark(index, postings, repeat=50):
+    lists = index.lists
+    n_chunks = sum(len(bm.chunks) for bm in lists.values())
+    n_bitmaps = sum(bm.n_bitmaps() for bm in lists.values())
+    roaring_bytes = sum(bm.memory_bytes() for bm in lists.values())
+    arrays = build_docnum_lists(postings, index.doc_ids)
+    array_bytes = sum(sys.getsizeof(a) for a in arrays.values())
+    print(f"termes={len(lists):,}  blocs={n_chunks:,} (dont bitmaps {n_bitmaps:,})")
+    print(f"mémoire : postings dict {dict_postings_bytes(postings) / 1e6:.1f} Mo   "
+          f"listes triées {array_bytes / 1e6:.1f} Mo   roaring {roaring_bytes / 1e6:.1f} Mo")
+
+    ranked = sorted(lists, key=lambda t: len(lists[t]), reverse=True)
+    a_t, b_t = ranked[0], ranked[1]
+    rare = ranked[min(len(ranked) - 1, 1000)]
+    print(f"\n{'opération':<34} {'dict ms':>8} {'trié ms':>8} {'roaring ms':>11} {'résultat':>9}")
+    for label, t1, t2 in ((f"{a_t} AND {b_t}", a_t, b_t), (f"{a_t} AND {rare}", a_t, rare)):
+        pa, pb = postings[t1], postings[t2]
+        ra, rb = lists[t1], lists[t2]
+        print(f"{label:<34} {_ms(lambda: pa.keys() & pb.keys(), repeat):>8.3f} "
+              f"{_ms(lambda: intersect_adaptive(arrays[t1], arrays[t2]), repeat):>8.3f} "
+              f"{_ms(lambda: ra & rb, repeat):>11.3f} {len(ra & rb):>9,}")
+    pa, pb, ra, rb = postings[a_t], postings[b_t], lists[a_t], lists[b_t]
+    print(f"{a_t + ' OR ' + b_t:<34} {_ms(lambda: pa.keys() | pb.keys(), repeat):>8.3f} "
+          f"{_ms(lambda: union_many([arrays[a_t], arrays[b_t]]), repeat):>8.3f} "
+          f"{_ms(lambda: ra | rb, repeat):>11.3f} {len(ra | rb):>9,}")
+    print(f"{a_t + ' AND NOT ' + b_t:<34} {_ms(lambda: pa.keys() - pb.keys(), repeat):>8.3f} "
+          f"{_ms(lambda: difference_gallop(arrays[a_t], arrays[b_t]), repeat):>8.3f} "
+          f"{_ms(lambda: ra - rb, repeat):>11.3f} {len(ra - rb):>9,}")
+    both = ra & rb
+    print(f"{'df(' + a_t + ' AND ' + b_t + ')':<34} {_ms(lambda: len(pa.keys() & pb.keys()), repeat):>8.3f} "
+          f"{_ms(lambda: len(intersect_adaptive(arrays[a_t], arrays[b_t])), repeat):>8.3f} "
+          f"{_ms(lambda: len(both), repeat):>11.3f} {len(both):>9,}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Postings bitmap hybrides (Roaring) : mémoire et débit AND / OR / NOT.")
+    ap.add_argument("query", nargs="?", default=None, help="Requête booléenne (cf. boolean.py).")
+    ap.add_argument("--config", default="nostop:nostem", help="Configuration stop:stem.")
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    index, postings = load_roaring_index(*args.config.split(":"))
+    print(f"Index {args.config} chargé en {time.perf_counter() - t0:.2f}s")
+    if args.query:
+        t0 = time.perf_counter()
+        docs = index.search(args.query)
+        print(f"{args.query!r} : {len(docs):,} docs ({(time.perf_counter() - t0) * 1000:.2f} ms)")
+    else:
+        benchmark(index, postings, args.repeat)
+
+
+if __name__ == "__main__":
+    # classes picklées dans le cache sous le nom du module, pas de __main__
+    import roaring
+    roaring.main()
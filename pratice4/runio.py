@@ -0,0 +1,172 @@
+"""
+Lecture / écriture des runs.
+
+- Texte INEX 7 colonnes : "qid Q0 docid rank score team /article[1]".
+  Les lignes d'un top-k sont formatées en bloc et écrites en un seul write.
+- Binaire compact (colonnes qid, doc, rank : uint32 ; score : float32) avec
+  tables de chaînes pour les qids et docids : chargement par frombytes, sans
+  parsing de texte.
+"""
+import sys
+import struct
+from array import array
+
+TEAM = "AdrienSoleneWilliam"
+XML_PATH = "/article[1]"
+LINE_FMT = "%s Q0 %s %d %.5f %s %s\n"
+
+BIN_MAGIC = b"RIRUN\x00\x01\x00"
+BIN_HEADER = struct.Struct("<8sIII")  # magic, n_records, n_qids, n_docs
+
+
+# ---------------------------
+# Texte INEX
+# ---------------------------
+def format_run_block(qid, ranked, team=TEAM, xml_path=XML_PATH):
+    """Formate tout le top-k d'une requête (liste (docid, score) triée) en une seule chaîne."""
+    return "".join([LINE_FMT % (qid, d, rank, s, team, xml_path)
+                    for rank, (d, s) in enumerate(ranked, start=1)])
+
+
+def write_run_text(path, run, team=TEAM):
+    """run : itérable de (qid, ranked). Un write par requête. Renvoie le nombre de lignes."""
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for qid, ranked in run:
+            f.write(format_run_block(qid, ranked, team))
+            n += len(ranked)
+    return n
+
+
+def load_run_text(path):
+    """Lit un run INEX texte -> dict qid -> liste (docid, score) dans l'ordre des rangs."""
+    run = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            run.setdefault(parts[0], []).append((parts[2], float(parts[4])))
+    return run
+
+
+def load_run_text_columns(path):
+    """
+    Chargement colonnaire d'un run INEX texte (même retour que load_run_columns).
+    Découpage du fichier entier puis tranches de colonnes ; repli ligne à ligne
+    si le fichier n'a pas 7 tokens par ligne.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    tok = text.split()
+    if text.endswith("\n") and len(tok) == 7 * text.count("\n"):
+        q_str, d_str, r_str, s_str = tok[0::7], tok[2::7], tok[3::7], tok[4::7]
+    else:
+        rows = [line.split() for line in text.splitlines()]
+        rows = [p for p in rows if len(p) >= 5]
+        q_str, d_str = [p[0] for p in rows], [p[2] for p in rows]
+        r_str, s_str = [p[3] for p in rows], [p[4] for p in rows]
+    q_index = {q: i for i, q in enumerate(dict.fromkeys(q_str))}
+    d_index = {d: i for i, d in enumerate(dict.fromkeys(d_str))}
+    return (list(q_index), list(d_index), array("I", map(q_index.__getitem__, q_str)),
+            array("I", map(d_index.__getitem__, d_str)), array("I", map(int, r_str)),
+            array("f", map(float, s_str)))
+
+
+# ---------------------------
+# Binaire
+# ---------------------------
+def _strings_to_bytes(strings):
+    data = "\n".join(strings).encode("utf-8")
+    return struct.pack("<I", len(data)) + data
+
+
+def _read_strings(buf, pos, n):
+    (size,) = struct.unpack_from("<I", buf, pos)
+    pos += 4
+    strings = bytes(buf[pos:pos + size]).decode("utf-8").split("\n") if n else []
+    return strings, pos + size
+
+
+def write_run_binary(path, run):
+    """run : itérable de (qid, ranked) ; les rangs sont implicites (1..k)."""
+    qids, q_col, d_col, r_col, s_col = [], array("I"), array("I"), array("I"), array("f")
+    doc_index = {}
+    for qid, ranked in run:
+        qi = len(qids)
+        qids.append(qid)
+        for rank, (d, s) in enumerate(ranked, start=1):
+            di = doc_index.get(d)
+            if di is None:
+                di = doc_index[d] = len(doc_index)
+            q_col.append(qi)
+            d_col.append(di)
+            r_col.append(rank)
+            s_col.append(s)
+    return write_run_columns(path, qids, list(doc_index), q_col, d_col, r_col, s_col)
+
+
+def write_run_columns(path, qids, docids, q_col, d_col, r_col, s_col):
+    """Écrit un run binaire à partir des colonnes (même forme que le retour de load_run_columns)."""
+    cols = [array(code, col) for code, col in zip("IIIf", (q_col, d_col, r_col, s_col))]
+    if sys.byteorder == "big":
+        for col in cols:
+            col.byteswap()
+    with open(path, "wb") as f:
+        f.write(BIN_HEADER.pack(BIN_MAGIC, len(cols[0]), len(qids), len(docids)))
+        f.write(_strings_to_bytes(qids))
+        f.write(_strings_to_bytes(docids))
+        for col in cols:
+            f.write(col.tobytes())
+    return len(cols[0])
+
+
+def load_run_columns(path):
+    """
+    Chargement colonnaire d'un run binaire.
+    Retour : qids, docids (tables), q_col, d_col, r_col (array 'I'), s_col (array 'f').
+    """
+    with open(path, "rb") as f:
+        buf = f.read()
+    magic, n, n_q, n_d = BIN_HEADER.unpack_from(buf, 0)
+    if magic != BIN_MAGIC:
+        raise ValueError(f"Run binaire invalide : {path}")
+    qids, pos = _read_strings(buf, BIN_HEADER.size, n_q)
+    docids, pos = _read_strings(buf, pos, n_d)
+    cols = []
+    for code in "IIIf":
+        col = array(code)
+        col.frombytes(buf[pos:pos + 4 * n])
+        if sys.byteorder == "big":
+            col.byteswap()
+        cols.append(col)
+        pos += 4 * n
+    return (qids, docids) + tuple(cols)
+
+
+def load_columns(path):
+    """load_run_columns ou load_run_text_columns selon l'en-tête."""
+    with open(path, "rb") as f:
+        head = f.read(len(BIN_MAGIC))
+    return load_run_columns(path) if head == BIN_MAGIC else load_run_text_columns(path)
+
+
+def load_run_binary(path):
+    """Run binaire -> dict qid -> liste (docid, score), comme load_run_text."""
+    qids, docids, q_col, d_col, r_col, s_col = load_run_columns(path)
+    run = {qid: [] for qid in qids}
+    for qi, di, s in zip(q_col, d_col, s_col):
+        run[qids[qi]].append((docids[di], s))
+    return run
+
+
+def load_run(path):
+    """Détecte le format (binaire ou texte) d'après l'en-tête."""
+    with open(path, "rb") as f:
+        head = f.read(len(BIN_MAGIC))
+    return load_run_binary(path) if head == BIN_MAGIC else load_run_text(path)
+
+
+def export_run_text(bin_path, txt_path, team=TEAM):
+    """Convertit un run binaire en run INEX 7 colonnes."""
+    return write_run_text(txt_path, load_run_binary(bin_path).items(), team)
@@ -0,0 +1,56 @@
+"""
+Configuration d'index chargée et prête à interroger (server.py, batch.py).
+"""
+import main as ri
+from stemmers import get_stemmer
+from index_cache import cached_weights, get_cache
+from disk_index import DISK_ARTIFACT, DiskIndex, write_disk_index
+
+
+class LoadedIndex:
+    """
+    Une configuration (stop × stem) prête à servir : postings, poids ltn/ltc, avdl.
+    Avec postings_cache : index disque mmappé (disk_index), postings décodés à
+    la demande et gardés dans le cache LRU partagé.
+    """
+
+    def __init__(self, stop_name, stem_name, postings_cache=None):
+        self.name = f"{stop_name}:{stem_name}"
+        self.stopset = ri.load_stopwords(ri.STOPFILE) if stop_name != "nostop" else set()
+        self.stemmer = get_stemmer(stem_name)
+        self.key = ri.config_key(stop_name, stem_name)
+        if postings_cache is not None:
+            path = get_cache().file(self.key, DISK_ARTIFACT, ".bin", lambda p: write_disk_index(
+                p, *ri.load_config_index(stop_name, stem_name)[1:5]))
+            self.postings = DiskIndex(path, postings_cache)
+            self.df, self.doc_len, self.doc_ids = self.postings.df, self.postings.doc_len, self.postings.doc_ids
+            self.stem_cache = get_cache().get(self.key, "stems") or {}
+            self.weights = {"ltn": self.postings.ltn_view(), "ltc": self.postings.ltc_view()}
+        else:
+            (self.key, self.postings, self.df, self.doc_len,
+             self.doc_ids, self.stem_cache) = ri.load_config_index(stop_name, stem_name)
+            N = len(self.doc_ids)
+            self.weights = {
+                "ltn": cached_weights(self.key, "ltn", lambda: ri.compute_ltn_weights(self.postings, self.df, N))[0],
+                "ltc": cached_weights(self.key, "ltc", lambda: ri.compute_ltc_weights(self.postings, self.df, N))[0],
+            }
+        self.N = len(self.doc_ids)
+        self.avdl = sum(self.doc_len.values()) / self.N if self.N else 0.0
+        self.speller = None
+
+    def enable_spelling(self):
+        """Corrige désormais les termes de requête absents du vocabulaire (cf. spelling.py)."""
+        from spelling import load_corrector
+        self.speller = load_corrector(self.key, self.postings, self.df)
+
+    def query_terms(self, text):
+        terms = ri.preprocess_tokens(ri.tokenizer(text), self.stopset, self.stemmer, self.stem_cache)
+        return self.speller.correct_terms(terms) if self.speller else terms
+
+    def score(self, terms, method, k1=ri.BM25_K1, b=ri.BM25_B):
+        if method == "ltn":
+            return ri.score_query_ltn(self.weights["ltn"], terms)
+        if method == "ltc":
+            return ri.score_query_ltc(self.weights["ltc"], terms)
+        scores, _ = ri.score_query_bm25(self.postings, self.df, self.doc_len, self.N, terms, k1, b, self.avdl)
+        return scores
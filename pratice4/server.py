@@ -0,0 +1,256 @@
+"""
+Serveur de recherche local : les index sont chargés une seule fois et restent
+chauds en mémoire.
+
+    python server.py --config stop671:porter --config nostop:nostem --port 8765 [--workers 16]
+    GET /search?q=web+ranking&method=bm25&k=1500[&config=stop671:porter]
+    GET /stats
+
+Réponse JSON : {"query", "terms", "config", "method", "took_ms", "results": [[docid, score], ...]}.
+
+Avec --workers N (prefork) : le parent charge les index puis forke N workers
+qui partagent la socket d'écoute (le noyau répartit les connexions) et lisent
+les index en copy-on-write. gc.freeze() avant le fork évite que le GC ne
+touche (et donc ne copie) les pages des index.
+"""
+import gc
+import os
+import json
+import signal
+import sys
+import socket
+import time
+import heapq
+import asyncio
+import argparse
+from operator import itemgetter
+from urllib.parse import urlsplit, parse_qs
+
+import main as ri
+from searcher import LoadedIndex
+from disk_index import PostingsCache
+from query_cache import QueryCache
+
+METHODS = ("ltn", "ltc", "bm25")
+
+
+# ---------------------------
+# Service
+# ---------------------------
+class SearchService:
+    def __init__(self, configs, result_cache_mb=64, postings_cache_mb=None, spelling=False):
+        # postings_cache_mb : None = index en mémoire ; sinon index disque + cache de postings décodés
+        self.postings_cache = None
+        if postings_cache_mb is not None:
+            self.postings_cache = PostingsCache(postings_cache_mb * 1024 * 1024)
+        self.indexes = {}
+        for name in configs:
+            stop_name, stem_name = name.split(":")
+            self.indexes[name] = LoadedIndex(stop_name, stem_name, self.postings_cache)
+            if spelling:
+                self.indexes[name].enable_spelling()
+        self.default = configs[0]
+        self.n_queries = 0
+        # cache de résultats (par process : chaque worker forké a le sien)
+        self.result_cache = QueryCache(max_bytes=result_cache_mb * 1024 * 1024) if result_cache_mb > 0 else None
+
+    def search(self, query, method="bm25", k=ri.TOP_K, config=None, k1=ri.BM25_K1, b=ri.BM25_B):
+        """Renvoie (termes prétraités, top-k [(docid, score)])."""
+        index = self.indexes[config or self.default]
+        terms = index.query_terms(query)
+        self.n_queries += 1
+        if self.result_cache is None:
+            return terms, heapq.nlargest(k, index.score(terms, method, k1, b).items(), key=itemgetter(1))
+
+        key = QueryCache.make_key(index.key, method, terms, k1, b)
+        results = self.result_cache.get(key, k)
+        if results is None:
+            results = heapq.nlargest(k, index.score(terms, method, k1, b).items(), key=itemgetter(1))
+            self.result_cache.put(key, k, results)
+        return terms, results
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "queries": self.n_queries,
+            "memory_kb": memory_kb(),
+            "result_cache": self.result_cache.stats() if self.result_cache else None,
+            "postings_cache": self.postings_cache.stats() if self.postings_cache else None,
+            "configs": {name: {"docs": idx.N, "terms": len(idx.df)} for name, idx in self.indexes.items()},
+        }
+
+
+def memory_kb():
+    """
+    Mémoire du process (Linux) : rss, pss (part proportionnelle des pages
+    partagées) et private (pages propres au worker, i.e. copiées).
+    """
+    out = {}
+    try:
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                    out[parts[0][:-1].lower()] = int(parts[1])
+    except OSError:
+        import resource
+        return {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    out["private"] = out.pop("private_clean", 0) + out.pop("private_dirty", 0)
+    return out
+
+
+# ---------------------------
+# HTTP minimal (asyncio, keep-alive)
+# ---------------------------
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload).encode("utf-8")
+    head = (f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("ascii") + body
+
+
+def handle_request(service, target):
+    """Route une requête GET ; renvoie (statut, payload)."""
+    url = urlsplit(target)
+    params = {k: v[0] for k, v in parse_qs(url.query).items()}
+    if url.path == "/stats":
+        return "200 OK", service.stats()
+    if url.path != "/search":
+        return "404 Not Found", {"error": f"chemin inconnu : {url.path}"}
+    try:
+        query = params["q"]
+        method = params.get("method", "bm25")
+        k = int(params.get("k", ri.TOP_K))
+        config = params.get("config")
+        k1 = float(params.get("k1", ri.BM25_K1))
+        b = float(params.get("b", ri.BM25_B))
+        if method not in METHODS or (config and config not in service.indexes):
+            raise ValueError(f"method/config invalide : {method} / {config}")
+    except (KeyError, ValueError) as e:
+        return "400 Bad Request", {"error": str(e)}
+
+    t0 = time.perf_counter()
+    terms, results = service.search(query, method, k, config, k1, b)
+    took_ms = (time.perf_counter() - t0) * 1000
+    return "200 OK", {"query": query, "terms": terms, "config": config or service.default,
+                      "method": method, "took_ms": round(took_ms, 3),
+                      "results": [[d, round(s, 5)] for d, s in results]}
+
+
+async def _serve_connection(service, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            keep_alive = True
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                if line.lower().startswith(b"connection:") and b"close" in line.lower():
+                    keep_alive = False
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                status, payload = "405 Method Not Allowed", {"error": "GET uniquement"}
+            else:
+                try:
+                    status, payload = handle_request(service, parts[1])
+                except Exception as e:
+                    # artefact corrompu, bug de scorer... : réponse 500, la connexion reste utilisable
+                    print(f"[worker {os.getpid()}] erreur sur {parts[1]} : {e!r}", file=sys.stderr)
+                    status, payload = "500 Internal Server Error", {"error": f"{type(e).__name__}: {e}"}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(service, host="127.0.0.1", port=8765, sock=None):
+    handler = lambda r, w: _serve_connection(service, r, w)
+    if sock is not None:
+        server = await asyncio.start_server(handler, sock=sock)
+    else:
+        server = await asyncio.start_server(handler, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def prefork(service, host, port, workers):
+    """Forke `workers` process servant la même socket ; le parent attend et relaie l'arrêt."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+
+    gc.freeze()  # index déjà chargés : le GC ne les parcourra plus (pas de copie COW)
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                asyncio.run(serve(service, sock=sock))
+            except KeyboardInterrupt:
+                pass
+            except Exception as e:
+                print(f"[worker {os.getpid()}] {e}")
+                code = 1
+            os._exit(code)
+        pids.append(pid)
+    sock.close()
+    print(f"{workers} workers : {', '.join(map(str, pids))}")
+
+    def _stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, _stop)  # kill du parent -> arrêt des workers
+    try:
+        for pid in pids:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(description="Serveur de recherche (index chauds en mémoire).")
+    ap.add_argument("--config", action="append", default=None,
+                    help="Configuration stop:stem à charger (répétable), ex. stop671:porter.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=1, help="Nombre de workers forkés (1 = un seul process).")
+    ap.add_argument("--result-cache-mb", type=int, default=64, help="Budget du cache de résultats (0 = désactivé).")
+    ap.add_argument("--disk", type=int, default=None, metavar="MB",
+                    help="Sert depuis l'index disque compressé avec un cache de postings décodés de MB Mo.")
+    ap.add_argument("--spell", action="store_true", help="Corrige les termes de requête absents du vocabulaire.")
+    return ap
+
+
+def main():
+    args = build_parser().parse_args()
+    configs = args.config or ["stop671:porter"]
+    t0 = time.time()
+    service = SearchService(configs, args.result_cache_mb, args.disk, args.spell)
+    print(f"Index chargés ({', '.join(configs)}) en {time.time() - t0:.2f}s ; "
+          f"écoute sur http://{args.host}:{args.port}")
+    if args.workers > 1:
+        prefork(service, args.host, args.port, args.workers)
+        return
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Correction orthographique des termes de requête absents du vocabulaire
+("probabalistic" -> "probabilist"), sur les termes prétraités (stemmés).
+
+Candidats : index de k-grammes du vocabulaire (kgram.KGramIndex). Une
+édition détruit au plus k grammes : un terme à distance <= d partage au moins
+m = |G| - k·d grammes avec la requête, il apparaît donc dans au moins une des
+k·d + 1 listes de grammes les plus courtes. On ne compte que ces listes
+(Counter, en C) puis on vérifie m par dichotomie dans les autres. Quand
+m <= 0 (termes courts, d = 2), il faut au moins un gramme commun : un terme
+sans aucun gramme partagé n'est pas proposé, comme dans la méthode k-gramme
+classique, plutôt que de parcourir tout le vocabulaire. Les
+survivants passent un Levenshtein borné (bande de largeur 2d + 1, arrêt dès
+que toute la ligne dépasse d). Classement : distance, puis df décroissant.
+
+    python spelling.py --config stop671:porter probabalistic retreival
+    python spelling.py --bench
+"""
+import time
+import random
+import argparse
+from bisect import bisect_left
+from collections import Counter
+
+from kgram import kgrams, load_kgram_index
+
+
+def max_distance(term):
+    return 1 if len(term) <= 4 else 2
+
+
+def bounded_levenshtein(a, b, max_dist):
+    """Distance d'édition si <= max_dist, sinon max_dist + 1 (seule la bande |i - j| <= max_dist est calculée)."""
+    la, lb = len(a), len(b)
+    over = max_dist + 1
+    if abs(la - lb) > max_dist:
+        return over
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    prev = [j if j <= max_dist else over for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        cur = [over] * (lb + 1)
+        cur[0] = i if i <= max_dist else over
+        row_min = cur[0]
+        ca = a[i - 1]
+        for j in range(max(1, i - max_dist), min(lb, i + max_dist) + 1):
+            v = prev[j - 1] + (ca != b[j - 1])
+            if prev[j] + 1 < v:
+                v = prev[j] + 1
+            if cur[j - 1] + 1 < v:
+                v = cur[j - 1] + 1
+            cur[j] = v if v < over else over
+            if v < row_min:
+                row_min = v
+        if row_min > max_dist:
+            return over
+        prev = cur
+    return prev[lb]
+
+
+def _contains(plist, x):
+    i = bisect_left(plist, x)
+    return i < len(plist) and plist[i] == x
+
+
+class SpellingCorrector:
+    """Corrige les termes de df < min_df (par défaut : absents de l'index) ; résultats mémoïsés."""
+
+    def __init__(self, kg, df, min_df=1):
+        self.kg = kg
+        self.df = df
+        self.min_df = min_df
+        self.memo = {}
+
+    def suggest(self, term, n=5, d=None):
+        """Jusqu'à n candidats (terme, distance <= d, df), les meilleurs d'abord."""
+        kg, k = self.kg, self.kg.k
+        d = max_distance(term) if d is None else d
+        grams = set(kgrams(f"${term}$", k))
+        lists = sorted((kg.gram_list(g) for g in grams), key=len)
+        need = len(grams) - k * d
+        n_seed = len(lists) - need + 1 if need > 0 else len(lists)
+        counts = Counter()
+        for plist in lists[:n_seed]:
+            counts.update(plist)
+
+        rest = lists[n_seed:]
+        out = []
+        for tid, c in counts.items():
+            cand = kg.terms[tid]
+            if abs(len(cand) - len(term)) > d:
+                continue
+            # le candidat doit aussi garder (grammes distincts) - k·d de ses grammes ;
+            # len(cand) compterait les grammes répétés ("banana") et éliminerait à tort
+            need_c = need
+            if len(cand) - k * d > need:
+                need_c = max(need, len(set(kgrams(f"${cand}$", k))) - k * d)
+            if need_c > 0 and c + len(rest) < need_c:
+                continue
+            if need_c > 0 and c + sum(1 for plist in rest if _contains(plist, tid)) < need_c:
+                continue
+            dist = bounded_levenshtein(term, cand, d)
+            if dist <= d:
+                out.append((cand, dist, self.df.get(cand, 0)))
+        out.sort(key=lambda x: (x[1], -x[2], x[0]))
+        return out[:n]
+
+    def correct(self, term):
+        if self.df.get(term, 0) >= self.min_df:
+            return term
+        fixed = self.memo.get(term)
+        if fixed is None:
+            fixed = term
+            # distance 1 d'abord : borne sur les grammes bien plus sélective
+            for d in range(1, max_distance(term) + 1):
+                best = self.suggest(term, 1, d)
+                if best:
+                    fixed = best[0][0]
+                    break
+            self.memo[term] = fixed
+        return fixed
+
+    def correct_terms(self, terms):
+        return [self.correct(t) for t in terms]
+
+
+def load_corrector(key, postings, df, min_df=1):
+    return SpellingCorrector(load_kgram_index(key, postings), df, min_df)
+
+
+# ---------------------------
+# Benchmark : fautes simulées
+# ---------------------------
+def misspell(term, rng, n_edits=1):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    s = list(term)
+    for _ in range(n_edits):
+        op = rng.choice(("sub", "ins", "del", "swap"))
+        i = rng.randrange(len(s))
+        if op == "sub":
+            s[i] = rng.choice(letters)
+        elif op == "ins":
+            s.insert(i, rng.choice(letters))
+        elif op == "del" and len(s) > 3:
+            del s[i]
+        elif op == "swap" and i + 1 < len(s):
+            s[i], s[i + 1] = s[i + 1], s[i]
+    return "".join(s)
+
+
+def benchmark(corrector, n=500, seed=0):
+    rng = random.Random(seed)
+    vocab = [t for t in corrector.kg.terms if len(t) >= 5]
+    pairs = []
+    while len(pairs) < n:
+        t = rng.choice(vocab)
+        bad = misspell(t, rng, rng.choice((1, 1, 2)))
+        if bad not in corrector.df:
+            pairs.append((t, bad))
+    times = []
+    exact = same_dist = 0
+    for good, bad in pairs:
+        corrector.memo.pop(bad, None)
+        t0 = time.perf_counter()
+        fixed = corrector.correct(bad)
+        times.append((time.perf_counter() - t0) * 1e6)
+        if fixed == good:
+            exact += 1
+        elif fixed != bad and bounded_levenshtein(bad, fixed, 2) <= bounded_levenshtein(bad, good, 2):
+            same_dist += 1  # autre terme au moins aussi proche : ambiguïté, pas une erreur du correcteur
+    times.sort()
+    print(f"{n} fautes simulées sur {len(corrector.kg):,} termes : "
+          f"terme d'origine retrouvé {exact / n:.1%}, autre candidat aussi proche {same_dist / n:.1%}")
+    print(f"latence par terme (µs) : moyenne={sum(times) / n:.0f}  p50={times[n // 2]:.0f}  "
+          f"p99={times[min(n - 1, int(n * 0.99))]:.0f}  max={times[-1]:.0f}")
+
+
+def main():
+    from searcher import LoadedIndex
+
+    ap = argparse.ArgumentParser(description="Correction orthographique des termes de requête (k-grammes + Levenshtein borné).")
+    ap.add_argument("words", nargs="*", help="Mots (ou requête) à corriger.")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--bench", action="store_true", help="Précision et latence sur des fautes simulées.")
+    args = ap.parse_args()
+
+    index = LoadedIndex(*args.config.split(":"))
+    corrector = load_corrector(index.key, index.postings, index.df)
+    if args.bench:
+        benchmark(corrector)
+    for term in index.query_terms(" ".join(args.words)):
+        t0 = time.perf_counter()
+        sugg = corrector.suggest(term) if term not in index.df else [(term, 0, index.df[term])]
+        us = (time.perf_counter() - t0) * 1e6
+        print(f"{term:<16} -> " + ", ".join(f"{c} (d={d}, df={f})" for c, d, f in sugg) + f"  [{us:.0f} µs]")
+
+
+if __name__ == "__main__":
+    main()
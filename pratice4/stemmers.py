@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import argparse
+
+# ---------------------------
+# Stemmers légers
+# ---------------------------
+VOWELS = set("aeiou")
+
+
+class SStemmer:
+    """
+    S-stemmer (Harman 1991) : ne traite que les pluriels, une seule règle appliquée.
+      -ies (sauf -eies, -aies) -> -y
+      -es  (sauf -aes, -ees, -oes) -> -e
+      -s   (sauf -us, -ss) -> ''
+    """
+
+    def stem(self, t):
+        if len(t) <= 3:
+            return t
+        if t.endswith("ies") and not t.endswith(("eies", "aies")):
+            return t[:-3] + "y"
+        if t.endswith("es") and not t.endswith(("aes", "ees", "oes")):
+            return t[:-1]
+        if t.endswith("s") and not t.endswith(("us", "ss")):
+            return t[:-1]
+        return t
+
+
+class LightStemmer:
+    """
+    Stemmer flexionnel "à la Krovetz" (sans dictionnaire) :
+    pluriels via le S-stemmer puis suppression de -ing / -ed si le radical
+    restant contient une voyelle (running -> run, studied -> study).
+    """
+
+    def __init__(self):
+        self._plural = SStemmer()
+
+    def stem(self, t):
+        t = self._plural.stem(t)
+        if len(t) <= 4:
+            return t
+        for suffix in ("ing", "ed"):
+            if not t.endswith(suffix):
+                continue
+            base = t[:-len(suffix)]
+            if len(base) < 3 or not (VOWELS & set(base)):
+                return t
+            if suffix == "ed" and base.endswith("i"):
+                return base[:-1] + "y"
+            # consonne doublée : running -> run, stopped -> stop
+            if len(base) > 3 and base[-1] == base[-2] and base[-1] not in VOWELS and base[-1] not in "lsz":
+                return base[:-1]
+            return base
+        return t
+
+
+# ---------------------------
+# Registre des stemmers (nom -> fabrique)
+# ---------------------------
+def _porter():
+    # import différé de NLTK ; si absent "porter" retombe sur nostem
+    try:
+        from nltk.stem import PorterStemmer
+    except Exception:
+        return None
+    return PorterStemmer()
+
+
+STEMMERS = {
+    "nostem": lambda: None,
+    "porter": _porter,
+    "sstem": SStemmer,
+    "light": LightStemmer,
+}
+
+
+def register_stemmer(name, factory):
+    """
+    Ajoute un stemmer au registre. factory() doit renvoyer un objet ayant
+    .stem(token) -> str (ou None pour désactiver le stemming).
+    """
+    STEMMERS[name] = factory
+
+
+def get_stemmer(name):
+    """Instancie le stemmer enregistré sous `name` (None = pas de stemming)."""
+    if name not in STEMMERS:
+        raise ValueError(f"Stemmer inconnu : {name} (disponibles : {', '.join(sorted(STEMMERS))})")
+    return STEMMERS[name]()
+
+
+# ---------------------------
+# Benchmark coût / qualité
+# ---------------------------
+def index_size_bytes(postings):
+    """Taille mémoire approximative de l'index (dicts de postings + clés)."""
+    total = sys.getsizeof(postings)
+    for t, plist in postings.items():
+        total += sys.getsizeof(t) + sys.getsizeof(plist)
+    return total
+
+
+def benchmark_stemmers(docs, stopset, names):
+    """
+    Pour chaque stemmer : débit d'indexation (docs/s, tokens/s), taille du
+    vocabulaire (comme practice2 ex4), nombre de postings et taille de l'index.
+    Retour : liste de dicts (une ligne par stemmer).
+    """
+    from main import build_index
+
+    rows = []
+    for name in names:
+        stemmer = get_stemmer(name)
+        t0 = time.perf_counter()
+        postings, df, doc_len, doc_ids, stem_cache = build_index(docs, stopset, stemmer)
+        elapsed = time.perf_counter() - t0
+        n_tokens = sum(doc_len.values())
+        rows.append({
+            "stemmer": name,
+            "time": elapsed,
+            "docs_per_s": len(doc_ids) / elapsed if elapsed else 0.0,
+            "tokens_per_s": n_tokens / elapsed if elapsed else 0.0,
+            "vocab": len(df),
+            "postings": sum(df.values()),
+            "index_bytes": index_size_bytes(postings),
+        })
+    return rows
+
+
+def print_benchmark(rows):
+    print(f"{'stemmer':<8} {'temps(s)':>9} {'docs/s':>10} {'tokens/s':>12} {'vocab':>9} {'postings':>10} {'index(Mo)':>10}")
+    for r in rows:
+        print(f"{r['stemmer']:<8} {r['time']:>9.2f} {r['docs_per_s']:>10.0f} {r['tokens_per_s']:>12.0f} "
+              f"{r['vocab']:>9,} {r['postings']:>10,} {r['index_bytes'] / 1e6:>10.1f}")
+
+
+def main():
+    from main import DATAFILE, STOPFILE, load_collection, load_stopwords
+
+    ap = argparse.ArgumentParser(description="Benchmark des stemmers : débit d'indexation, vocabulaire, taille d'index.")
+    ap.add_argument("--data", default=DATAFILE, help="Chemin vers la collection.")
+    ap.add_argument("--stop", default=STOPFILE, help="Liste de stop-words ('' pour aucune).")
+    ap.add_argument("--stemmers", default=",".join(STEMMERS), help="Stemmers à comparer (séparés par des virgules).")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.data):
+        print(f"[ERROR] Collection manquante : {args.data}")
+        return
+    docs = load_collection(args.data)
+    stopset = load_stopwords(args.stop)
+    print(f"Documents chargés : {len(docs)}  stop-words : {len(stopset)}")
+    print_benchmark(benchmark_stemmers(docs, stopset, args.stemmers.split(",")))
+
+
+if __name__ == "__main__":
+    main()
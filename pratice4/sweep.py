@@ -0,0 +1,153 @@
+"""
+Balayage des paramètres BM25 (k1 × b) en une passe.
+
+Pour chaque requête, la matrice tf (candidats × termes) est remplie une fois
+(ltr.term_matrix) ; idf et avdl sont calculés une fois par index. Les scores
+de toute la grille sont obtenus par diffusion NumPy :
+    scores[g, d] = somme_t idf_t · tf·(k1_g + 1) / (tf + k1_g·(1 - b_g + b_g·dl/avdl))
+soit une matrice (points de la grille × candidats) par requête. Chaque point
+donne un run INEX (top-k complété comme top_k_with_padding) ; avec --qrels,
+MAP et P@10 de chaque point sont affichés.
+
+    python sweep.py --config stop671:porter --k1 0.6,0.9,1.2,1.5,2.0 --b 0.3,0.5,0.75,0.9 [--qrels qrels.txt]
+"""
+import os
+import time
+import argparse
+
+import numpy as np
+
+import main as ri
+from runio import format_run_block
+from ltr import term_matrix, load_qrels
+
+SWEEP_K1 = [0.6, 0.9, 1.2, 1.5, 2.0]
+SWEEP_B = [0.3, 0.5, 0.75, 0.9]
+SWEEP_DIR = os.path.join(ri.OUTPUT_DIR, "bm25_sweep")
+
+
+def sweep_scores(index, dnum, doc_len, terms, k1s, bs):
+    """
+    Retour : numéros des candidats, scores (len(k1s) × candidats), rang du
+    premier terme contenant chaque candidat ; k1s, bs : tableaux des points de la grille.
+    """
+    # termes dans l'ordre où score_query_bm25 les parcourt (set) : cf. top_k pour les ex aequo
+    cand, tf, uniq = term_matrix(index.postings, dnum, list(set(terms)))
+    if not len(cand):
+        return cand, np.zeros((len(k1s), 0)), cand
+    idf = np.array([ri.bm25_idf(index.df.get(t, 0), index.N) for t in uniq])
+    k1 = k1s[:, None, None]
+    norm = k1 * ((1.0 - bs[:, None, None]) + bs[:, None, None] * (doc_len[cand] / index.avdl)[None, :, None])
+    contrib = tf[None] * (k1 + 1.0) / (tf[None] + norm)
+    return cand, contrib @ idf, np.argmax(tf > 0, axis=1)
+
+
+def top_k(cand, scores, doc_ids, k, first_term):
+    """
+    top_k_with_padding pour une ligne de scores (tri par score décroissant, puis
+    docs non scorés). Ex aequo dans l'ordre d'insertion du dict de
+    score_query_bm25 : premier terme (ordre du set) contenant le doc, puis
+    numéro de doc (postings dans l'ordre de doc_ids).
+    """
+    n = min(k, len(cand))
+    keep = np.arange(len(cand))
+    if n < len(cand):
+        kth = np.partition(-scores, n - 1)[n - 1]
+        keep = np.flatnonzero(-scores <= kth)  # ex aequo du k-ième compris, départagés ci-dessous
+    keep = keep[np.lexsort((cand[keep], first_term[keep], -scores[keep]))][:n]
+    ranked = [(doc_ids[j], s) for j, s in zip(cand[keep].tolist(), scores[keep].tolist())]
+    return ri.top_k_with_padding(dict(ranked), doc_ids, k) if len(ranked) < k else ranked
+
+
+# ---------------------------
+# Évaluation
+# ---------------------------
+def evaluate(ranked_docids, relevant):
+    """(précision moyenne, P@10) d'une liste de docids pour l'ensemble des docs pertinents."""
+    if not relevant:
+        return 0.0, 0.0
+    hits = 0
+    ap = 0.0
+    for rank, d in enumerate(ranked_docids, start=1):
+        if d in relevant:
+            hits += 1
+            ap += hits / rank
+    p10 = sum(1 for d in ranked_docids[:10] if d in relevant) / 10
+    return ap / len(relevant), p10
+
+
+def run_sweep(index, queries, k1_values, b_values, k=ri.TOP_K, out_dir=SWEEP_DIR, qrels=None):
+    grid = [(k1, b) for k1 in k1_values for b in b_values]
+    k1s = np.array([g[0] for g in grid])
+    bs = np.array([g[1] for g in grid])
+    dnum = {d: i for i, d in enumerate(index.doc_ids)}
+    doc_len = np.array([index.doc_len.get(d, 0) for d in index.doc_ids], dtype=np.float64)
+    relevant = {}
+    for (qid, d), rel in (qrels or {}).items():
+        if rel > 0:
+            relevant.setdefault(qid, set()).add(d)
+
+    os.makedirs(out_dir, exist_ok=True)
+    stop_name, stem_name = index.name.split(":")
+    files = [open(os.path.join(out_dir, f"{ri.TEAM}_bm25_k{k1:g}_b{b:g}_{stop_name}_{stem_name}.txt"),
+                  "w", encoding="utf-8") for k1, b in grid]
+    metrics = np.zeros((len(grid), 2))
+    t_score = t_write = 0.0
+    try:
+        for qid, text in queries:
+            t0 = time.perf_counter()
+            cand, scores, first_term = sweep_scores(index, dnum, doc_len, index.query_terms(text), k1s, bs)
+            t1 = time.perf_counter()
+            for g, f in enumerate(files):
+                ranked = top_k(cand, scores[g], index.doc_ids, k, first_term)
+                f.write(format_run_block(qid, ranked))
+                if qrels is not None:
+                    metrics[g] += evaluate([d for d, _ in ranked], relevant.get(qid, set()))
+            t_score += t1 - t0
+            t_write += time.perf_counter() - t1
+    finally:
+        for f in files:
+            f.close()
+    return grid, metrics / max(1, len(queries)), t_score, t_write
+
+
+def main():
+    from searcher import LoadedIndex
+
+    ap = argparse.ArgumentParser(description="Balayage vectorisé de BM25 sur une grille (k1, b).")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--k1", default=",".join(f"{v:g}" for v in SWEEP_K1), help="Valeurs de k1 (virgules).")
+    ap.add_argument("--b", default=",".join(f"{v:g}" for v in SWEEP_B), help="Valeurs de b (virgules).")
+    ap.add_argument("--topics", default=None, help="Fichier de topics (cf. batch.load_topics) ; défaut : QUERIES.")
+    ap.add_argument("--qrels", default=None, help="Jugements (qid 0 docid rel) : MAP et P@10 par point.")
+    ap.add_argument("-k", type=int, default=ri.TOP_K)
+    ap.add_argument("--out", default=SWEEP_DIR, help="Répertoire des runs.")
+    args = ap.parse_args()
+
+    if args.topics:
+        from batch import load_topics
+        queries = load_topics(args.topics)
+    else:
+        queries = list(ri.QUERIES.items())
+    index = LoadedIndex(*args.config.split(":"))
+    k1_values = [float(v) for v in args.k1.split(",")]
+    b_values = [float(v) for v in args.b.split(",")]
+
+    t0 = time.perf_counter()
+    for _, text in queries:
+        index.score(index.query_terms(text), "bm25")
+    t_single = time.perf_counter() - t0
+
+    qrels = load_qrels(args.qrels) if args.qrels else None
+    grid, metrics, t_score, t_write = run_sweep(index, queries, k1_values, b_values, args.k, args.out, qrels)
+    print(f"{len(grid)} points × {len(queries)} requêtes : scores {t_score:.2f}s, runs {t_write:.2f}s "
+          f"(un run BM25 simple : {t_single:.2f}s de scoring, soit {t_score / t_single if t_single else 0:.1f} runs)")
+    print(f"runs écrits dans {args.out}")
+    if qrels is not None:
+        print(f"{'k1':>5} {'b':>5} {'MAP':>7} {'P@10':>6}")
+        for g in np.argsort(-metrics[:, 0], kind="stable"):
+            print(f"{grid[g][0]:>5g} {grid[g][1]:>5g} {metrics[g, 0]:>7.4f} {metrics[g, 1]:>6.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Index à deux niveaux (« champion lists ») pour un top-k approché rapide.
+
+Niveau 1 : pour chaque terme, les r documents de plus fort poids (ltn, ltc
+ou contribution BM25 idf_t · tf_adj, cf. compute_bm25_weights) ; niveau 2 :
+les postings complets. Une requête est d'abord évaluée sur le niveau 1 ; si
+moins de k documents y ont un score, elle est réévaluée sur les postings
+complets (résultat alors exact). Les poids du niveau 1 sont ceux de l'index
+complet (df et N globaux) : un score calculé au niveau 1 est exact pour les
+termes dont le doc est champion, il ne manque que les contributions hors
+champions.
+
+    python tiered.py --config stop671:porter [--method bm25] [-r 1500 -r 3000]
+"""
+import os
+import glob
+import time
+import math
+import heapq
+import argparse
+from collections import Counter, defaultdict
+
+import main as ri
+from runio import load_run
+from index_cache import cached_weights, get_cache
+
+CHAMPIONS_R = 2 * ri.TOP_K
+
+
+# ---------------------------
+# Construction du niveau 1
+# ---------------------------
+def champion_lists(weighted, r=CHAMPIONS_R):
+    """weighted : term -> {docid: poids}. Retour : term -> {docid: poids} des r plus forts poids."""
+    out = {}
+    for t, wmap in weighted.items():
+        if len(wmap) <= r:
+            out[t] = wmap
+        else:
+            out[t] = dict(heapq.nlargest(r, wmap.items(), key=lambda x: x[1]))
+    return out
+
+
+def method_weights(index, method):
+    """Poids complets d'une méthode pour un searcher.LoadedIndex (bm25 : contributions précalculées)."""
+    if method in ("ltn", "ltc"):
+        return index.weights[method]
+    return cached_weights(index.key, "bm25", lambda: ri.compute_bm25_weights(
+        index.postings, index.df, index.doc_len, index.N))[0]
+
+
+def load_champions(index, method, r=CHAMPIONS_R):
+    return get_cache().get_or_build(index.key, f"champions_{method}_{r}",
+                                    lambda: champion_lists(method_weights(index, method), r))
+
+
+# ---------------------------
+# Évaluation
+# ---------------------------
+def score_weighted(weighted, query_terms, method):
+    """Somme des poids ; requête lnn pour ltn / ltc (comme score_query_ltn), chaque terme une fois pour bm25."""
+    if method == "bm25":
+        q_w = {t: 1.0 for t in set(query_terms)}
+    else:
+        q_w = {t: 1.0 + math.log10(tf) for t, tf in Counter(query_terms).items()}
+    scores = defaultdict(float)
+    for t, wq in q_w.items():
+        for d, w in weighted.get(t, {}).items():
+            scores[d] += w * wq
+    return scores
+
+
+class TieredIndex:
+    """Niveau 1 (champions) puis repli sur l'index complet d'un searcher.LoadedIndex."""
+
+    def __init__(self, index, method, r=CHAMPIONS_R):
+        self.index = index
+        self.method = method
+        self.r = r
+        self.tier1 = load_champions(index, method, r)
+
+    def score(self, terms, k=ri.TOP_K):
+        """Retour : scores, niveau utilisé (1 ou 2)."""
+        scores = score_weighted(self.tier1, terms, self.method)
+        if len(scores) >= k:
+            return scores, 1
+        return self.index.score(terms, self.method), 2
+
+    def search(self, text, k=ri.TOP_K):
+        scores, _ = self.score(self.index.query_terms(text), k)
+        return ri.top_k_with_padding(scores, self.index.doc_ids, k)
+
+
+# ---------------------------
+# Benchmark : overlap@k avec les runs exhaustifs et accélération
+# ---------------------------
+def find_run(runs_dir, method, config):
+    """Run exhaustif de generated_runs/ pour (méthode, configuration), ou None."""
+    stop_name, stem_name = config.split(":")
+    paths = glob.glob(os.path.join(runs_dir, f"{ri.TEAM}_*_{method}_article_{stop_name}_{stem_name}_{method}.txt"))
+    return paths[0] if paths else None
+
+
+def benchmark(index, method, rs, queries, runs_dir, k=ri.TOP_K, repeat=3):
+    path = find_run(runs_dir, method, index.name)
+    ref_run = load_run(path) if path else {}
+    print(f"référence : {path or 'scoring exhaustif en mémoire (run absent)'}")
+    parsed = {qid: index.query_terms(text) for qid, text in queries.items()}
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        exact = {qid: ri.top_k_with_padding(index.score(terms, method), index.doc_ids, k)
+                 for qid, terms in parsed.items()}
+    ms_full = (time.perf_counter() - t0) * 1000 / repeat
+    refs = {qid: {d for d, _ in ref_run.get(qid) or exact[qid]} for qid in parsed}
+    n_post = sum(len(index.postings[t]) for terms in parsed.values() for t in set(terms) if t in index.postings)
+    print(f"{'index':<12} {'postings':>10} {'niveau 2':>9} {'ms':>9} {'accél.':>7} {'overlap@k':>10} {'min':>6}")
+    print(f"{'complet':<12} {n_post:>10,} {'-':>9} {ms_full:>9.2f} {1.0:>7.2f} "
+          f"{sum(len({d for d, _ in exact[q]} & refs[q]) / max(1, len(refs[q])) for q in parsed) / len(parsed):>10.3f}"
+          f" {'-':>6}")
+    for r in rs:
+        tiered = TieredIndex(index, method, r)
+        n_tier1 = sum(len(tiered.tier1.get(t, ())) for terms in parsed.values() for t in set(terms))
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            levels, got = {}, {}
+            for qid, terms in parsed.items():
+                scores, levels[qid] = tiered.score(terms, k)
+                got[qid] = ri.top_k_with_padding(scores, index.doc_ids, k)
+        ms = (time.perf_counter() - t0) * 1000 / repeat
+        overlaps = [len({d for d, _ in got[q]} & refs[q]) / max(1, len(refs[q])) for q in parsed]
+        n_fallback = sum(1 for lvl in levels.values() if lvl == 2)
+        print(f"{'r=' + str(r):<12} {n_tier1:>10,} {n_fallback:>4}/{len(parsed):<4} {ms:>9.2f} "
+              f"{ms_full / ms if ms else 0.0:>7.2f} {sum(overlaps) / len(overlaps):>10.3f} {min(overlaps):>6.3f}")
+
+
+def main():
+    from searcher import LoadedIndex
+
+    ap = argparse.ArgumentParser(description="Champion lists : top-k approché sur un index à deux niveaux.")
+    ap.add_argument("--config", default="stop671:porter", help="Configuration stop:stem.")
+    ap.add_argument("--method", choices=["ltn", "ltc", "bm25"], default="bm25")
+    ap.add_argument("-r", type=int, action="append", default=None,
+                    help=f"Taille des champion lists (répétable, défaut {CHAMPIONS_R}).")
+    ap.add_argument("-k", type=int, default=ri.TOP_K)
+    ap.add_argument("--topics", default=None, help="Fichier de topics (cf. batch.load_topics) ; défaut : QUERIES.")
+    ap.add_argument("--runs", default=ri.OUTPUT_DIR, help="Répertoire des runs exhaustifs.")
+    args = ap.parse_args()
+
+    index = LoadedIndex(*args.config.split(":"))
+    if args.topics:
+        from batch import load_topics
+        queries = dict(load_topics(args.topics))
+    else:
+        queries = ri.QUERIES
+    benchmark(index, args.method, args.r or [CHAMPIONS_R], queries, args.runs, args.k)
+
+
+if __name__ == "__main__":
+    main()